@@ -0,0 +1,116 @@
+import itertools
+
+import numpy as np
+import openmc as mc
+
+from csg_simplify import restrict_region
+from tracking_benchmark import measure_tracking_rate
+
+'''
+Acceleration overlay for the root universe of the cores. final_universe is a flat list of cells (blades, boxes, tank,
+reflector, shielding, air) so every cell search tests all of them, and the air and concrete cells are themselves long
+intersections of complements. The overlay puts a uniform background RectLattice over the root cell. Each lattice element
+is a container universe holding only the cells of final_universe that can occur in that element, with their regions
+restricted to the element (terms that are always true in it are dropped, cells that are always false in it are left out)
+and moved to the element coordinates. A cell search then tests a handful of short regions.
+
+The restriction is exact, so the overlay does not change the physics. A cell that straddles element faces is repeated in
+every element it touches, which multiplies the instances of the universes it is filled with: apply the overlay to
+transport runs, not to models that rely on distribcell tallies or distributed material fills.
+'''
+
+
+def _root_cell(geometry):
+    root_cells = list(geometry.root_universe.cells.values())
+    if len(root_cells) != 1 or not isinstance(root_cells[0].fill, mc.Universe):
+        raise ValueError('The acceleration overlay needs a root universe with a single cell filled with a universe')
+    return root_cells[0]
+
+
+def _element_cell(cell, region, center, memo):
+    # copy of cell in the coordinates of the lattice element centered on center, region is the restricted region
+    element_cell = mc.Cell(name=cell.name, fill=cell.fill)
+    if region is not True:
+        element_cell.region = region.translate(-center, inplace=False, memo=memo)
+    if cell.temperature is not None:
+        element_cell.temperature = cell.temperature
+    if cell.fill_type in ('universe', 'lattice'):
+        # the filled universe sees R(p - t), in element coordinates p - c this is R((p - c) - (t - c))
+        translation = cell.translation if cell.translation is not None else np.zeros(3)
+        element_cell.translation = np.asarray(translation, dtype=float) - center
+        if cell.rotation is not None:
+            element_cell.rotation = cell.rotation
+    return element_cell
+
+
+def build_acceleration_lattice(geometry, shape=(10, 10, 6), tolerance=1e-6):
+    '''
+    Replaces the fill of the root cell of geometry by a shape = (nx, ny, nz) lattice of container universes spanning
+    the root cell, with the original universe as the lattice outer universe. Returns a report with the number of cells
+    per element.
+    '''
+    root_cell = _root_cell(geometry)
+    universe = root_cell.fill
+    lower_left, upper_right = (np.asarray(corner, dtype=float) for corner in root_cell.region.bounding_box)
+    if not np.all(np.isfinite(lower_left) & np.isfinite(upper_right)):
+        raise ValueError(f'Root cell {root_cell.id} is not bounded, the lattice cannot span it')
+
+    shape = np.asarray(shape, dtype=int)
+    pitch = (upper_right - lower_left) / shape
+    cells = list(universe.cells.values())
+
+    # universes[z][y][x], the first row in y is the top one
+    universes = np.empty(shape[::-1], dtype=object)
+    cells_per_element = []
+    for index in itertools.product(*(range(n) for n in shape)):
+        element_lower_left = lower_left + np.asarray(index) * pitch
+        center = element_lower_left + pitch / 2
+        memo = {}
+        element_cells = []
+        for cell in cells:
+            region = restrict_region(cell.region, element_lower_left, element_lower_left + pitch, tolerance)
+            if region is not False:
+                element_cells.append(_element_cell(cell, region, center, memo))
+
+        ix, iy, iz = index
+        universes[iz, shape[1] - 1 - iy, ix] = mc.Universe(name=f'{universe.name} element {ix} {iy} {iz}',
+                                                           cells=element_cells)
+        cells_per_element.append(len(element_cells))
+
+    lattice = mc.RectLattice(name=f'{universe.name} acceleration lattice')
+    lattice.lower_left = lower_left
+    lattice.pitch = pitch
+    lattice.universes = universes
+    lattice.outer = universe
+    root_cell.fill = lattice
+
+    return {'shape': tuple(shape), 'cells': len(cells), 'max_cells_per_element': max(cells_per_element),
+            'mean_cells_per_element': float(np.mean(cells_per_element))}
+
+
+def accelerate_model(model, shape=(10, 10, 6), benchmark=True, **benchmark_kwargs):
+    # build_acceleration_lattice() on a model, with the tracking rate measured before and after when benchmark is True
+    if benchmark:
+        before = measure_tracking_rate(model, **benchmark_kwargs)
+    report = build_acceleration_lattice(model.geometry, shape)
+    if benchmark:
+        report['tracking_rate'] = {'before': before, 'after': measure_tracking_rate(model, **benchmark_kwargs)}
+    return report
+
+
+def print_report(report):
+    print(f"{report['shape']} lattice over {report['cells']} root cells: {report['mean_cells_per_element']:.1f} cells "
+          f"per element on average, {report['max_cells_per_element']} at most")
+    if 'tracking_rate' in report:
+        before = report['tracking_rate']['before']['active']
+        after = report['tracking_rate']['after']['active']
+        print(f'tracking rate: {before:.0f} -> {after:.0f} particles/s ({(after / before - 1) * 100:+.1f}%)')
+
+
+if __name__ == "__main__":
+    from fresh_core.fresh_core import build_model as build_fresh_core
+    from march2025_core.march2025_core import build_model as build_march2025_core
+
+    for core_name, build_model in [('fresh core', build_fresh_core), ('March 2025 core', build_march2025_core)]:
+        print(f'\n{core_name}')
+        print_report(accelerate_model(build_model(settings_profile='quick')))
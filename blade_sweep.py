@@ -0,0 +1,143 @@
+import tempfile
+
+import numpy as np
+import openmc.lib
+from openmc.utility_funcs import change_directory
+
+from fresh_core.fresh_core import CRITICAL_BLADE_POSITIONS, blade_rotation
+
+'''
+Blade position sweeps on a single openmc.lib session. The model is exported and OpenMC initialized (cross sections
+loaded) once, then every position is applied in memory by setting the rotation of the blade rotation cells (the cells
+named safety_blade_1_rotation ... regulating_blade_rotation in both cores) from the console units, 0 fully inserted to
+1000 fully withdrawn (0 to 45 degrees, see blade_rotation()).
+
+With warm_start, every run after the first starts from the fission source of the previous one and only runs
+warm_inactive inactive batches, as neighbouring blade positions have nearly the same source shape.
+
+    with BladeSweep(build_model(settings_profile='quick')) as sweep:
+        curve = sweep.sweep('regulating_blade', range(0, 1001, 50))
+'''
+
+
+def reactivity_pcm(keff, keff_std):
+    # reactivity (k - 1)/k in pcm and its standard deviation
+    return (1 - 1 / keff) * 1e5, keff_std / keff**2 * 1e5
+
+
+def rotation_cells(geometry):
+    # {blade: rotation cell} of a core geometry
+    cells = {}
+    for blade in CRITICAL_BLADE_POSITIONS:
+        found = geometry.get_cells_by_name(f'{blade}_rotation', matching=True)
+        if len(found) != 1:
+            raise ValueError(f'Expected one cell named {blade}_rotation in the model, found {len(found)}')
+        cells[blade] = found[0]
+    return cells
+
+
+def model_blade_positions(geometry):
+    # blade positions in console units that a core geometry was built with, read back from the rotation about x
+    return {blade: round(float(cell.rotation[0]) * (200/9), 6) for blade, cell in rotation_cells(geometry).items()}
+
+
+class BladeSweep:
+
+    def __init__(self, model, threads=None, warm_start=True, warm_inactive=None, directory=None):
+        self.model = model
+        self.threads = threads
+        self.warm_start = warm_start
+        self.warm_inactive = warm_inactive if warm_inactive is not None else max(model.settings.inactive // 5, 1)
+        self._parent_directory = directory
+
+        self._cells = rotation_cells(model.geometry)
+        self.positions = model_blade_positions(model.geometry)
+
+        self._tmp = None
+        self._source = None
+
+    def __enter__(self):
+        self._tmp = tempfile.TemporaryDirectory(dir=self._parent_directory)
+        self.model.export_to_xml(self._tmp.name)
+        with change_directory(self._tmp.name):
+            openmc.lib.init(args=['-s', str(self.threads)] if self.threads else None, output=False)
+        self._inactive = openmc.lib.settings.inactive
+        return self
+
+    def __exit__(self, *exc):
+        openmc.lib.finalize()
+        self._tmp.cleanup()
+        self._tmp = None
+        self._source = None
+
+    def set_positions(self, positions):
+        # moves the blades given in positions {blade: console units}, the other blades stay where they are
+        unknown = set(positions) - set(self._cells)
+        if unknown:
+            raise ValueError(f'Unknown blades {sorted(unknown)}, expected some of {list(self._cells)}')
+        for blade, position in positions.items():
+            openmc.lib.cells[self._cells[blade].id].rotation = blade_rotation(position)
+            self.positions[blade] = position
+
+    def _warm_source(self, size):
+        # source of the previous run, resampled when the number of particles per batch changed since
+        if len(self._source) == size:
+            return self._source
+        rng = np.random.default_rng(len(self._source))
+        return self._source[rng.choice(len(self._source), size, replace=size > len(self._source))]
+
+    def run(self, positions=None, particles=None):
+        '''
+        Runs an eigenvalue calculation with the blades moved to positions, with particles per batch when given (kept for
+        the next runs), and returns {'positions', 'particles', 'keff', 'keff_std', 'rho_pcm', 'rho_pcm_std'}.
+        '''
+        if self._tmp is None:
+            raise RuntimeError('BladeSweep must be used as a context manager, "with BladeSweep(model) as sweep:"')
+        if positions:
+            self.set_positions(positions)
+        if particles is not None:
+            openmc.lib.settings.particles = int(particles)
+
+        warm = self.warm_start and self._source is not None
+        openmc.lib.settings.inactive = self.warm_inactive if warm else self._inactive
+        with change_directory(self._tmp.name):
+            openmc.lib.hard_reset()
+            openmc.lib.simulation_init()
+            if warm:
+                bank = openmc.lib.source_bank()
+                bank[:] = self._warm_source(len(bank))
+            for _ in openmc.lib.iter_batches():
+                pass
+            self._source = np.copy(openmc.lib.source_bank())
+            openmc.lib.simulation_finalize()
+
+        keff, keff_std = openmc.lib.keff()
+        rho, rho_std = reactivity_pcm(keff, keff_std)
+        return {'positions': dict(self.positions), 'particles': openmc.lib.settings.particles, 'keff': keff,
+                'keff_std': keff_std, 'rho_pcm': rho, 'rho_pcm_std': rho_std}
+
+    def sweep(self, blade, positions, others=None):
+        # one run per position of blade, with the blades in others moved first, in the order given
+        if others:
+            self.set_positions(others)
+        return [self.run({blade: position}) for position in positions]
+
+
+def integral_worth(curve):
+    # reactivity of every point of a sweep relative to the first one, in pcm, with the two uncertainties combined
+    rho_0, std_0 = curve[0]['rho_pcm'], curve[0]['rho_pcm_std']
+    return [(point['rho_pcm'] - rho_0, np.hypot(point['rho_pcm_std'], std_0)) for point in curve]
+
+
+def print_curve(blade, curve):
+    for point, (worth, worth_std) in zip(curve, integral_worth(curve)):
+        print(f"{blade} {point['positions'][blade]:>6.0f}  k = {point['keff']:.5f} +/- {point['keff_std']:.5f}  "
+              f"worth = {worth:8.1f} +/- {worth_std:.1f} pcm")
+
+
+if __name__ == "__main__":
+    from fresh_core.fresh_core import build_model
+
+    # 20 point integral worth curve of the regulating blade, the safety blades at their critical position
+    with BladeSweep(build_model(settings_profile='quick')) as sweep:
+        print_curve('regulating_blade', sweep.sweep('regulating_blade', np.linspace(0, 1000, 20)))
@@ -0,0 +1,135 @@
+import os
+import tempfile
+
+import numpy as np
+import openmc as mc
+
+'''
+Burn regions for the depletion of the cores. The fuel of a core is a single depletable material filling every plate, so
+every plate burns at the core average rate. Depleting every plate on its own (308 fuel plates in the fresh core) would
+multiply the memory and the CRAM solves by as much, so the plates are grouped instead:
+
+ 1- a short survey run tallies the two group flux (thermal below 0.625 eV) in every plate with a distribcell filter,
+ 2- the plates are clustered into n_regions burn regions by k-means on the log of their group fluxes,
+ 3- the fuel material is cloned once per region (same composition, volume of the plates of the region) and the plate
+    meat cell gets a distributed fill pointing every plate at the material of its region.
+
+The survey needs enough histories in every plate for the clusters to follow the flux and not the statistical noise:
+SURVEY_PROFILE gives a few million active histories, and the survey is refused when the relative error of a plate flux is
+above max_rel_err. The depletion solves of the regions are independent, openmc.deplete already spreads them over all
+local cores.
+'''
+
+THERMAL_CUTOFF = 0.625  # eV
+
+# settings profile of the flux survey, about 2e6 active histories for the 308 plates of the fresh core
+SURVEY_PROFILE = {'batches': 150, 'inactive': 50, 'particles': 20000, 'create_delayed_neutrons': True}
+
+
+def _meat_cell(geometry, material):
+    cells = [cell for cell in geometry.get_all_cells().values() if cell.fill is material]
+    if len(cells) != 1:
+        raise RuntimeError(f'Expected one cell filled with {material.name}, found {len(cells)}')
+    return cells[0]
+
+
+def flux_survey(model, cells, threads=None, directory=None):
+    '''
+    Runs model with a two group distribcell flux tally on each of cells and returns {cell id: ((instances, 2) array,
+    (instances, 2) array)} of the flux per source particle in every instance of the cell and its standard deviation.
+    '''
+    tallies = mc.Tallies()
+    for cell in cells:
+        tally = mc.Tally(name=f'plate flux {cell.id}')
+        tally.filters = [mc.DistribcellFilter(cell), mc.EnergyFilter([0.0, THERMAL_CUTOFF, 20.0e6])]
+        tally.scores = ['flux']
+        tallies.append(tally)
+
+    survey = mc.Model(geometry=model.geometry, materials=model.materials, settings=model.settings, tallies=tallies)
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        statepoint = survey.run(cwd=tmp, threads=threads, output=False)
+        with mc.StatePoint(os.path.join(tmp, statepoint)) as sp:
+            tallies = {cell.id: sp.get_tally(name=f'plate flux {cell.id}') for cell in cells}
+            return {cell_id: (tally.mean.reshape(-1, 2), tally.std_dev.reshape(-1, 2))
+                    for cell_id, tally in tallies.items()}
+
+
+def cluster(features, n_clusters, iterations=100):
+    '''
+    k-means labels of the rows of features, started from the quantiles of the first column so that the labels are
+    reproducible. Clusters are numbered by increasing mean of the first column.
+    '''
+    features = np.asarray(features, dtype=float)
+    n_clusters = min(n_clusters, len(features))
+    scaled = (features - features.mean(axis=0)) / np.where(features.std(axis=0) > 0, features.std(axis=0), 1.0)
+
+    order = np.argsort(scaled[:, 0])
+    centers = scaled[order[(2 * np.arange(n_clusters) + 1) * len(order) // (2 * n_clusters)]]
+    labels = None
+    for _ in range(iterations):
+        distances = ((scaled[:, None, :] - centers[None, :, :])**2).sum(axis=2)
+        new_labels = distances.argmin(axis=1)
+        if labels is not None and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        centers = np.array([scaled[labels == k].mean(axis=0) if np.any(labels == k) else centers[k]
+                            for k in range(n_clusters)])
+
+    # empty clusters are dropped and the others renumbered by increasing flux
+    used = [k for k in np.argsort(centers[:, 0]) if np.any(labels == k)]
+    renumber = {k: i for i, k in enumerate(used)}
+    return np.array([renumber[k] for k in labels])
+
+
+def split_burn_regions(model, cell, material, labels):
+    '''
+    Replaces material in model by one clone per burn region, each holding the volume of its plates, and fills cell
+    instance i with the clone of region labels[i]. Returns the list of region materials.
+    '''
+    n_regions = int(labels.max()) + 1
+    regions = []
+    for k in range(n_regions):
+        region = material.clone()
+        region.name = f'{material.name} burn region {k}'
+        region.volume = material.volume * np.count_nonzero(labels == k) / len(labels)
+        regions.append(region)
+
+    cell.fill = [regions[k] for k in labels]
+    model.materials = mc.Materials([m for m in model.materials if m is not material] + regions)
+    return regions
+
+
+def burn_region_model(core, n_regions=8, material_names=None, survey_profile=SURVEY_PROFILE, max_rel_err=0.05,
+                      core_state=None, blade_positions=None, settings_profile='default', loading_pattern=None,
+                      threads=None):
+    '''
+    build_model() of the core module core with each fuel material in material_names (by default every fuel of
+    PLATE_MATERIALS) split into n_regions burn regions by flux similarity. Returns the model and
+    {material name: [region materials]}. Raises a ValueError when a plate flux of the survey has a relative error above
+    max_rel_err.
+    '''
+    if material_names is None:
+        material_names = [name for name in core.PLATE_MATERIALS.values() if name != 'Al6061']
+
+    mc.reset_auto_ids()
+    materials = core.build_materials(core_state)
+    geometry = core.build_geometry(materials, blade_positions, loading_pattern)
+    model = mc.Model(geometry=geometry, materials=mc.Materials(materials.values()),
+                     settings=core.build_settings(survey_profile))
+
+    # a fuel that fills no plate of the loading pattern (e.g. new fuel in a pattern without new plates) is left alone
+    cells = {name: _meat_cell(geometry, materials[name]) for name in material_names
+             if materials[name] in geometry.get_all_materials().values()}
+    fluxes = flux_survey(model, cells.values(), threads)
+
+    model.settings = core.build_settings(settings_profile)
+    regions = {}
+    for name, cell in cells.items():
+        flux, std_dev = fluxes[cell.id]
+        rel_err = np.divide(std_dev, flux, out=np.full_like(flux, np.inf), where=flux > 0)
+        if rel_err.max() > max_rel_err:
+            raise ValueError(f'The survey flux of a {name} plate has a relative error of {rel_err.max():.3f}, above '
+                             f'{max_rel_err}: the regions would follow the noise, use a survey_profile with more histories')
+        labels = cluster(np.log(np.maximum(flux, 1e-30)), n_regions)
+        regions[name] = split_burn_regions(model, cell, materials[name], labels)
+    return model, regions
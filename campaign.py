@@ -0,0 +1,140 @@
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import openmc as mc
+
+from blade_sweep import reactivity_pcm
+from fresh_core.fresh_core import CRITICAL_BLADE_POSITIONS
+from model_export import model_digest
+
+'''
+Campaign runner for the reactivity parameters of Tables 1 and 2 of the README. The requested parameters are expanded into
+the unique blade configurations they need, which run in parallel on a local process pool:
+
+    excess reactivity        rho(all blades out)
+    <blade> worth            rho(all blades out) - rho(<blade> inserted, the others out)
+    shutdown margin          -rho(all blades inserted but the most reactive one, which stays out)
+
+The shutdown margin configuration depends on the worths, so it runs in a second stage once they are known. Every k-eff is
+cached on disk under the hash of the exported model (model_export.model_digest()), so re-running a campaign after a
+change only recomputes the cases whose XML changed, and cases shared between parameters or campaigns run once.
+
+    results = run_campaign(build_model, PARAMETERS, core_state=..., settings_profile='production')
+'''
+
+BLADES = tuple(CRITICAL_BLADE_POSITIONS)
+PARAMETERS = ('excess_reactivity', 'shutdown_margin') + tuple(f'{blade}_worth' for blade in BLADES)
+
+WITHDRAWN = 1000
+INSERTED = 0
+
+
+def _all_out():
+    return {blade: WITHDRAWN for blade in BLADES}
+
+
+def _inserted(blade):
+    return {**_all_out(), blade: INSERTED}
+
+
+def _key(positions):
+    return tuple(sorted(positions.items()))
+
+
+def _run_case(build_model, build_kwargs, positions, cache, threads):
+    # k-eff of one blade configuration, from the cache when the same model already ran, runs in a worker process
+    model = build_model(blade_positions=positions, **build_kwargs)
+    path = os.path.join(cache, model_digest(model) + '.json')
+    if os.path.exists(path):
+        with open(path) as fh:
+            return json.load(fh)
+
+    with tempfile.TemporaryDirectory(dir=cache) as tmp:
+        statepoint = model.run(cwd=tmp, threads=threads, output=False)
+        with mc.StatePoint(os.path.join(tmp, statepoint), autolink=False) as sp:
+            result = {'positions': positions, 'keff': sp.keff.nominal_value, 'keff_std': sp.keff.std_dev}
+
+    fd, tmp_path = tempfile.mkstemp(prefix='.', suffix='.json', dir=cache)
+    with os.fdopen(fd, 'w') as fh:
+        json.dump(result, fh, indent=2)
+    os.replace(tmp_path, path)
+    return result
+
+
+class Campaign:
+
+    def __init__(self, build_model, cache='campaign_cache', max_workers=None, threads=None, **build_kwargs):
+        self.build_model = build_model
+        self.build_kwargs = build_kwargs
+        self.cache = os.path.abspath(cache)
+        # the cores are split between the workers, os.cpu_count() // max_workers OpenMP threads each by default
+        self.max_workers = max_workers or os.cpu_count()
+        self.threads = threads if threads is not None else max(os.cpu_count() // self.max_workers, 1)
+        os.makedirs(self.cache, exist_ok=True)
+
+    def run_cases(self, configurations):
+        # {configuration key: result} for the unique configurations, the uncached ones running in parallel
+        unique = {_key(positions): positions for positions in configurations}
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {key: pool.submit(_run_case, self.build_model, self.build_kwargs, positions, self.cache,
+                                        self.threads) for key, positions in unique.items()}
+            return {key: future.result() for key, future in futures.items()}
+
+    def run(self, parameters=PARAMETERS):
+        '''
+        Computes the reactivity parameters in pcm, returns {parameter: (value, standard deviation)} and the k-eff of every
+        configuration under 'cases'.
+        '''
+        unknown = set(parameters) - set(PARAMETERS)
+        if unknown:
+            raise ValueError(f'Unknown parameters {sorted(unknown)}, expected some of {list(PARAMETERS)}')
+
+        # the shutdown margin needs every worth to know which blade is the most reactive one
+        worths = set(f'{blade}_worth' for blade in BLADES) if 'shutdown_margin' in parameters else set()
+        first_stage = [_all_out()] + [_inserted(blade) for blade in BLADES
+                                      if f'{blade}_worth' in set(parameters) | worths]
+        cases = self.run_cases(first_stage)
+
+        rho = {key: reactivity_pcm(case['keff'], case['keff_std']) for key, case in cases.items()}
+        out = rho[_key(_all_out())]
+        results = {'excess_reactivity': out}
+        for blade in BLADES:
+            if _key(_inserted(blade)) in rho:
+                inserted = rho[_key(_inserted(blade))]
+                results[f'{blade}_worth'] = (out[0] - inserted[0], np.hypot(out[1], inserted[1]))
+
+        if 'shutdown_margin' in parameters:
+            stuck = max(BLADES, key=lambda blade: results[f'{blade}_worth'][0])
+            positions = {blade: INSERTED for blade in BLADES}
+            positions[stuck] = WITHDRAWN
+            cases.update(self.run_cases([positions]))
+            shutdown = reactivity_pcm(cases[_key(positions)]['keff'], cases[_key(positions)]['keff_std'])
+            results['shutdown_margin'] = (-shutdown[0], shutdown[1])
+            results['stuck_blade'] = stuck
+
+        results = {name: value for name, value in results.items() if name in parameters or name == 'stuck_blade'}
+        results['cases'] = list(cases.values())
+        return results
+
+
+def run_campaign(build_model, parameters=PARAMETERS, **kwargs):
+    # Campaign(build_model, **kwargs).run(parameters), kwargs holding the Campaign options and build_model() arguments
+    return Campaign(build_model, **kwargs).run(parameters)
+
+
+def print_results(results):
+    for parameter in PARAMETERS:
+        if parameter in results:
+            value, std = results[parameter]
+            print(f"{parameter.replace('_', ' '):<28} {value:8.0f} +/- {std:.0f} pcm")
+    if 'stuck_blade' in results:
+        print(f"(shutdown margin with {results['stuck_blade'].replace('_', ' ')} stuck out)")
+
+
+if __name__ == "__main__":
+    from fresh_core.fresh_core import build_model
+
+    print_results(run_campaign(build_model, settings_profile='quick'))
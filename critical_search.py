@@ -0,0 +1,115 @@
+import numpy as np
+
+from blade_sweep import BladeSweep, reactivity_pcm
+
+'''
+Critical position search: the position of one blade (by default the regulating blade, the others staying where the model
+puts them) at which the core reaches a target k-eff, 1 by default.
+
+Runs share one BladeSweep session, so every iterate starts from the fission source of the previous one and only runs a
+few inactive batches. The search keeps a bracket [lower, upper] of positions whose reactivity is significantly below and
+above the target (more than z standard deviations away). Points that are statistically indistinguishable from the target
+never move the bracket. The next position is the root of a weighted (1/sigma^2) straight line fit through the points
+inside the bracket (a secant step that averages out the noise) kept away from the bracket ends, or the middle of the
+bracket when the fit is unusable. The particles per batch grow by growth at every iterate, so the first steps are cheap
+and the last ones precise. The search stops when an iterate is within z standard deviations of the target with a
+standard deviation below tolerance_pcm.
+'''
+
+
+def _fit_root(points, lower, upper):
+    # root of the weighted line through the points of the bracket, None when the fit gives no root inside it
+    inside = [point for point in points if lower <= point['position'] <= upper]
+    if len({point['position'] for point in inside}) < 2:
+        return None, None
+    x = np.array([point['position'] for point in inside])
+    y = np.array([point['excess_pcm'] for point in inside])
+    weights = 1 / np.array([point['rho_pcm_std'] for point in inside])**2
+
+    x_mean = np.average(x, weights=weights)
+    y_mean = np.average(y, weights=weights)
+    slope = np.sum(weights * (x - x_mean) * (y - y_mean)) / np.sum(weights * (x - x_mean)**2)
+    if not slope > 0:
+        return None, None
+    root = x_mean - y_mean / slope
+    return (root, slope) if lower < root < upper else (None, slope)
+
+
+def find_critical_position(sweep, blade='regulating_blade', target_keff=1.0, bracket=(0, 1000), particles=None,
+                           growth=1.5, max_particles=None, tolerance_pcm=20.0, z=2.0, max_iterations=12):
+    '''
+    Searches the position of blade (console units) giving target_keff with the open BladeSweep session sweep. particles
+    is the number of particles per batch of the first runs (the model setting by default), max_particles caps its growth.
+    Returns {'position', 'position_std', 'keff', 'keff_std', 'converged', 'iterates'}.
+    '''
+    target_pcm = reactivity_pcm(target_keff, 0.0)[0]
+    n_particles = particles if particles is not None else sweep.model.settings.particles
+    points = []
+
+    def evaluate(position):
+        point = sweep.run({blade: position}, particles=n_particles)
+        point['position'] = position
+        point['excess_pcm'] = point['rho_pcm'] - target_pcm
+        points.append(point)
+        return point
+
+    def sign(point):
+        # -1 or 1 when the point is significantly below or above the target, 0 when it cannot be told apart from it
+        if abs(point['excess_pcm']) <= z * point['rho_pcm_std']:
+            return 0
+        return int(np.sign(point['excess_pcm']))
+
+    # withdrawing a blade adds reactivity, so the target lies between a subcritical lower and a supercritical upper end
+    lower, upper = bracket
+    low, high = evaluate(lower), evaluate(upper)
+    if sign(low) > 0 or sign(high) < 0:
+        raise ValueError(f'k-eff {target_keff} is not reached between {blade} positions {lower} and {upper} '
+                         f'(k = {low["keff"]:.5f} and {high["keff"]:.5f})')
+
+    converged = False
+    for _ in range(max_iterations):
+        root, _ = _fit_root(points, lower, upper)
+        width = upper - lower
+        if root is None:
+            position = lower + width / 2
+        else:
+            position = float(np.clip(root, lower + 0.05 * width, upper - 0.05 * width))
+
+        n_particles = int(n_particles * growth)
+        if max_particles is not None:
+            n_particles = min(n_particles, max_particles)
+        point = evaluate(position)
+
+        if sign(point) < 0:
+            lower = position
+        elif sign(point) > 0:
+            upper = position
+        if sign(point) == 0 and point['rho_pcm_std'] <= tolerance_pcm:
+            converged = True
+            break
+
+    best = points[-1] if converged else min(points, key=lambda point: abs(point['excess_pcm']))
+    # uncertainty of the position from the reactivity uncertainty and the local slope of the worth curve
+    _, slope = _fit_root(points, lower, upper)
+    position_std = best['rho_pcm_std'] / slope if slope else None
+    return {'position': best['position'], 'position_std': position_std, 'keff': best['keff'],
+            'keff_std': best['keff_std'], 'converged': converged, 'iterates': points}
+
+
+def print_search(blade, result):
+    for point in result['iterates']:
+        print(f"{blade} {point['position']:>7.1f}  {point['particles']:>8} particles  "
+              f"k = {point['keff']:.5f} +/- {point['keff_std']:.5f}")
+    status = 'converged' if result['converged'] else 'NOT converged'
+    std = f" +/- {result['position_std']:.1f}" if result['position_std'] is not None else ''
+    print(f"critical {blade} position: {result['position']:.1f}{std} ({status})")
+
+
+if __name__ == "__main__":
+    from fresh_core.fresh_core import build_model
+
+    # regulating blade position for the fresh core with the safety blades at 570
+    model = build_model(blade_positions={'safety_blade_1': 570, 'safety_blade_2': 570, 'safety_blade_3': 570},
+                        settings_profile='quick')
+    with BladeSweep(model) as sweep:
+        print_search('regulating_blade', find_critical_position(sweep, particles=1000, max_particles=20000))
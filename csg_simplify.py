@@ -0,0 +1,297 @@
+import numpy as np
+import openmc as mc
+
+from tracking_benchmark import measure_tracking_rate
+
+'''
+Model level simplification pass for the outer cells of the cores (graphite, concrete, air, water tank). These cells are
+written as an intersection of complements of every box, blade and port, so each particle in the reflector or shielding
+evaluates all of their planes. The pass
+
+ 1- merges coincident surfaces (e.g. north_air_right and thermal_column_left are both XPlane(x0=CORE_WIDTH/2)),
+ 2- flattens nested intersections and removes repeated terms,
+ 3- drops complement terms that cannot change the result: ~X is redundant when the bounding box of X is disjoint from
+    the bounding box of the positive part of the cell, or when X lies inside another complemented term of the same cell
+    (e.g. every box and blade lies inside concrete_region, so ~concrete_region already excludes them from the air cell),
+ 4- puts the cheap plane halfspaces ahead of the complemented terms.
+
+Every rewritten region is checked against the original by point sampling before it replaces it.
+'''
+
+AXIS_PLANES = {'x-plane': 0, 'y-plane': 1, 'z-plane': 2}
+
+
+#####################################################################################
+#                               SURFACE DE-DUPLICATION                              #
+#####################################################################################
+
+def _surface_key(surface, decimals):
+    coefficients = tuple(sorted((key, round(value, decimals)) for key, value in surface.coefficients.items()))
+    return (surface.type, surface.boundary_type, coefficients)
+
+
+def _rewrite_surfaces(region, canonical):
+    if isinstance(region, mc.Halfspace):
+        region.surface = canonical.get(region.surface.id, region.surface)
+    elif isinstance(region, mc.Complement):
+        _rewrite_surfaces(region.node, canonical)
+    elif region is not None:
+        for node in region:
+            _rewrite_surfaces(node, canonical)
+
+
+def merge_coincident_surfaces(geometry, decimals=10):
+    # points every halfspace at one surface per unique (type, coefficients, boundary), returns {removed id: kept id}
+    kept = {}
+    canonical = {}
+    for surface_id, surface in sorted(geometry.get_all_surfaces().items()):
+        key = _surface_key(surface, decimals)
+        if key in kept:
+            canonical[surface_id] = kept[key]
+        else:
+            kept[key] = surface
+
+    for cell in geometry.get_all_cells().values():
+        _rewrite_surfaces(cell.region, canonical)
+    return {surface_id: surface.id for surface_id, surface in canonical.items()}
+
+
+#####################################################################################
+#                                 REGION REWRITING                                  #
+#####################################################################################
+
+def _terms(region):
+    # flattened list of the terms of an intersection, complements of halfspaces and unions are pushed inwards
+    if isinstance(region, mc.Intersection):
+        return [term for node in region for term in _terms(node)]
+    if isinstance(region, mc.Complement):
+        node = region.node
+        if isinstance(node, mc.Halfspace):
+            return [~node]
+        if isinstance(node, mc.Union):
+            return [term for sub_node in node for term in _terms(mc.Complement(sub_node))]
+    return [region]
+
+
+def _bounds(bounding_box):
+    lower_left, upper_right = bounding_box
+    return np.asarray(lower_left, dtype=float), np.asarray(upper_right, dtype=float)
+
+
+def _box(region):
+    return _bounds(region.bounding_box)
+
+
+def _intersect(box_a, box_b):
+    return np.maximum(box_a[0], box_b[0]), np.minimum(box_a[1], box_b[1])
+
+
+def _disjoint(box_a, box_b):
+    lower_left, upper_right = _intersect(box_a, box_b)
+    return bool(np.any(upper_right <= lower_left))
+
+
+def _inside(box_a, box_b):
+    return bool(np.all(box_a[0] >= box_b[0]) and np.all(box_a[1] <= box_b[1]))
+
+
+def _container(region):
+    # an axis aligned box with complemented holes, as (box, [hole boxes]), or None if region is anything else
+    lower_left = np.full(3, -np.inf)
+    upper_right = np.full(3, np.inf)
+    holes = []
+    for term in _terms(region):
+        if isinstance(term, mc.Halfspace) and term.surface.type in AXIS_PLANES:
+            axis = AXIS_PLANES[term.surface.type]
+            value = term.surface.coefficients[term.surface.type[0] + '0']
+            if term.side == '+':
+                lower_left[axis] = max(lower_left[axis], value)
+            else:
+                upper_right[axis] = min(upper_right[axis], value)
+        elif isinstance(term, mc.Complement):
+            holes.append(_box(term.node))
+        else:
+            return None
+    return (lower_left, upper_right), holes
+
+
+def _contains(container, box):
+    outer, holes = container
+    return _inside(box, outer) and all(_disjoint(box, hole) for hole in holes)
+
+
+def _count_halfspaces(region):
+    if isinstance(region, mc.Halfspace):
+        return 1
+    if isinstance(region, mc.Complement):
+        return _count_halfspaces(region.node)
+    return sum(_count_halfspaces(node) for node in region)
+
+
+def simplify_region(region):
+    # equivalent, cheaper form of an intersection region, together with the complemented regions that were dropped
+    terms = []
+    seen = set()
+    for term in _terms(region):
+        if str(term) not in seen:
+            seen.add(str(term))
+            terms.append(term)
+
+    positive = [term for term in terms if not isinstance(term, mc.Complement)]
+    complements = [term for term in terms if isinstance(term, mc.Complement)]
+
+    positive_box = (np.full(3, -np.inf), np.full(3, np.inf))
+    for term in positive:
+        positive_box = _intersect(positive_box, _box(term))
+
+    containers = {id(term): _container(term.node) for term in complements}
+    kept, dropped = [], []
+    for term in complements:
+        box = _box(term.node)
+        # a term dropped because it lies inside another one stays excluded if that one is dropped later, as containment
+        # and disjointness both carry over
+        redundant = _disjoint(box, positive_box) or any(
+            other is not term and all(other is not term_dropped for term_dropped in dropped)
+            and containers[id(other)] is not None and _contains(containers[id(other)], box) for other in complements)
+        (dropped if redundant else kept).append(term)
+
+    halfspaces = [term for term in positive if isinstance(term, mc.Halfspace)]
+    others = [term for term in positive if not isinstance(term, mc.Halfspace)]
+    kept.sort(key=_count_halfspaces)
+    return mc.Intersection(halfspaces + others + kept), [term.node for term in dropped]
+
+
+def restrict_region(region, lower_left, upper_right, tolerance=1e-6):
+    '''
+    Form of region that is only guaranteed to be equivalent inside the box [lower_left, upper_right]. Returns False when
+    region holds no point of the box and True when it holds all of them. A halfspace is decided when the bounding box of
+    it or of its complement misses the box, which is exact for planes and conservative for the other surfaces. The box
+    is grown by tolerance so that terms touching its faces are kept.
+    '''
+    box = (np.asarray(lower_left, dtype=float) - tolerance, np.asarray(upper_right, dtype=float) + tolerance)
+
+    def restrict(node):
+        if node is None:
+            return True
+        if isinstance(node, mc.Halfspace):
+            if _disjoint(_box(node), box):
+                return False
+            if _disjoint(_box(~node), box):
+                return True
+            return node
+        if isinstance(node, mc.Complement):
+            inner = restrict(node.node)
+            return (not inner) if isinstance(inner, bool) else mc.Complement(inner)
+
+        # Intersection and Union, short-circuiting on the value that decides them
+        decisive = isinstance(node, mc.Union)
+        nodes = []
+        for sub_node in node:
+            restricted = restrict(sub_node)
+            if restricted is decisive:
+                return decisive
+            if restricted is not (not decisive):
+                nodes.append(restricted)
+        if not nodes:
+            return not decisive
+        if len(nodes) == 1:
+            return nodes[0]
+        return type(node)(nodes)
+
+    return restrict(region)
+
+
+#####################################################################################
+#                                   VERIFICATION                                    #
+#####################################################################################
+
+def count_mismatches(region_a, region_b, bounds, n_points=10000, focus=(), seed=1):
+    # samples points uniformly in bounds, and half of them inside the focus regions when given, returns the points
+    # where region_a and region_b disagree
+    rng = np.random.default_rng(seed)
+    boxes = [bounds] + [_intersect(_box(region), bounds) for region in focus]
+    boxes = [box for box in boxes if np.all(box[1] > box[0]) and np.all(np.isfinite(box[0] + box[1]))]
+
+    mismatches = []
+    n_focus = n_points // 2 if len(boxes) > 1 else 0
+    samples = [(boxes[0], n_points - n_focus)]
+    samples += [(box, n_focus // (len(boxes) - 1)) for box in boxes[1:]]
+    for (lower_left, upper_right), n in samples:
+        for point in rng.uniform(lower_left, upper_right, size=(n, 3)):
+            if (tuple(point) in region_a) != (tuple(point) in region_b):
+                mismatches.append(point)
+    return mismatches
+
+
+#####################################################################################
+#                                    MODEL PASS                                     #
+#####################################################################################
+
+def _root_cells(geometry):
+    # the cells of the universe filling the single root cell (final_universe in both cores) and the root cell bounds
+    root_cells = list(geometry.root_universe.cells.values())
+    if len(root_cells) == 1 and isinstance(root_cells[0].fill, mc.Universe):
+        return list(root_cells[0].fill.cells.values()), _box(root_cells[0].region)
+    return root_cells, _bounds(geometry.root_universe.bounding_box)
+
+
+def simplify_geometry(geometry, cells=None, n_points=10000, seed=1):
+    '''
+    Merges coincident surfaces and rewrites the regions of cells (by default the cells of final_universe) in place.
+    A region is only replaced when point sampling finds no disagreement with the original, a cell whose rewrite disagrees
+    keeps its region and is listed under 'rejected'. Returns a report with the number of halfspaces in each rewritten
+    region before and after.
+    '''
+    merged = merge_coincident_surfaces(geometry)
+    default_cells, bounds = _root_cells(geometry)
+
+    report = {'merged_surfaces': merged, 'cells': [], 'rejected': []}
+    for cell in cells if cells is not None else default_cells:
+        if not isinstance(cell.region, (mc.Intersection, mc.Complement)):
+            continue
+        simplified, dropped = simplify_region(cell.region)
+        before, after = _count_halfspaces(cell.region), _count_halfspaces(simplified)
+        if after >= before:
+            continue
+        mismatches = count_mismatches(cell.region, simplified, bounds, n_points, dropped, seed)
+        if mismatches:
+            report['rejected'].append({'cell': cell.id, 'name': cell.name, 'mismatches': len(mismatches),
+                                       'example': mismatches[0]})
+            continue
+        cell.region = simplified
+        report['cells'].append({'cell': cell.id, 'name': cell.name, 'halfspaces_before': before,
+                                'halfspaces_after': after, 'dropped_terms': len(dropped)})
+    return report
+
+
+def simplify_model(model, benchmark=True, n_points=10000, **benchmark_kwargs):
+    # simplify_geometry() on a model, with the tracking rate measured before and after when benchmark is True
+    if benchmark:
+        before = measure_tracking_rate(model, **benchmark_kwargs)
+    report = simplify_geometry(model.geometry, n_points=n_points)
+    if benchmark:
+        report['tracking_rate'] = {'before': before, 'after': measure_tracking_rate(model, **benchmark_kwargs)}
+    return report
+
+
+def print_report(report):
+    print(f"{len(report['merged_surfaces'])} coincident surfaces merged")
+    for entry in report['cells']:
+        print(f"cell {entry['cell']:>5}: {entry['halfspaces_before']:>4} -> {entry['halfspaces_after']:>4} halfspaces "
+              f"({entry['dropped_terms']} redundant complements dropped)")
+    for entry in report['rejected']:
+        print(f"cell {entry['cell']:>5}: kept, the rewrite disagrees at {entry['mismatches']} sampled points "
+              f"(e.g. {entry['example']})")
+    if 'tracking_rate' in report:
+        before = report['tracking_rate']['before']['active']
+        after = report['tracking_rate']['after']['active']
+        print(f'tracking rate: {before:.0f} -> {after:.0f} particles/s ({(after / before - 1) * 100:+.1f}%)')
+
+
+if __name__ == "__main__":
+    from fresh_core.fresh_core import build_model as build_fresh_core
+    from march2025_core.march2025_core import build_model as build_march2025_core
+
+    for core_name, build_model in [('fresh core', build_fresh_core), ('March 2025 core', build_march2025_core)]:
+        print(f'\n{core_name}')
+        print_report(simplify_model(build_model(settings_profile='quick')))
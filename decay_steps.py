@@ -0,0 +1,88 @@
+import time
+from collections import OrderedDict
+
+import numpy as np
+import openmc.deplete
+import scipy.sparse as sp
+from openmc.deplete.abc import OperatorResult
+from openmc.deplete.cram import IPFCramSolver
+from scipy.sparse.linalg import splu
+from uncertainties import ufloat
+
+'''
+Decay only depletion steps for the shutdown periods of a history (the 2311 days at zero power of depletion.py, weekends
+and holidays in an operating log, see operating_log.py). OpenMC already skips the transport solve of a step at exactly
+zero power, but a step at a few watts still gets its two transport solves, and every zero power step still goes through
+the full CECM sequence of two CRAM solves per material, each factorizing the sparse systems of CRAM again (24 for CRAM48).
+
+DecayStepCECMIntegrator is the CECM integrator of depletion.py, except for the steps whose power is at most
+decay_fraction of the highest power of the schedule: their reaction rates are zero (no transport solve at the beginning
+of the step nor in the middle), and the concentrations are decayed with the LU factorizations of the CRAM systems of the
+decay matrix (CRAM48 or CRAM16, the solver of the integrator), computed once per step length and reused for every
+material and for every later step of the same length, the cached_lengths most recently used lengths being kept. The
+energy of a near zero power step is neglected, decay_energy keeps track of it.
+
+    integrator = DecayStepCECMIntegrator(op, TIME, POWER, timestep_units='d', solver='cram48')
+'''
+
+
+class DecayStepCECMIntegrator(openmc.deplete.CECMIntegrator):
+
+    def __init__(self, operator, timesteps, power=None, power_density=None, source_rates=None, decay_fraction=1e-3,
+                 cached_lengths=16, **kwargs):
+        super().__init__(operator, timesteps, power, power_density, source_rates, **kwargs)
+        self.decay_threshold = decay_fraction * max(self.source_rates)
+        self.decay_steps = 0
+        # energy of the near zero power steps treated as decay only, in J
+        self.decay_energy = 0.0
+        self._decay_matrix = None
+        # the factorizations of the cached_lengths most recently used step lengths (a step uses dt / 2 and dt)
+        self._factors = OrderedDict()
+        self._cached_lengths = cached_lengths
+        # solver='cram48' or 'cram16' is stored as the bound __call__ of an IPFCramSolver
+        cram = getattr(self._solver, '__self__', self._solver)
+        if not isinstance(cram, IPFCramSolver):
+            raise ValueError(f'Decay only steps need an IPF CRAM solver (cram16 or cram48), not {self._solver!r}')
+        self._alpha, self._theta, self._alpha0 = cram.alpha, cram.theta, cram.alpha0
+
+    def _is_decay(self, source_rate):
+        return source_rate <= self.decay_threshold and getattr(self, 'transfer_rates', None) is None
+
+    def _get_bos_data_from_operator(self, step_index, source_rate, bos_conc):
+        # the operator returns zero reaction rates without a transport solve at zero source rate
+        if self._is_decay(source_rate):
+            source_rate = 0.0
+        return super()._get_bos_data_from_operator(step_index, source_rate, bos_conc)
+
+    def _decay(self, n, dt):
+        # n after dt of decay, CRAM in incomplete partial fractions form with the factorizations cached by step length
+        key = round(float(dt), 6)
+        if key not in self._factors:
+            if self._decay_matrix is None:
+                rates = self.operator.reaction_rates.copy()[0]
+                rates.fill(0.0)
+                self._decay_matrix = sp.csc_matrix(self.operator.chain.form_matrix(rates), dtype=np.float64)
+            matrix = self._decay_matrix * dt
+            identity = sp.eye(matrix.shape[0], format='csc')
+            self._factors[key] = [splu(sp.csc_matrix(matrix - theta * identity)) for theta in self._theta]
+            if len(self._factors) > self._cached_lengths:
+                self._factors.popitem(last=False)
+        self._factors.move_to_end(key)
+        y = n.copy()
+        for alpha, factor in zip(self._alpha, self._factors[key]):
+            y += 2 * np.real(alpha * factor.solve(y.astype(complex)))
+        return y * self._alpha0
+
+    def __call__(self, n, rates, dt, source_rate, _i=None):
+        if not self._is_decay(source_rate):
+            return super().__call__(n, rates, dt, source_rate, _i)
+
+        start = time.time()
+        n_middle = [self._decay(n_material, dt / 2) for n_material in n]
+        n_end = [self._decay(n_material, dt) for n_material in n]
+        zero_rates = rates.copy()
+        zero_rates.fill(0.0)
+        self.decay_steps += 1
+        self.decay_energy += source_rate * dt
+        # the same stages as a CECM step, so that the results file keeps its layout
+        return time.time() - start, [n_middle, n_end], [OperatorResult(ufloat(0.0, 0.0), zero_rates)]
@@ -1,11 +1,24 @@
 import openmc as mc
 import openmc.deplete
-from fresh_core.fresh_core import fresh_core_model
+from fresh_core import fresh_core
+from burn_regions import burn_region_model
+from operating_log import compress_schedule, print_schedule, read_log
+from decay_steps import DecayStepCECMIntegrator
 
 mc.config['cross_sections'] = 'please provide the path to your cross_sections.xml file in your system'
 # The cross-sections library used in this model was ENDF/B-VIII.0
 # It can be downloaded using this link: https://openmc.org/official-data-libraries/
 
+# Number of burn regions of the fuel: the plates are grouped by flux similarity (see burn_regions.py) and every region is
+# depleted as its own material, openmc.deplete spreading the depletion solves over all local cores. None depletes the fuel
+# as a single material, which is how the results shipped with the model were produced.
+BURN_REGIONS = None
+
+if BURN_REGIONS is None:
+    fresh_core_model = fresh_core.build_model()
+else:
+    fresh_core_model, fuel_regions = burn_region_model(fresh_core, BURN_REGIONS)
+
 op = mc.deplete.CoupledOperator(fresh_core_model,'please provide the path to your chain.xml file in your system')
 # this has to be a unique library for depletion analysis
 # ENDF has one that can be found here: https://openmc.org/depletion-chains/, look for ENDF/B-VIII.0 Chain (Thermal Spectrum)
@@ -13,6 +26,22 @@ op = mc.deplete.CoupledOperator(fresh_core_model,'please provide the path to you
 TIME = [608, 2311, 2648] # days
 POWER = [969.6, 0, 888.7] # Watts
 
-integrator = openmc.deplete.CECMIntegrator(op, TIME, POWER, timestep_units='d', solver= 'cram48')
+# Operating log (CSV of the power in W or the energy in kWh over time, see operating_log.py) to take the steps from instead
+# of TIME and POWER, compressed into as few steps as keep the energy and the xenon and samarium history within tolerance
+OPERATING_LOG = None
+ENERGY_COLUMN = 'kWh'
+
+if OPERATING_LOG is not None:
+    schedule = compress_schedule(*read_log(OPERATING_LOG, energy_column=ENERGY_COLUMN))
+    print_schedule(schedule)
+    TIME, POWER = schedule['time_days'], schedule['power_w']
+
+# Steps at no more than this fraction of the highest power are decay only: no transport solve, and the CRAM solves of a
+# step length are reused by every later step of the same length (see decay_steps.py)
+DECAY_FRACTION = 1e-3
+
+integrator = DecayStepCECMIntegrator(op, TIME, POWER, timestep_units='d', solver= 'cram48',
+                                     decay_fraction=DECAY_FRACTION)
 
-integrator.integrate()
\ No newline at end of file
+integrator.integrate()
+print(f'{integrator.decay_steps} decay only steps')
\ No newline at end of file
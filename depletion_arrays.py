@@ -0,0 +1,127 @@
+import re
+
+import h5py
+import numpy as np
+import openmc.data
+
+'''
+Bulk access to depletion results (depletion.py), as NumPy arrays instead of one openmc.deplete.Results.get_atoms() call
+per material and nuclide, each of which reads and rebuilds the whole time series. The atoms of every material and nuclide
+at every step are read from the 'number' dataset of the results file in a single read into a (time, material, nuclide)
+array, and the usual quantities are computed from it for all steps, materials and nuclides at once:
+
+    results = DepletionArrays('depletion_results_before_plates.h5')
+    fractions = atom_fractions(results, nuclides)          # (time, material, nuclide), normalized over nuclides
+    enrichment(results)                                    # (time, material) U235 atom fraction of the uranium
+    grams(results)                                         # (time, material, nuclide) masses in g
+
+Materials are identified by their id as a string ('1' for the fuel of the fresh core), like in the results file.
+'''
+
+URANIUM = re.compile(r'U\d+(_m\d+)?$')
+
+
+class DepletionArrays:
+
+    def __init__(self, filename, stage=0):
+        self.filename = filename
+        with h5py.File(filename, 'r') as fh:
+            # the time at the start of every step in s, like Results.get_atoms()
+            self.time = fh['time'][:, 0]
+            self.source_rate = fh['source_rate'][:, stage]
+            self.keff = fh['eigenvalues'][:, stage, 0]
+            self.keff_std = fh['eigenvalues'][:, stage, 1]
+
+            materials = sorted(fh['materials'], key=lambda material: fh['materials'][material].attrs['index'])
+            self.materials = list(materials)
+            self.volumes = np.array([fh['materials'][material].attrs['volume'] for material in materials])
+
+            nuclides = fh['nuclides']
+            indexed = [(nuclides[nuclide].attrs['atom number index'], nuclide) for nuclide in nuclides
+                       if 'atom number index' in nuclides[nuclide].attrs]
+            columns = np.array([index for index, _ in indexed])
+            self.nuclides = [nuclide for _, nuclide in indexed]
+
+            # (time, material, nuclide) atoms, one read of the whole stage
+            self.atoms = fh['number'][:, stage, :, :][:, :, columns]
+        self._build_index()
+
+    @classmethod
+    def from_arrays(cls, filename, time, materials, volumes, nuclides, atoms, source_rate, keff, keff_std):
+        # a history that does not come from a single results file, filename only naming it (see depletion_restart.py)
+        arrays = cls.__new__(cls)
+        arrays.filename = filename
+        arrays.time, arrays.source_rate = np.asarray(time), np.asarray(source_rate)
+        arrays.keff, arrays.keff_std = np.asarray(keff), np.asarray(keff_std)
+        arrays.materials, arrays.volumes = list(materials), np.asarray(volumes)
+        arrays.nuclides, arrays.atoms = list(nuclides), np.asarray(atoms)
+        arrays._build_index()
+        return arrays
+
+    def _build_index(self):
+        self._material_index = {material: i for i, material in enumerate(self.materials)}
+        self._nuclide_index = {nuclide: i for i, nuclide in enumerate(self.nuclides)}
+
+    def material_index(self, material):
+        # index of a material given by id (int or str) or as an openmc.Material
+        key = str(getattr(material, 'id', material))
+        if key not in self._material_index:
+            raise ValueError(f'No material {key} in {self.filename}, expected one of {self.materials}')
+        return self._material_index[key]
+
+    def nuclide_indices(self, nuclides):
+        unknown = [nuclide for nuclide in nuclides if nuclide not in self._nuclide_index]
+        if unknown:
+            raise ValueError(f'Nuclides {unknown} are not in {self.filename}')
+        return np.array([self._nuclide_index[nuclide] for nuclide in nuclides], dtype=int)
+
+    def get(self, nuclides=None, materials=None, units='atoms'):
+        '''
+        (time, material, nuclide) array of the given nuclides and materials (all by default), in atoms or atom/cm3.
+        '''
+        atoms = self.atoms
+        if materials is not None:
+            atoms = atoms[:, [self.material_index(material) for material in materials]]
+            volumes = self.volumes[[self.material_index(material) for material in materials]]
+        else:
+            volumes = self.volumes
+        if nuclides is not None:
+            atoms = atoms[:, :, self.nuclide_indices(nuclides)]
+        if units == 'atoms':
+            return atoms
+        if units == 'atom/cm3':
+            return atoms / volumes[None, :, None]
+        raise ValueError(f'Unknown units "{units}", expected "atoms" or "atom/cm3"')
+
+
+def atomic_masses(nuclides):
+    # atomic mass of every nuclide in g/mol, from the atomic mass evaluation shipped with openmc.data
+    return np.array([openmc.data.atomic_mass(nuclide) for nuclide in nuclides])
+
+
+def atom_fractions(results, nuclides=None, materials=None):
+    # (time, material, nuclide) atom fractions, normalized over the given nuclides (all of them by default)
+    atoms = results.get(nuclides, materials)
+    total = atoms.sum(axis=-1, keepdims=True)
+    return np.divide(atoms, total, out=np.zeros_like(atoms), where=total > 0)
+
+
+def enrichment(results, materials=None):
+    # (time, material) U235 atom fraction of the uranium, nan for a material without uranium
+    uranium = [nuclide for nuclide in results.nuclides if URANIUM.match(nuclide)]
+    atoms = results.get(uranium, materials)
+    total = atoms.sum(axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(total > 0, atoms[:, :, uranium.index('U235')] / total, np.nan)
+
+
+def grams(results, nuclides=None, materials=None):
+    # (time, material, nuclide) masses in g
+    nuclides = results.nuclides if nuclides is None else nuclides
+    return results.get(nuclides, materials) * atomic_masses(nuclides) / openmc.data.AVOGADRO
+
+
+def mass_change(results, nuclides=None, materials=None, start=0, end=-1):
+    # (material, nuclide) change of mass in g between two steps, positive for a buildup
+    masses = grams(results, nuclides, materials)
+    return masses[end] - masses[start]
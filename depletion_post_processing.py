@@ -1,8 +1,8 @@
 from fresh_core.fresh_core import fuel
-import openmc.deplete
-from scipy import constants
+from depletion_arrays import DepletionArrays, atom_fractions, enrichment, mass_change
 
-results = openmc.deplete.Results(filename='depletion_results_before_plates.h5')
+# every step, material and nuclide in a single read of the results file
+results = DepletionArrays('depletion_results_before_plates.h5')
 
 # if you add more isotopes, their concentration in the fuel will be outputted in units at%
 selected_nuclides = [
@@ -14,45 +14,17 @@ selected_nuclides = [
     "Fe54", "Fe56", "Fe57", "Fe58", "O16", "O17", "O18",
     "N14", "N15"]
 
-nuclides_i_dict = {}
-nuclides_f_dict = {}
+# at% of the selected nuclides in the fuel at the last step, normalized over the selected nuclides
+fractions = atom_fractions(results, selected_nuclides, materials=[fuel])[-1, 0]
 
-for nuc in selected_nuclides:
-    nuclides_f_dict[nuc] = results.get_atoms(mat=fuel, nuc=nuc, nuc_units='atom/cm3')[1][-1]
+for nuc, value in zip(selected_nuclides, fractions):
+    print(f'{nuc} = {value} at%')
 
-for nuc in selected_nuclides:
-    nuclides_i_dict[nuc] = results.get_atoms(mat=fuel, nuc=nuc, nuc_units='atom/cm3')[1][0]
-
-total_i = sum(nuclides_i_dict.values())
-total_f = sum(nuclides_f_dict.values())
-
-for nuc in nuclides_i_dict:
-    nuclides_i_dict[nuc] /= total_i
-
-for nuc in nuclides_f_dict:
-    nuclides_f_dict[nuc] /= total_f
-
-
-uranium_i_total = (nuclides_i_dict["U232"] + nuclides_i_dict["U233"] + nuclides_i_dict["U234"] + nuclides_i_dict["U235"]
-                 + nuclides_i_dict["U236"] + nuclides_i_dict["U237"] + nuclides_i_dict["U238"])
-
-uranium_f_total = (nuclides_f_dict["U232"] + nuclides_f_dict["U233"] + nuclides_f_dict["U234"] + nuclides_f_dict["U235"]
-                 + nuclides_f_dict["U236"] + nuclides_f_dict["U237"] + nuclides_f_dict["U238"])
-
-u235_fraction_i = nuclides_i_dict["U235"] / uranium_i_total
-
-u235_fraction_f = nuclides_f_dict["U235"] / uranium_f_total
-
-
-for key, value in nuclides_f_dict.items():
-    print(f'{key} = {value} at%')
+u235_fraction_i, u235_fraction_f = enrichment(results, materials=[fuel])[[0, -1], 0]
 
 print(f'\nInitial U235 enrichment: {u235_fraction_i * 100:.2f} at%\nCurrent U235 enrichment: {u235_fraction_f * 100:.2f} at%')
 
-u235_weight_0 = ((results.get_atoms(mat=fuel, nuc='U235', nuc_units='atoms')[1][0]) * 235.043928) / (constants.Avogadro)
-u235_weight_1 = ((results.get_atoms(mat=fuel, nuc='U235', nuc_units='atoms')[1][-1]) * 235.043928) / (constants.Avogadro)
-pu239_weight_0 = ((results.get_atoms(mat=fuel, nuc='Pu239', nuc_units='atoms')[1][0]) * 239.052162) / (constants.Avogadro)
-pu239_weight_1 = ((results.get_atoms(mat=fuel, nuc='Pu239', nuc_units='atoms')[1][-1]) * 239.052162) / (constants.Avogadro)
+u235_change, pu239_change = mass_change(results, ['U235', 'Pu239'], materials=[fuel])[0]
 
-print(f'\nCurrent Pu239 buildup by weight is {pu239_weight_1 - pu239_weight_0:.6} grams')
-print(f'\nCurrent U235 loss by weight is {u235_weight_0 - u235_weight_1:.6} grams')
\ No newline at end of file
+print(f'\nCurrent Pu239 buildup by weight is {pu239_change:.6} grams')
+print(f'\nCurrent U235 loss by weight is {-u235_change:.6} grams')
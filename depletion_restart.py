@@ -0,0 +1,115 @@
+import os
+
+import numpy as np
+import openmc as mc
+from openmc.utility_funcs import change_directory
+
+from decay_steps import DecayStepCECMIntegrator
+from depletion_arrays import DepletionArrays
+from material_transfer import build_depleted_model
+
+'''
+Depletion restarts across core reloads, such as the 4 fresh plates added in 2022 (the partial dummy assembly of
+march2025_core.py). Instead of burning the whole history again from the fresh core, the depletion resumes from the end of
+an existing results file (depletion_results_before_plates.h5):
+
+ 1. reload_model() builds the reloaded core, the materials carried over taking their depleted composition at the restart
+    step (material_transfer.py), the new materials (e.g. the fresh fuel of new plates) being given by fresh and the rest
+    of the reload (new plates, moved assemblies) by the arguments of build_model(), e.g. the loading pattern,
+ 2. deplete() burns the reloaded core over the following steps,
+ 3. combine_histories() joins both results files into one history on a single timeline, the second one starting at the
+    time of the restart step, with the materials matched by name.
+
+The combined history can be kept in a depletion_store.DepletionStore with add_arrays().
+'''
+
+
+def reload_model(core, results_path, names, burnable, step=-1, fresh=None, **build_kwargs):
+    '''
+    Reloaded core: core.build_model(**build_kwargs) with the materials names {depleted material id: core material name}
+    at their composition of step in results_path, the materials fresh {core material name: material} loaded new, and the
+    materials burnable (names) depleted from then on.
+    '''
+    model = build_depleted_model(core, results_path, names, step=step, fresh=fresh, **build_kwargs)
+    depleted = {material.name: material for material in model.materials}
+    unknown = set(burnable) - set(depleted)
+    if unknown:
+        raise ValueError(f'Unknown burnable materials {sorted(unknown)}, expected some of {list(depleted)}')
+    for name in burnable:
+        depleted[name].depletable = True
+        if depleted[name].volume is None:
+            raise ValueError(f'The burnable material {name} has no volume')
+    return model
+
+
+def burnable_names(model):
+    # {material id: material name} of the depletable materials of model, the ids of its depletion results
+    return {str(material.id): material.name for material in model.materials if material.depletable}
+
+
+def deplete(model, chain_file, timesteps, power, timestep_units='d', directory='.', output='depletion_results.h5',
+            **operator_kwargs):
+    # burns model over timesteps at power (W) with the integrator of depletion.py, returns the path of the results
+    op = mc.deplete.CoupledOperator(model, chain_file, **operator_kwargs)
+    integrator = DecayStepCECMIntegrator(op, timesteps, power, timestep_units=timestep_units, solver='cram48')
+    with change_directory(directory):
+        integrator.integrate(path=output)
+    return os.path.join(directory, output)
+
+
+def combine_histories(before_path, after_path, before_names, after_names, name='combined history'):
+    '''
+    One history (depletion_arrays.DepletionArrays) from a results file and its restart, on a single timeline: the steps
+    of before_path up to the restart, then those of after_path shifted by the time of the restart. The materials are
+    matched by name, before_names and after_names mapping the material ids of each file to a common name, the atoms and
+    volumes of the materials sharing a name (e.g. burn regions reloaded as one material) adding up, and a material that is
+    not in one of the parts (e.g. plates added at the reload) has no atoms there.
+    '''
+    before, after = DepletionArrays(before_path), DepletionArrays(after_path)
+    materials = list(dict.fromkeys(list(before_names.values()) + list(after_names.values())))
+    nuclides = list(dict.fromkeys(after.nuclides + before.nuclides))
+    nuclide_index = {nuclide: i for i, nuclide in enumerate(nuclides)}
+
+    # the last step of before is the composition before the reload, the first step of after the one after it
+    n_before = len(before.time) - 1
+    atoms = np.zeros((n_before + len(after.time), len(materials), len(nuclides)))
+    volumes = np.zeros((2, len(materials)))
+    for k, (part, names, target, steps) in enumerate(((before, before_names, slice(0, n_before), slice(0, n_before)),
+                                                      (after, after_names, slice(n_before, None), slice(None)))):
+        columns = np.array([nuclide_index[nuclide] for nuclide in part.nuclides])
+        for material_id, material_name in names.items():
+            i = materials.index(material_name)
+            source = part.material_index(material_id)
+            atoms[target, i, columns] += part.atoms[steps, source]
+            volumes[k, i] += part.volumes[source]
+
+    # the volume after the reload, or before it for a material unloaded at the reload
+    volumes = np.where(volumes[1] > 0, volumes[1], volumes[0])
+    return DepletionArrays.from_arrays(
+        name, np.concatenate((before.time[:-1], after.time + before.time[-1])), materials, volumes, nuclides, atoms,
+        np.concatenate((before.source_rate[:-1], after.source_rate)), np.concatenate((before.keff[:-1], after.keff)),
+        np.concatenate((before.keff_std[:-1], after.keff_std)))
+
+
+if __name__ == "__main__":
+    from depletion_store import DepletionStore
+    from fresh_core import fresh_core
+    from march2025_core import march2025_core
+
+    # the 2022 reload: the fuel of the fresh core history becomes the old fuel of the 2025 core, next to 4 new plates of
+    # fresh fuel (the new_fuel of march2025_core.py is already burned), and the depletion goes on from there until March
+    # 2025 (the single step of current_depletion_results.h5)
+    CHAIN_FILE = 'please provide the path to your chain.xml file in your system'
+    RELOAD_TIME = [944] # days
+    RELOAD_POWER = [1533] # Watts
+
+    new_plates = fresh_core.build_materials()['fuel']
+    # 4 plates of the 14 * 22 of the fresh core
+    new_plates.volume = new_plates.volume * 4 / (14 * 22)
+    model = reload_model(march2025_core, 'depletion_results_before_plates.h5', {'1': 'old_fuel'},
+                         burnable=('old_fuel', 'new_fuel'), fresh={'new_fuel': new_plates})
+    after_path = deplete(model, CHAIN_FILE, RELOAD_TIME, RELOAD_POWER, output='depletion_results_after_plates.h5')
+    history = combine_histories('depletion_results_before_plates.h5', after_path, {'1': 'old_fuel'},
+                                burnable_names(model), name='fresh core to March 2025')
+    DepletionStore().add_arrays(history, 'fresh core to March 2025', source='depletion_restart.py')
+    print(f'{len(history.time)} steps over {history.time[-1] / 86400:.0f} days, materials {history.materials}')
@@ -0,0 +1,181 @@
+import glob
+import hashlib
+import os
+
+import h5py
+import numpy as np
+
+from depletion_arrays import DepletionArrays
+
+'''
+Columnar store of depletion histories (depletion_results_before_plates.h5, current_depletion_results.h5, sensitivity
+variants...), to compare them without opening every results file and looping over nuclides. Every history is converted
+once (depletion_arrays.DepletionArrays) into a group of a single HDF5 file:
+
+    histories/<name>/atoms        (nuclide, time, material) atoms, compressed, one chunk per nuclide
+    histories/<name>/nuclides     nuclide names, the row index of atoms
+    histories/<name>/materials    material ids, time (s), volumes, keff, keff_std, source_rate
+
+so that a query only reads the chunks of the nuclides it asks for. update() adds the results files that are new or have
+changed since they were stored (size and modification time, then SHA-256 of the content), and leaves the others alone:
+
+    store = DepletionStore()
+    store.update(['depletion_results_before_plates.h5', 'current_depletion_results.h5'])
+    results = store.query(['U235', 'Pu239'], materials='fuel')
+'''
+
+
+def _file_hash(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(2**20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def _strings(dataset):
+    return [value.decode() for value in dataset[()]]
+
+
+class DepletionStore:
+
+    def __init__(self, path='depletion_store.h5'):
+        self.path = os.path.abspath(path)
+        self._nuclides = {}
+        if not os.path.exists(self.path):
+            with h5py.File(self.path, 'w') as fh:
+                fh.create_group('histories')
+
+    def histories(self):
+        # {name: attributes} of the stored histories, {'source', 'size', 'mtime', 'sha256'} for a results file
+        with h5py.File(self.path, 'r') as fh:
+            return {name: dict(group.attrs) for name, group in fh['histories'].items()}
+
+    def _nuclide_rows(self, fh, name):
+        # {nuclide: row of atoms} of a history, kept in memory across queries
+        if name not in self._nuclides:
+            self._nuclides[name] = {nuclide: row for row, nuclide in
+                                    enumerate(_strings(fh['histories'][name]['nuclides']))}
+        return self._nuclides[name]
+
+    def add(self, results_path, name=None, compression='gzip'):
+        '''
+        Stores a depletion results file as history name (its file name without extension by default), replacing a
+        history of the same name. Returns the name.
+        '''
+        name = name or os.path.splitext(os.path.basename(results_path))[0]
+        stat = os.stat(results_path)
+        return self.add_arrays(DepletionArrays(results_path), name, compression,
+                               source=os.path.abspath(results_path), size=stat.st_size, mtime=stat.st_mtime,
+                               sha256=_file_hash(results_path))
+
+    def add_arrays(self, results, name, compression='gzip', **attrs):
+        # stores a depletion_arrays.DepletionArrays as history name, attrs describing where it comes from
+        with h5py.File(self.path, 'a') as fh:
+            histories = fh['histories']
+            if name in histories:
+                del histories[name]
+            group = histories.create_group(name)
+            group.attrs.update(attrs)
+            atoms = results.atoms.transpose(2, 0, 1)
+            group.create_dataset('atoms', data=atoms, chunks=(1,) + atoms.shape[1:], compression=compression,
+                                 shuffle=True)
+            group['nuclides'] = np.array(results.nuclides, dtype='S')
+            group['materials'] = np.array(results.materials, dtype='S')
+            for field in ('time', 'volumes', 'keff', 'keff_std', 'source_rate'):
+                group[field] = getattr(results, field)
+        self._nuclides.pop(name, None)
+        return name
+
+    def _is_current(self, name, attrs, results_path):
+        stat = os.stat(results_path)
+        if attrs['size'] != stat.st_size:
+            return False
+        if attrs['mtime'] == stat.st_mtime:
+            return True
+        # touched but possibly unchanged, the new modification time is kept to skip the hash next time
+        if attrs['sha256'] != _file_hash(results_path):
+            return False
+        with h5py.File(self.path, 'a') as fh:
+            fh['histories'][name].attrs['mtime'] = stat.st_mtime
+        return True
+
+    def update(self, paths):
+        '''
+        Adds the results files of paths (file names or glob patterns) that are not stored yet or changed since, under the
+        name of their file. Returns the names of the histories added or replaced.
+        '''
+        stored = self.histories()
+        updated = []
+        for pattern in [paths] if isinstance(paths, str) else paths:
+            for results_path in sorted(glob.glob(pattern)) or [pattern]:
+                name = os.path.splitext(os.path.basename(results_path))[0]
+                if name in stored and stored[name].get('source') == os.path.abspath(results_path) \
+                        and self._is_current(name, stored[name], results_path):
+                    continue
+                updated.append(self.add(results_path, name))
+        return updated
+
+    def remove(self, name):
+        with h5py.File(self.path, 'a') as fh:
+            del fh['histories'][name]
+        self._nuclides.pop(name, None)
+
+    def query(self, nuclides, materials=None, histories=None, units='atoms'):
+        '''
+        The given nuclides in every history (or those of histories), as {history: {'time', 'materials', 'values'}} with
+        values a (time, material, nuclide) array in atoms or atom/cm3. materials is a list of material ids, None for all
+        of them, or 'fuel' for the materials that contain U235 at the first step, a ValueError being raised for an id that
+        is not in a history.
+        '''
+        if units not in ('atoms', 'atom/cm3'):
+            raise ValueError(f'Unknown units "{units}", expected "atoms" or "atom/cm3"')
+        results = {}
+        with h5py.File(self.path, 'r') as fh:
+            names = list(fh['histories']) if histories is None else histories
+            for name in names:
+                if name not in fh['histories']:
+                    raise ValueError(f'No history "{name}" in {self.path}, expected some of {list(fh["histories"])}')
+                group = fh['histories'][name]
+                rows = self._nuclide_rows(fh, name)
+                missing = [nuclide for nuclide in nuclides if nuclide not in rows]
+                if missing:
+                    raise ValueError(f'Nuclides {missing} are not in the history "{name}"')
+
+                # h5py reads unique rows in increasing order, they are put back in the order asked for afterwards
+                unique, inverse = np.unique([rows[nuclide] for nuclide in nuclides], return_inverse=True)
+                values = group['atoms'][unique][inverse]
+
+                material_ids = _strings(group['materials'])
+                if materials == 'fuel':
+                    columns = np.nonzero(group['atoms'][rows['U235'], 0] > 0)[0] if 'U235' in rows else np.array([], int)
+                elif materials is None:
+                    columns = np.arange(len(material_ids))
+                else:
+                    unknown = [str(material) for material in materials if str(material) not in material_ids]
+                    if unknown:
+                        raise ValueError(f'Materials {unknown} are not in the history "{name}", expected some of '
+                                         f'{material_ids}')
+                    columns = np.array([material_ids.index(str(material)) for material in materials], dtype=int)
+                values = values[:, :, columns]
+                if units == 'atom/cm3':
+                    values = values / group['volumes'][()][columns]
+                results[name] = {'time': group['time'][()], 'materials': [material_ids[i] for i in columns],
+                                 'values': values.transpose(1, 2, 0)}
+        return results
+
+
+if __name__ == "__main__":
+    import time
+
+    store = DepletionStore()
+    print(f"added or updated: {store.update('*depletion_results*.h5')}")
+
+    start = time.perf_counter()
+    results = store.query(['U235', 'Pu239'], materials='fuel')
+    print(f'U235 and Pu239 in every fuel material of {len(results)} histories in '
+          f'{(time.perf_counter() - start) * 1e3:.1f} ms')
+    for name, result in results.items():
+        for i, material in enumerate(result['materials']):
+            print(f"{name:<36} material {material:>3}  U235 {result['values'][-1, i, 0]:.4e}  "
+                  f"Pu239 {result['values'][-1, i, 1]:.4e} atoms at {result['time'][-1] / 86400:.1f} d")
@@ -0,0 +1,211 @@
+import h5py
+import numpy as np
+
+from mesh_tally_reader import MeshTally
+
+'''
+Multi-resolution tile pyramids of mesh flux tallies (e.g. the 3000 x 2100 thermal and epithermal flux tallies of
+march2025_core.py), so that a core flux map can be viewed or compared region by region without reading the full array.
+
+build_pyramid() streams one energy bin and score of a mesh tally out of the statepoint (mesh_tally_reader.MeshTally) into
+an HDF5 file holding, for every level, the mean and its standard deviation as (y, x) images stored in tile_size x
+tile_size chunks. Level 0 is the mesh itself and every level halves the previous one by averaging 2 x 2 pixels, down to a
+single tile. The standard deviation of a 2 x 2 average is sqrt(sum of the variances) / 4, the bins being taken as
+independent. FluxTiles reads back only the tiles covering a region, at the coarsest level that still gives the requested
+number of pixels:
+
+    build_pyramid('statepoint.500.h5', 'thermal_flux_tally', 'thermal_2025.h5')
+    with FluxTiles('thermal_2025.h5') as tiles:
+        image, extent = tiles.region((-30, -30), (30, 30), pixels=800)
+'''
+
+
+def _downsample(mean, std_dev):
+    # 2 x 2 averages of (y, x) images, an odd last row or column being averaged over the pixels it has
+    height, width = mean.shape
+    padded_shape = (height + height % 2, width + width % 2)
+    mean_padded, variance_padded = np.full(padded_shape, np.nan), np.full(padded_shape, np.nan)
+    mean_padded[:height, :width] = mean
+    variance_padded[:height, :width] = std_dev**2
+
+    def blocks(image):
+        return image.reshape(padded_shape[0] // 2, 2, padded_shape[1] // 2, 2)
+
+    count = (~np.isnan(blocks(mean_padded))).sum(axis=(1, 3))
+    return (np.nansum(blocks(mean_padded), axis=(1, 3)) / count,
+            np.sqrt(np.nansum(blocks(variance_padded), axis=(1, 3))) / count)
+
+
+def _create_level(fh, level, shape, tile_size, compression):
+    group = fh.create_group(f'level {level}')
+    chunks = (min(tile_size, shape[0]), min(tile_size, shape[1]))
+    for layer in ('mean', 'std_dev'):
+        group.create_dataset(layer, shape=shape, dtype=np.float64, chunks=chunks, compression=compression)
+    return group
+
+
+def build_pyramid(statepoint_path, tally_name, path, energy=0, score='flux', tile_size=256, compression='gzip',
+                  **selections):
+    '''
+    Writes the tile pyramid of one energy bin and score of the mesh tally tally_name to path. A 3D mesh is reduced to its
+    first z bin unless z is given in selections, which also selects the bins of any other filter of the tally. x and y
+    make the image and cannot be selected.
+    '''
+    fixed = sorted({'x', 'y'} & set(selections))
+    if fixed:
+        raise ValueError(f'{fixed} cannot be selected, the pyramid covers the whole x, y mesh')
+    with MeshTally(statepoint_path, tally_name) as tally:
+        if tally.mesh_lower_left is None:
+            raise ValueError(f'The mesh of the tally "{tally_name}" is not a regular mesh')
+        selections = {'score': score, **selections}
+        if 'energy' in tally.axes:
+            selections['energy'] = energy
+        if 'z' in tally.axes:
+            selections.setdefault('z', 0)
+        shape = tally.selected_shape(**selections)
+        if len(shape) != 2:
+            raise ValueError(f'The selection {selections} of the tally "{tally_name}" (axes {tally.axes}) does not '
+                             f'leave an x, y image')
+        width, height = shape
+
+        with h5py.File(path, 'w') as fh:
+            fh.attrs.update({'statepoint': str(statepoint_path), 'tally': tally_name, 'score': score, 'energy': energy,
+                             'lower_left': tally.mesh_lower_left[:2], 'upper_right': tally.mesh_upper_right[:2],
+                             'tile_size': tile_size})
+
+            # level 0, tile_size rows at a time
+            level = _create_level(fh, 0, (height, width), tile_size, compression)
+            for y in range(0, height, tile_size):
+                rows = slice(y, min(y + tile_size, height))
+                for layer in ('mean', 'std_dev'):
+                    level[layer][rows] = tally.read(layer, **selections, y=rows).T
+
+            # every next level from the previous one, 2 * tile_size rows at a time
+            n_levels = 1
+            while max(height, width) > tile_size:
+                previous = fh[f'level {n_levels - 1}']
+                height, width = (height + 1) // 2, (width + 1) // 2
+                level = _create_level(fh, n_levels, (height, width), tile_size, compression)
+                for y in range(0, previous['mean'].shape[0], 2 * tile_size):
+                    rows = slice(y, y + 2 * tile_size)
+                    mean, std_dev = _downsample(previous['mean'][rows], previous['std_dev'][rows])
+                    level['mean'][y // 2:y // 2 + len(mean)] = mean
+                    level['std_dev'][y // 2:y // 2 + len(mean)] = std_dev
+                n_levels += 1
+            fh.attrs['levels'] = n_levels
+    return path
+
+
+class FluxTiles:
+
+    def __init__(self, path, cache_size=256):
+        self.path = path
+        self._file = h5py.File(path, 'r')
+        self.levels = int(self._file.attrs['levels'])
+        self.tile_size = int(self._file.attrs['tile_size'])
+        self.lower_left = np.asarray(self._file.attrs['lower_left'], dtype=float)
+        self.upper_right = np.asarray(self._file.attrs['upper_right'], dtype=float)
+        self.shapes = [self._file[f'level {level}']['mean'].shape for level in range(self.levels)]
+        self._cache = {}
+        self._cache_size = cache_size
+        self.tiles_read = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._file.close()
+
+    def pixel_size(self, level):
+        # (x, y) size of a pixel of level in cm, 2**level mesh bins, the last pixel of an odd row or column being partial
+        height, width = self.shapes[0]
+        return (self.upper_right - self.lower_left) / (width, height) * 2**level
+
+    def tile(self, level, row, column, layer='mean'):
+        # one tile_size x tile_size (or smaller at the edges) tile of a level, rows counted from the lowest y
+        key = (level, row, column, layer)
+        if key not in self._cache:
+            if len(self._cache) >= self._cache_size:
+                self._cache.pop(next(iter(self._cache)))
+            size = self.tile_size
+            self._cache[key] = self._file[f'level {level}'][layer][row * size:(row + 1) * size,
+                                                                   column * size:(column + 1) * size]
+            self.tiles_read += 1
+        return self._cache[key]
+
+    def level_for(self, lower_left, upper_right, pixels):
+        # coarsest level giving at least pixels pixels across the wider side of the region
+        extent = np.asarray(upper_right, dtype=float) - np.asarray(lower_left, dtype=float)
+        for level in reversed(range(self.levels)):
+            if (extent / self.pixel_size(level)).max() >= pixels:
+                return level
+        return 0
+
+    def region(self, lower_left=None, upper_right=None, pixels=1024, layer='mean', level=None):
+        '''
+        Image (y, x) of a region at about pixels pixels across, read from the tiles covering it only, and its extent
+        (x min, x max, y min, y max) in cm, snapped to the pixels of the level.
+        '''
+        lower_left = self.lower_left if lower_left is None else np.maximum(lower_left, self.lower_left)
+        upper_right = self.upper_right if upper_right is None else np.minimum(upper_right, self.upper_right)
+        if np.any(upper_right <= lower_left):
+            raise ValueError(f'The region {tuple(lower_left)} - {tuple(upper_right)} is outside of the map')
+        level = self.level_for(lower_left, upper_right, pixels) if level is None else level
+
+        pixel = self.pixel_size(level)
+        height, width = self.shapes[level]
+        x0, y0 = np.floor((lower_left - self.lower_left) / pixel).astype(int)
+        x1, y1 = np.ceil((upper_right - self.lower_left) / pixel).astype(int)
+        x1, y1 = min(x1, width), min(y1, height)
+
+        size = self.tile_size
+        image = np.empty((y1 - y0, x1 - x0))
+        for row in range(y0 // size, (y1 - 1) // size + 1):
+            for column in range(x0 // size, (x1 - 1) // size + 1):
+                tile = self.tile(level, row, column, layer)
+                # the part of the tile inside the region, in tile and in image coordinates
+                ty0, ty1 = max(y0 - row * size, 0), min(y1 - row * size, tile.shape[0])
+                tx0, tx1 = max(x0 - column * size, 0), min(x1 - column * size, tile.shape[1])
+                image[row * size + ty0 - y0:row * size + ty1 - y0,
+                      column * size + tx0 - x0:column * size + tx1 - x0] = tile[ty0:ty1, tx0:tx1]
+
+        # the last pixel of the map ends at upper_right
+        x_max, y_max = np.minimum(self.lower_left + (x1, y1) * pixel, self.upper_right)
+        extent = (float(self.lower_left[0] + x0 * pixel[0]), float(x_max),
+                  float(self.lower_left[1] + y0 * pixel[1]), float(y_max))
+        return image, extent
+
+
+def compare(tiles, other, lower_left=None, upper_right=None, pixels=1024):
+    '''
+    Relative difference other / tiles - 1 of two pyramids of the same mesh (e.g. the fresh and the 2025 cores) over a
+    region, with its standard deviation, and the extent of the region.
+    '''
+    if tiles.shapes != other.shapes or not (np.allclose(tiles.lower_left, other.lower_left) and
+                                            np.allclose(tiles.upper_right, other.upper_right)):
+        raise ValueError(f'{tiles.path} and {other.path} are not pyramids of the same mesh')
+    level = tiles.level_for(tiles.lower_left if lower_left is None else lower_left,
+                            tiles.upper_right if upper_right is None else upper_right, pixels)
+    (mean, extent), (std_dev, _) = (tiles.region(lower_left, upper_right, layer=layer, level=level)
+                                    for layer in ('mean', 'std_dev'))
+    other_mean, other_std_dev = (other.region(lower_left, upper_right, layer=layer, level=level)[0]
+                                 for layer in ('mean', 'std_dev'))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = other_mean / mean
+        ratio_std_dev = np.abs(ratio) * np.sqrt((std_dev / mean)**2 + (other_std_dev / other_mean)**2)
+    return ratio - 1, ratio_std_dev, extent
+
+
+if __name__ == "__main__":
+    import sys
+
+    # python flux_tiles.py statepoint.500.h5 thermal_flux_tally thermal.h5
+    statepoint_path, tally_name, path = sys.argv[1:4]
+    build_pyramid(statepoint_path, tally_name, path)
+    with FluxTiles(path) as tiles:
+        print(f'{path}: {tiles.levels} levels, ' + ', '.join(f'{width}x{height}' for height, width in tiles.shapes))
+        image, extent = tiles.region((-30, -30), (30, 30), pixels=512)
+        print(f'core region {image.shape[1]}x{image.shape[0]} pixels over {extent}, {tiles.tiles_read} tiles read')
@@ -0,0 +1,98 @@
+import os
+import tempfile
+
+import numpy as np
+import openmc as mc
+
+from loading_patterns import plate_centers
+from source_convergence import analyze_statepoint
+
+'''
+Initial fission source spread uniformly over the fuel meat of every loaded plate, instead of the point at (0, 22, 0) of
+build_settings(), which starts every run in a single box of a core of six boxes in two rows, 30 cm apart.
+
+The plates are found from the loading pattern the geometry was built with: every plate slot of the boxes (box cell
+translation and the centers of the box and assembly lattice elements, see loading_patterns.plate_centers()) whose plate
+code has a fuel material in PLATE_MATERIALS gets a box source over its meat, dummy plates get none. The extent of the meat
+is read from the bounding box of the fuel cells of the plate universes, and every plate gets the same strength as all
+meats have the same size.
+
+    model = core.build_model()
+    use_fuel_source(model, core)
+'''
+
+
+def _meat_extent(geometry):
+    # lower left and upper right corners of the fuel meat in the plate universes, the same for every fuel material
+    extents = {tuple(map(tuple, cell.region.bounding_box)) for cell in geometry.get_all_material_cells().values()
+               if cell.fill_type == 'material' and 'U235' in cell.fill.get_nuclides()}
+    if len(extents) != 1:
+        raise RuntimeError(f'Expected one extent of the fuel meat cells, found {len(extents)}')
+    lower_left, upper_right = map(np.asarray, extents.pop())
+    if not (np.isfinite(lower_left).all() and np.isfinite(upper_right).all()):
+        raise RuntimeError('The fuel meat cells are not bounded')
+    return lower_left, upper_right
+
+
+def fuel_source(core, geometry, loading_pattern=None):
+    '''
+    List of sources, one uniform box per fuel plate of geometry, built by the core module core with loading_pattern
+    (LOADING_PATTERN of the core by default).
+    '''
+    pattern = core.resolve_loading_pattern(loading_pattern)
+    fuel_codes = {code for code, name in core.PLATE_MATERIALS.items() if name != 'Al6061'}
+    lower_left, upper_right = _meat_extent(geometry)
+
+    sources = []
+    for (box, row, column, plate), center in plate_centers(geometry, pattern).items():
+        code = pattern[box][row][column][plate]
+        if code not in fuel_codes:
+            continue
+        source = mc.Source()
+        source.space = mc.stats.Box(center + lower_left, center + upper_right)
+        source.angle = mc.stats.Isotropic()
+        source.strength = 1.0
+        sources.append(source)
+
+    if not sources:
+        raise ValueError('The loading pattern has no fuel plate')
+    return sources
+
+
+def use_fuel_source(model, core, loading_pattern=None):
+    # replaces the initial source of model (built by core with loading_pattern) by fuel_source()
+    model.settings.source = fuel_source(core, model.geometry, loading_pattern)
+    return model
+
+
+def compare_convergence(core, settings_profile='default', window=20, z=2.0, threads=None, directory=None, **build_kwargs):
+    '''
+    Batches the fission source needs to converge (source_convergence.analyze_statepoint()) from the point source of the
+    settings and from fuel_source(), as {'point': batch, 'fuel': batch}, None when the source never converged.
+    '''
+    results = {}
+    for name in ('point', 'fuel'):
+        model = core.build_model(settings_profile=settings_profile, **build_kwargs)
+        if name == 'fuel':
+            use_fuel_source(model, core, build_kwargs.get('loading_pattern'))
+        with tempfile.TemporaryDirectory(dir=directory) as tmp:
+            statepoint = model.run(cwd=tmp, threads=threads, output=False)
+            results[name] = analyze_statepoint(os.path.join(tmp, statepoint), window, z)['converged_at']
+    return results
+
+
+def print_comparison(results):
+    for name in ('point', 'fuel'):
+        converged_at = results[name]
+        print(f"{name + ' source':<14} {'never converged' if converged_at is None else f'converged at batch {converged_at}'}")
+    if results['point'] is not None and results['fuel'] is not None:
+        print(f"{results['point'] - results['fuel']} fewer inactive batches needed with the fuel source")
+
+
+if __name__ == "__main__":
+    from fresh_core import fresh_core
+    from march2025_core import march2025_core
+
+    for core_name, core in [('fresh core', fresh_core), ('March 2025 core', march2025_core)]:
+        print(f'\n{core_name}')
+        print_comparison(compare_convergence(core))
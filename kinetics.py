@@ -0,0 +1,93 @@
+import os
+import tempfile
+
+import numpy as np
+import openmc as mc
+
+'''
+Adjoint weighted kinetics parameters in a single eigenvalue run with the iterated fission probability (IFP) tallies of
+OpenMC, instead of subtracting a prompt only k-eff (create_delayed_neutrons = False) from the full one. Every neutron
+carries the delayed group and lifetime of its ancestors over ifp_n_generation generations, which gives
+
+    beta_eff           = ifp-beta-numerator / ifp-denominator (per delayed group with a DelayedGroupFilter)
+    generation time    = ifp-time-numerator / (ifp-denominator * k-eff)
+
+Use the 'kinetics' settings profile of the cores, which sets ifp_n_generation. The uncertainties of the ratios are
+propagated as if numerator and denominator were independent, which overestimates them as both come from the same
+neutrons.
+'''
+
+DELAYED_GROUPS = 6
+
+
+def kinetics_tallies(delayed_groups=DELAYED_GROUPS):
+    total = mc.Tally(name='ifp kinetics')
+    total.scores = ['ifp-time-numerator', 'ifp-beta-numerator', 'ifp-denominator']
+
+    by_group = mc.Tally(name='ifp kinetics by delayed group')
+    by_group.filters = [mc.DelayedGroupFilter(list(range(1, delayed_groups + 1)))]
+    by_group.scores = ['ifp-beta-numerator']
+    return mc.Tallies([total, by_group])
+
+
+def _ratio(numerator, numerator_std, denominator, denominator_std):
+    value = numerator / denominator
+    return value, abs(value) * np.sqrt((numerator_std / numerator)**2 + (denominator_std / denominator)**2)
+
+
+def kinetics_parameters(statepoint_path):
+    '''
+    beta_eff (total and per delayed group) and the prompt generation time of a run with kinetics_tallies(), as
+    {'beta_eff': (value, std), 'beta_eff_groups': [(value, std), ...], 'generation_time': (seconds, std), 'keff': ...}.
+    '''
+    with mc.StatePoint(statepoint_path, autolink=False) as sp:
+        total = sp.get_tally(name='ifp kinetics')
+        by_group = sp.get_tally(name='ifp kinetics by delayed group')
+        keff = sp.keff
+
+        def score(tally, name, value='mean'):
+            return tally.get_values(scores=[name], value=value).ravel()
+
+        denominator = score(total, 'ifp-denominator')[0], score(total, 'ifp-denominator', 'std_dev')[0]
+        beta = _ratio(score(total, 'ifp-beta-numerator')[0], score(total, 'ifp-beta-numerator', 'std_dev')[0],
+                      *denominator)
+        groups = [_ratio(mean, std, *denominator) for mean, std in
+                  zip(score(by_group, 'ifp-beta-numerator'), score(by_group, 'ifp-beta-numerator', 'std_dev'))]
+        time = _ratio(score(total, 'ifp-time-numerator')[0], score(total, 'ifp-time-numerator', 'std_dev')[0],
+                      *denominator)
+        generation_time = _ratio(time[0], time[1], keff.nominal_value, keff.std_dev)
+
+    return {'beta_eff': beta, 'beta_eff_groups': groups, 'generation_time': generation_time,
+            'keff': (keff.nominal_value, keff.std_dev)}
+
+
+def run_kinetics(model, threads=None, directory=None):
+    # runs model (built with the 'kinetics' settings profile) with the IFP tallies and returns kinetics_parameters()
+    if not model.settings.ifp_n_generation:
+        raise ValueError('The model has no ifp_n_generation, build it with settings_profile="kinetics"')
+    original = model.tallies
+    model.tallies = kinetics_tallies()
+    try:
+        with tempfile.TemporaryDirectory(dir=directory) as tmp:
+            statepoint = model.run(cwd=tmp, threads=threads, output=False)
+            return kinetics_parameters(os.path.join(tmp, statepoint))
+    finally:
+        model.tallies = original
+
+
+def print_parameters(parameters):
+    beta, beta_std = parameters['beta_eff']
+    print(f'beta_eff          {beta * 1e5:7.1f} +/- {beta_std * 1e5:.1f} pcm')
+    for group, (value, std) in enumerate(parameters['beta_eff_groups'], start=1):
+        print(f'  group {group}         {value * 1e5:7.1f} +/- {std * 1e5:.1f} pcm')
+    time, time_std = parameters['generation_time']
+    print(f'generation time   {time * 1e6:7.2f} +/- {time_std * 1e6:.2f} us')
+
+
+if __name__ == "__main__":
+    from fresh_core.fresh_core import build_model as build_fresh_core
+    from march2025_core.march2025_core import build_model as build_march2025_core
+
+    for core_name, build_model in [('fresh core', build_fresh_core), ('March 2025 core', build_march2025_core)]:
+        print(f'\n{core_name}')
+        print_parameters(run_kinetics(build_model(settings_profile='kinetics')))
@@ -0,0 +1,145 @@
+import tempfile
+
+import numpy as np
+import openmc as mc
+import openmc.lib
+from openmc.utility_funcs import change_directory
+
+'''
+Batch evaluation of candidate loading patterns of a core (LOADING_PATTERN in fresh_core.py and march2025_core.py).
+
+Patterns that only differ in the codes of their plates share one geometry: the template model puts the same fuel plate in
+every plate slot and gives its meat cell a distributed material fill, and each pattern only sets the material of every
+instance of that cell in memory (fuel, old or new fuel, or aluminum for a dummy plate, which is an aluminum plate of the
+same size). OpenMC is therefore initialized, and the cross sections loaded, once per group of patterns with the same
+number of plates in every assembly. Every pattern is run from the same random number seed, which correlates the results
+and sharpens the differences between candidates.
+
+    from march2025_core import march2025_core as core
+    results = evaluate_patterns(core, [core.LOADING_PATTERN, {'fuel_box_3': ...}])
+'''
+
+
+def _template(pattern, code):
+    # the pattern with every plate replaced by code, so that a single plate universe fills every plate slot
+    return {box: tuple(tuple(code * len(plates) for plates in row) for row in assemblies)
+            for box, assemblies in pattern.items()}
+
+
+def _shape(pattern):
+    return tuple((box, tuple(tuple(len(plates) for plates in row) for row in pattern[box])) for box in sorted(pattern))
+
+
+def _element_center(lattice, index):
+    return np.asarray(lattice.lower_left, dtype=float) + (np.asarray(index) + 0.5) * np.asarray(lattice.pitch)
+
+
+def _lattice_in(universe):
+    return next(cell.fill for cell in universe.cells.values() if cell.fill_type == 'lattice')
+
+
+def plate_centers(geometry, pattern):
+    # center of every plate slot {(box, row, column, plate): (x, y, z)}, rows and plates counted like in the pattern
+    box_cells = {cell.name: cell for cell in geometry.get_all_cells().values() if cell.name in pattern}
+    centers = {}
+    for box, assemblies in pattern.items():
+        box_cell = box_cells[box]
+        translation = np.asarray(box_cell.translation if box_cell.translation is not None else np.zeros(3), dtype=float)
+        box_lattice = _lattice_in(box_cell.fill)
+        for row, assembly_row in enumerate(assemblies):
+            for column, plates in enumerate(assembly_row):
+                index = (column, len(assemblies) - 1 - row)
+                assembly_lattice = _lattice_in(box_lattice.get_universe(index))
+                for plate in range(len(plates)):
+                    center = (_element_center(box_lattice, index) +
+                              _element_center(assembly_lattice, (0, len(plates) - 1 - plate)))
+                    centers[box, row, column, plate] = translation + np.append(center, 0.0)
+    return centers
+
+
+def _template_model(core, pattern, core_state, blade_positions, settings_profile):
+    # model of the template geometry of pattern, the materials by name, the plate meat cell and the plate slot centers
+    template_code = next(iter(core.PLATE_MATERIALS))
+    mc.reset_auto_ids()
+    materials = core.build_materials(core_state)
+    geometry = core.build_geometry(materials, blade_positions, _template(pattern, template_code))
+    model = mc.Model(geometry=geometry, materials=mc.Materials(materials.values()),
+                     settings=core.build_settings(settings_profile))
+
+    meat_material = materials[core.PLATE_MATERIALS[template_code]]
+    meat_cells = [cell for cell in geometry.get_all_cells().values() if cell.fill is meat_material]
+    if len(meat_cells) != 1:
+        raise RuntimeError(f'Expected one cell filled with {meat_material.name}, found {len(meat_cells)}')
+
+    centers = plate_centers(geometry, pattern)
+    meat_cells[0].fill = [meat_material] * len(centers)
+    return model, materials, meat_cells[0], centers
+
+
+def evaluate_patterns(core, patterns, core_state=None, blade_positions=None, settings_profile='quick', threads=None,
+                      directory=None):
+    '''
+    Runs an eigenvalue calculation for every loading pattern in patterns (partial patterns like the loading_pattern
+    argument of build_model()) of the core module core. Returns one {'pattern', 'keff', 'keff_std'} per pattern, in order.
+    '''
+    patterns = [core.resolve_loading_pattern(pattern) for pattern in patterns]
+    groups = {}
+    for i, pattern in enumerate(patterns):
+        groups.setdefault(_shape(pattern), []).append(i)
+
+    results = [None] * len(patterns)
+    for indices in groups.values():
+        model, materials, meat_cell, centers = _template_model(core, patterns[indices[0]], core_state, blade_positions,
+                                                               settings_profile)
+        with tempfile.TemporaryDirectory(dir=directory) as tmp, change_directory(tmp):
+            model.export_to_xml()
+            openmc.lib.init(args=['-s', str(threads)] if threads else None, output=False)
+            try:
+                # instance of the meat cell in each plate slot, found by position rather than by path order
+                instances = {}
+                for slot, center in centers.items():
+                    cell, instance = openmc.lib.find_cell(center)
+                    if cell.id != meat_cell.id:
+                        raise RuntimeError(f'Plate slot {slot} at {center} is in cell {cell.id}, not in the plate meat')
+                    instances[slot] = instance
+
+                fills = {code: openmc.lib.materials[materials[name].id] for code, name in core.PLATE_MATERIALS.items()}
+                for i in indices:
+                    fill = [None] * len(instances)
+                    for (box, row, column, plate), instance in instances.items():
+                        fill[instance] = fills[patterns[i][box][row][column][plate]]
+                    openmc.lib.cells[meat_cell.id].fill = fill
+
+                    openmc.lib.hard_reset()
+                    openmc.lib.run(output=False)
+                    keff, keff_std = openmc.lib.keff()
+                    results[i] = {'pattern': patterns[i], 'keff': keff, 'keff_std': keff_std}
+            finally:
+                openmc.lib.finalize()
+    return results
+
+
+def pattern_changes(core, pattern):
+    # the boxes of pattern that differ from the reference LOADING_PATTERN of core
+    reference = core.resolve_loading_pattern()
+    return {box: assemblies for box, assemblies in pattern.items() if assemblies != reference[box]}
+
+
+def print_results(core, results):
+    for i, result in enumerate(results):
+        changes = pattern_changes(core, result['pattern']) or 'reference loading'
+        print(f"{i:>3}  k = {result['keff']:.5f} +/- {result['keff_std']:.5f}  {changes}")
+
+
+if __name__ == "__main__":
+    from march2025_core import march2025_core as core
+
+    # the 4 new plates at the top, in the middle or at the bottom of the partial dummy assembly, or in box 3
+    FUEL, DUMMY = core.FUEL_ASSEMBLY, core.DUMMY_ASSEMBLY
+    candidates = [
+        core.LOADING_PATTERN,
+        {'fuel_box_6': [[FUEL, 'DDDDNNNNDDDDD'], [FUEL, FUEL]]},
+        {'fuel_box_6': [[FUEL, 'DDDDDDDDDNNNN'], [FUEL, FUEL]]},
+        {'fuel_box_3': [[FUEL, FUEL], [FUEL, 'NNNNDDDDDDDDD']], 'fuel_box_6': [[FUEL, DUMMY], [FUEL, FUEL]]},
+    ]
+    print_results(core, evaluate_patterns(core, candidates))
@@ -4,1027 +4,1047 @@ import openmc as mc
 mc.config['cross_sections'] = '/home/eastdusty/openmc_env/share/data/endfb80/endfb-viii.0-hdf5/cross_sections.xml'
 # The cross-sections library used in this model was ENDF/B-VIII.0
 
+'''
+Nothing is built or written to disk when this file is imported, the model is created by build_model(), which takes the
+core state (materials replacing the old and new fuel compositions, e.g. from a new depletion history), the blade positions
+in console units, a settings profile and the loading pattern of the fuel boxes. Running this file directly builds the
+critical configuration, exports the XML files and runs OpenMC.
+'''
 
+# BLADE INSERTION AND WITHDRAWAL: Blades rotate between 0 and 45 degrees, but in the control room, it is normalized out of 1000, 1000 being fully withdrawn which corresponds to 45 degrees, and 0 being fully inserted corresponding to 0 degrees
+
+# The critical position of UFTR in May 2025 ====> Safety Blades 1,2,3 = 570 ---- Regulating Blade = 320
+# PS: It is the same position as the fresh core, as the new fuel plates added as much reactivity as that which was burnt
+CRITICAL_BLADE_POSITIONS = {'safety_blade_1': 570, 'safety_blade_2': 570, 'safety_blade_3': 570, 'regulating_blade': 320}
+
+# batches/inactive/particles for each run type, a dict passed as settings_profile overrides the default profile
+# create_delayed_neutrons = False estimates K considering prompt neutrons only (see the SETTINGS & RUN section)
+SETTINGS_PROFILES = {
+    'default': {'batches': 500, 'inactive': 100, 'particles': 10000, 'create_delayed_neutrons': True},
+    'quick': {'batches': 150, 'inactive': 50, 'particles': 1000, 'create_delayed_neutrons': True},
+    # 500,000 particles at 500 batches with 100 inactive will produce approximately 7 pcm error and will take approximately 3 hours to run
+    'production': {'batches': 500, 'inactive': 100, 'particles': 500000, 'create_delayed_neutrons': True},
+    'prompt': {'batches': 500, 'inactive': 100, 'particles': 10000, 'create_delayed_neutrons': False},
+    # beta_eff per delayed group and the prompt generation time in a single run (see kinetics.py), the neutron ancestry is
+    # followed over ifp_n_generation generations, which must not exceed the inactive batches
+    'kinetics': {'batches': 500, 'inactive': 100, 'particles': 10000, 'create_delayed_neutrons': True,
+                 'ifp_n_generation': 10},
+    # precision driven runs: batches is the minimum, the run stops as soon as the standard deviation of k-eff is below
+    # keff_std_pcm, and at max_batches at the latest (see precision.py for targets on tallies)
+    'precision': {'batches': 150, 'inactive': 100, 'particles': 100000, 'create_delayed_neutrons': True,
+                  'keff_std_pcm': 20, 'max_batches': 1000},
+}
+
+
+# LOADING PATTERN: the assemblies of each fuel box, listed like the universes of the 2x2 box lattice (top row first). Each
+# assembly is a string of plate codes listed like the universes of the assembly lattice (plate of largest y first).
+# O = old fuel plate, N = new fuel plate, D = dummy (aluminum) plate
+# The partial dummy assembly holds the 4 new plates and 9 dummy plates, 13 plates spread over the width of 14
+PLATES_PER_ASSEMBLY = 14
+FUEL_ASSEMBLY = 'O' * PLATES_PER_ASSEMBLY
+DUMMY_ASSEMBLY = 'D' * PLATES_PER_ASSEMBLY
+PARTIAL_DUMMY_ASSEMBLY = 'N' * 4 + 'D' * 9
+LOADING_PATTERN = {
+    'fuel_box_1': [[FUEL_ASSEMBLY, FUEL_ASSEMBLY], [FUEL_ASSEMBLY, FUEL_ASSEMBLY]],
+    'fuel_box_2': [[FUEL_ASSEMBLY, FUEL_ASSEMBLY], [FUEL_ASSEMBLY, FUEL_ASSEMBLY]],
+    'fuel_box_3': [[FUEL_ASSEMBLY, FUEL_ASSEMBLY], [FUEL_ASSEMBLY, DUMMY_ASSEMBLY]],
+    'fuel_box_4': [[FUEL_ASSEMBLY, FUEL_ASSEMBLY], [FUEL_ASSEMBLY, FUEL_ASSEMBLY]],
+    'fuel_box_5': [[FUEL_ASSEMBLY, FUEL_ASSEMBLY], [FUEL_ASSEMBLY, FUEL_ASSEMBLY]],
+    'fuel_box_6': [[FUEL_ASSEMBLY, PARTIAL_DUMMY_ASSEMBLY], [FUEL_ASSEMBLY, FUEL_ASSEMBLY]],
+}
+# material of the plate meat for each plate code, a dummy plate is an aluminum plate of the same size
+PLATE_MATERIALS = {'O': 'old_fuel', 'N': 'new_fuel', 'D': 'Al6061'}
+
+
+def blade_rotation(position):
+    # console position (0 = fully inserted, 1000 = fully withdrawn) to the blade rotation (0 to 45 degrees) about x
+    if not 0 <= position <= 1000:
+        raise ValueError(f'Blade position {position} is outside the 0-1000 console range')
+    return (position/(200/9), 0, 0)
+
+
+def _blade_positions(blade_positions):
+    positions = dict(CRITICAL_BLADE_POSITIONS)
+    if blade_positions is not None:
+        unknown = set(blade_positions) - set(positions)
+        if unknown:
+            raise ValueError(f'Unknown blades {sorted(unknown)}, expected some of {list(positions)}')
+        positions.update(blade_positions)
+    return positions
+
+
+def _settings_profile(settings_profile):
+    if isinstance(settings_profile, str):
+        if settings_profile not in SETTINGS_PROFILES:
+            raise ValueError(f'Unknown settings profile "{settings_profile}", expected one of {list(SETTINGS_PROFILES)}')
+        return dict(SETTINGS_PROFILES[settings_profile])
+    return {**SETTINGS_PROFILES['default'], **settings_profile}
+
+
+
+
+
+def resolve_loading_pattern(loading_pattern=None):
+    # LOADING_PATTERN with the boxes given in loading_pattern replaced, as nested tuples, after checking the plate codes
+    pattern = dict(LOADING_PATTERN)
+    if loading_pattern is not None:
+        unknown = set(loading_pattern) - set(pattern)
+        if unknown:
+            raise ValueError(f'Unknown fuel boxes {sorted(unknown)}, expected some of {list(pattern)}')
+        pattern.update(loading_pattern)
+
+    for box, assemblies in pattern.items():
+        if len(assemblies) != 2 or any(len(row) != 2 for row in assemblies):
+            raise ValueError(f'{box} must be a 2x2 list of assemblies, got {assemblies}')
+        for plates in (plates for row in assemblies for plates in row):
+            if not 0 < len(plates) <= PLATES_PER_ASSEMBLY or set(plates) - set(PLATE_MATERIALS):
+                raise ValueError(f'Assembly "{plates}" in {box} must be 1 to {PLATES_PER_ASSEMBLY} of the plate codes '
+                                 f'{list(PLATE_MATERIALS)}')
+    return {box: tuple(tuple(row) for row in assemblies) for box, assemblies in pattern.items()}
 
 
 #####################################################################################
 #                              MATERIALS DEFINITION                                 #
 #####################################################################################
 
-old_fuel = mc.Material(name='old_fuel')
-
-old_fuel_volume = ((30.01* 2) * (2.98 * 2) * (0.0255 * 2)) * 14 * 22
-old_fuel.volume = old_fuel_volume
-old_fuel.depletable = False
-
-old_fuel.set_density('g/cm3', 5.55)
-old_fuel.add_nuclide('U232', 2.947491514245839e-13)
-old_fuel.add_nuclide('U233', 4.077298658959091e-12)
-old_fuel.add_nuclide('U234', 0.00042255908895778523)
-old_fuel.add_nuclide('U235', 0.031846797312116364 )
-old_fuel.add_nuclide('U236', 7.512356624783098e-06)
-old_fuel.add_nuclide('U237', 2.3708760663329542e-11)
-old_fuel.add_nuclide('U238', 0.1279407097545607)
-
-
-# actinides
-old_fuel.add_nuclide('Pa231', 5.756954652450285e-10)
-old_fuel.add_nuclide('Th231', 7.0130703203824835e-12)
-old_fuel.add_nuclide('Th232', 1.3227198305412008e-13)
-old_fuel.add_nuclide('Ac227', 8.904022912604547e-14)
-old_fuel.add_nuclide('Np237', 6.65251172193495e-09)
-old_fuel.add_nuclide('Pu238', 1.882700983783114e-12)
-old_fuel.add_nuclide('Pu239', 3.3271255945835665e-06)
-old_fuel.add_nuclide('Pu240', 1.642446725043135e-09)
-old_fuel.add_nuclide('Pu241', 1.4224517898563095e-12)
-old_fuel.add_nuclide('Pu242', 3.3176351293697885e-16)
-old_fuel.add_nuclide('Am241', 1.5739873188670677e-13)
-
-
-# fission products
-old_fuel.add_nuclide('Tc99', 2.4052579896029084e-06)
-old_fuel.add_nuclide('I129', 2.1478937952726822e-07)
-old_fuel.add_nuclide('Cs135',2.5697488731572016e-06)
-old_fuel.add_nuclide('Zr93', 2.4957293872274517e-06)
-old_fuel.add_nuclide('Se79', 1.7577521340142144e-08)
-old_fuel.add_nuclide('Ru106',2.7748059905083755e-08)
-old_fuel.add_nuclide('Pd107',5.9451160957443644e-08)
-
-
-# Silicon
-old_fuel.add_nuclide('Si28', 0.08792025840265899)
-old_fuel.add_nuclide('Si29', 0.004464353857653482)
-old_fuel.add_nuclide('Si30', 0.0029429014751411937)
-
-
-# Aluminum
-old_fuel.add_nuclide('Al27', 0.7297642612449527)
-
-
-# Impurities
-old_fuel.add_nuclide('C12', 0.0019798528473611095)
-old_fuel.add_nuclide('C13', 2.2178553641497603e-05)
-old_fuel.add_nuclide('Fe54', 3.459051251800096e-05)
-old_fuel.add_nuclide('Fe56', 0.0005429970048446679)
-old_fuel.add_nuclide('Fe57', 1.2540945309491113e-05)
-old_fuel.add_nuclide('Fe58', 1.6688846300911418e-06)
-old_fuel.add_nuclide('O16', 0.004833504091641987)
-old_fuel.add_nuclide('O17', 1.8362677540538385e-06)
-old_fuel.add_nuclide('O18', 9.692002827059731e-06)
-old_fuel.add_nuclide('N14', 0.007155739050733723)
-old_fuel.add_nuclide('N15', 2.6308158667333212e-05)
+MATERIAL_NAMES = ('old_fuel', 'new_fuel', 'Al6061', 'water', 'air', 'graphite', 'barite_concrete', 'cadmium', 'magnesium')
 
-'''
-Boron is one of the impurities that exists in trace amounts and contribute to reactivity slightly, always worth investigating and modifying, 0-50 ppm
-is a fair assumption
-'''
-old_fuel.add_nuclide('B10', 2.1052781931332448e-05)
-old_fuel.add_nuclide('B11', 4.480676536670249e-05)
 
+def build_materials(core_state=None):
+    # core_state maps material names used below ('old_fuel', 'new_fuel', ...) to materials that replace the ones defined here
 
+    old_fuel = mc.Material(name='old_fuel')
+
+    old_fuel_volume = ((30.01* 2) * (2.98 * 2) * (0.0255 * 2)) * 14 * 22
+    old_fuel.volume = old_fuel_volume
+    old_fuel.depletable = False
 
+    old_fuel.set_density('g/cm3', 5.55)
+    old_fuel.add_nuclide('U232', 2.947491514245839e-13)
+    old_fuel.add_nuclide('U233', 4.077298658959091e-12)
+    old_fuel.add_nuclide('U234', 0.00042255908895778523)
+    old_fuel.add_nuclide('U235', 0.031846797312116364 )
+    old_fuel.add_nuclide('U236', 7.512356624783098e-06)
+    old_fuel.add_nuclide('U237', 2.3708760663329542e-11)
+    old_fuel.add_nuclide('U238', 0.1279407097545607)
 
 
-new_fuel = mc.Material(name='new_fuel')
-new_fuel.set_density('g/cm3', 5.55)
+    # actinides
+    old_fuel.add_nuclide('Pa231', 5.756954652450285e-10)
+    old_fuel.add_nuclide('Th231', 7.0130703203824835e-12)
+    old_fuel.add_nuclide('Th232', 1.3227198305412008e-13)
+    old_fuel.add_nuclide('Ac227', 8.904022912604547e-14)
+    old_fuel.add_nuclide('Np237', 6.65251172193495e-09)
+    old_fuel.add_nuclide('Pu238', 1.882700983783114e-12)
+    old_fuel.add_nuclide('Pu239', 3.3271255945835665e-06)
+    old_fuel.add_nuclide('Pu240', 1.642446725043135e-09)
+    old_fuel.add_nuclide('Pu241', 1.4224517898563095e-12)
+    old_fuel.add_nuclide('Pu242', 3.3176351293697885e-16)
+    old_fuel.add_nuclide('Am241', 1.5739873188670677e-13)
 
-new_fuel_volume = ((30.01* 2) * (2.98 * 2) * (0.0255 * 2)) * 4
-new_fuel.volume = new_fuel_volume
-new_fuel.depletable = False
 
-new_fuel.add_nuclide('U232', 9.528794482603661e-15)
-new_fuel.add_nuclide('U233', 8.520170101171778e-13)
-new_fuel.add_nuclide('U234', 0.00042267665264364825)
-new_fuel.add_nuclide('U235', 0.03187690169442632)
-new_fuel.add_nuclide('U236', 2.467447267636899e-06)
-new_fuel.add_nuclide('U237', 1.41044518475006e-11)
-new_fuel.add_nuclide('U238', 0.12794101853106749)
+    # fission products
+    old_fuel.add_nuclide('Tc99', 2.4052579896029084e-06)
+    old_fuel.add_nuclide('I129', 2.1478937952726822e-07)
+    old_fuel.add_nuclide('Cs135',2.5697488731572016e-06)
+    old_fuel.add_nuclide('Zr93', 2.4957293872274517e-06)
+    old_fuel.add_nuclide('Se79', 1.7577521340142144e-08)
+    old_fuel.add_nuclide('Ru106',2.7748059905083755e-08)
+    old_fuel.add_nuclide('Pd107',5.9451160957443644e-08)
+
+
+    # Silicon
+    old_fuel.add_nuclide('Si28', 0.08792025840265899)
+    old_fuel.add_nuclide('Si29', 0.004464353857653482)
+    old_fuel.add_nuclide('Si30', 0.0029429014751411937)
+
+
+    # Aluminum
+    old_fuel.add_nuclide('Al27', 0.7297642612449527)
+
+
+    # Impurities
+    old_fuel.add_nuclide('C12', 0.0019798528473611095)
+    old_fuel.add_nuclide('C13', 2.2178553641497603e-05)
+    old_fuel.add_nuclide('Fe54', 3.459051251800096e-05)
+    old_fuel.add_nuclide('Fe56', 0.0005429970048446679)
+    old_fuel.add_nuclide('Fe57', 1.2540945309491113e-05)
+    old_fuel.add_nuclide('Fe58', 1.6688846300911418e-06)
+    old_fuel.add_nuclide('O16', 0.004833504091641987)
+    old_fuel.add_nuclide('O17', 1.8362677540538385e-06)
+    old_fuel.add_nuclide('O18', 9.692002827059731e-06)
+    old_fuel.add_nuclide('N14', 0.007155739050733723)
+    old_fuel.add_nuclide('N15', 2.6308158667333212e-05)
+
+    '''
+    Boron is one of the impurities that exists in trace amounts and contribute to reactivity slightly, always worth investigating and modifying, 0-50 ppm
+    is a fair assumption
+    '''
+    old_fuel.add_nuclide('B10', 2.1052781931332448e-05)
+    old_fuel.add_nuclide('B11', 4.480676536670249e-05)
 
 
-# actinides
-new_fuel.add_nuclide('Pa231', 8.113408443946757e-11)
-new_fuel.add_nuclide('Th231', 6.821719539214993e-12)
-new_fuel.add_nuclide('Th232', 1.32240570958214e-13)
-new_fuel.add_nuclide('Ac227', 2.154521747891721e-15)
-new_fuel.add_nuclide('Np237', 1.3255892738413798e-09)
-new_fuel.add_nuclide('Pu238', 1.1245347737231245e-13)
-new_fuel.add_nuclide('Pu239', 8.010110958719692e-07)
-new_fuel.add_nuclide('Pu240', 1.2098134976218185e-10)
-new_fuel.add_nuclide('Pu241', 2.7841061943422094e-14)
-new_fuel.add_nuclide('Pu242', 2.0794245322191485e-18)
-new_fuel.add_nuclide('Am241', 8.750474357556925e-16)
 
 
-# fission products
-new_fuel.add_nuclide('Tc99',  2.4052579896029084e-06)
-new_fuel.add_nuclide('I129',  2.1478937952726822e-07)
-new_fuel.add_nuclide('Cs135', 2.5697488731572016e-06)
-new_fuel.add_nuclide('Zr93',  2.4957293872274517e-06)
-new_fuel.add_nuclide('Se79',  1.7577521340142144e-08)
-new_fuel.add_nuclide('Ru106', 2.7748059905083755e-08)
-new_fuel.add_nuclide('Pd107', 5.9451160957443644e-08)
 
+    new_fuel = mc.Material(name='new_fuel')
+    new_fuel.set_density('g/cm3', 5.55)
 
-# Silicon
-new_fuel.add_nuclide('Si28', 0.08792025840265899)
-new_fuel.add_nuclide('Si29', 0.004464353857653482)
-new_fuel.add_nuclide('Si30', 0.0029429014751411937)
+    new_fuel_volume = ((30.01* 2) * (2.98 * 2) * (0.0255 * 2)) * 4
+    new_fuel.volume = new_fuel_volume
+    new_fuel.depletable = False
 
+    new_fuel.add_nuclide('U232', 9.528794482603661e-15)
+    new_fuel.add_nuclide('U233', 8.520170101171778e-13)
+    new_fuel.add_nuclide('U234', 0.00042267665264364825)
+    new_fuel.add_nuclide('U235', 0.03187690169442632)
+    new_fuel.add_nuclide('U236', 2.467447267636899e-06)
+    new_fuel.add_nuclide('U237', 1.41044518475006e-11)
+    new_fuel.add_nuclide('U238', 0.12794101853106749)
 
-# Aluminum
-new_fuel.add_nuclide('Al27', 0.7297642612449527)
 
+    # actinides
+    new_fuel.add_nuclide('Pa231', 8.113408443946757e-11)
+    new_fuel.add_nuclide('Th231', 6.821719539214993e-12)
+    new_fuel.add_nuclide('Th232', 1.32240570958214e-13)
+    new_fuel.add_nuclide('Ac227', 2.154521747891721e-15)
+    new_fuel.add_nuclide('Np237', 1.3255892738413798e-09)
+    new_fuel.add_nuclide('Pu238', 1.1245347737231245e-13)
+    new_fuel.add_nuclide('Pu239', 8.010110958719692e-07)
+    new_fuel.add_nuclide('Pu240', 1.2098134976218185e-10)
+    new_fuel.add_nuclide('Pu241', 2.7841061943422094e-14)
+    new_fuel.add_nuclide('Pu242', 2.0794245322191485e-18)
+    new_fuel.add_nuclide('Am241', 8.750474357556925e-16)
 
-# Impurities
-new_fuel.add_nuclide('C12', 0.0019798528473611095)
-new_fuel.add_nuclide('C13', 2.2178553641497603e-05)
-new_fuel.add_nuclide('Fe54', 3.459051251800096e-05)
-new_fuel.add_nuclide('Fe56', 0.0005429970048446679)
-new_fuel.add_nuclide('Fe57', 1.2540945309491113e-05)
-new_fuel.add_nuclide('Fe58', 1.6688846300911418e-06)
-new_fuel.add_nuclide('O16', 0.004833504091641987)
-new_fuel.add_nuclide('O17', 1.8362677540538385e-06)
-new_fuel.add_nuclide('O18', 9.692002827059731e-06)
-new_fuel.add_nuclide('N14', 0.007155739050733723)
-new_fuel.add_nuclide('N15', 2.6308158667333212e-05)
 
-'''
-Boron is one of the impurities that exists in trace amounts and contribute to reactivity slightly, always worth investigating and modifying, 0-50 
-ppm is a fair assumption
-'''
-new_fuel.add_nuclide('B10', 2.1052781931332448e-05)
-new_fuel.add_nuclide('B11', 4.480676536670249e-05)
+    # fission products
+    new_fuel.add_nuclide('Tc99',  2.4052579896029084e-06)
+    new_fuel.add_nuclide('I129',  2.1478937952726822e-07)
+    new_fuel.add_nuclide('Cs135', 2.5697488731572016e-06)
+    new_fuel.add_nuclide('Zr93',  2.4957293872274517e-06)
+    new_fuel.add_nuclide('Se79',  1.7577521340142144e-08)
+    new_fuel.add_nuclide('Ru106', 2.7748059905083755e-08)
+    new_fuel.add_nuclide('Pd107', 5.9451160957443644e-08)
 
 
+    # Silicon
+    new_fuel.add_nuclide('Si28', 0.08792025840265899)
+    new_fuel.add_nuclide('Si29', 0.004464353857653482)
+    new_fuel.add_nuclide('Si30', 0.0029429014751411937)
 
-# Cladding
-Al6061 = mc.Material(name='Al6061')
-Al6061.add_element('Al', 0.96740, 'ao')
-Al6061.add_element('Fe', 0.00343, 'ao')
-Al6061.add_element('Mg', 0.01348, 'ao')
-Al6061.add_element('Si', 0.00779 , 'ao')
-Al6061.add_element('Cu', 0.00172, 'ao')
-Al6061.add_element('Zn', 0.00209, 'ao')
-Al6061.add_element('Ti', 0.00172, 'ao')
-Al6061.add_element('Cr', 0.00184, 'ao')
 
-# Boron here also falls under the same assumption, it is known to exist in trace amounts, so 0-50 ppm is a fair assumption
-Al6061.add_element('B', 20e-6, 'ao')
-Al6061.set_density('g/cm3', 2.7)
+    # Aluminum
+    new_fuel.add_nuclide('Al27', 0.7297642612449527)
 
-Al6061.depletable = False
 
+    # Impurities
+    new_fuel.add_nuclide('C12', 0.0019798528473611095)
+    new_fuel.add_nuclide('C13', 2.2178553641497603e-05)
+    new_fuel.add_nuclide('Fe54', 3.459051251800096e-05)
+    new_fuel.add_nuclide('Fe56', 0.0005429970048446679)
+    new_fuel.add_nuclide('Fe57', 1.2540945309491113e-05)
+    new_fuel.add_nuclide('Fe58', 1.6688846300911418e-06)
+    new_fuel.add_nuclide('O16', 0.004833504091641987)
+    new_fuel.add_nuclide('O17', 1.8362677540538385e-06)
+    new_fuel.add_nuclide('O18', 9.692002827059731e-06)
+    new_fuel.add_nuclide('N14', 0.007155739050733723)
+    new_fuel.add_nuclide('N15', 2.6308158667333212e-05)
 
+    '''
+    Boron is one of the impurities that exists in trace amounts and contribute to reactivity slightly, always worth investigating and modifying, 0-50 
+    ppm is a fair assumption
+    '''
+    new_fuel.add_nuclide('B10', 2.1052781931332448e-05)
+    new_fuel.add_nuclide('B11', 4.480676536670249e-05)
 
-water = mc.Material(name='Water')
-water.add_element('H', 2)
-water.add_element('O', 1)
-water.set_density('g/cm3', 0.9975)
-water.add_s_alpha_beta('c_H_in_H2O')
 
-water.depletable = False
 
+    # Cladding
+    Al6061 = mc.Material(name='Al6061')
+    Al6061.add_element('Al', 0.96740, 'ao')
+    Al6061.add_element('Fe', 0.00343, 'ao')
+    Al6061.add_element('Mg', 0.01348, 'ao')
+    Al6061.add_element('Si', 0.00779 , 'ao')
+    Al6061.add_element('Cu', 0.00172, 'ao')
+    Al6061.add_element('Zn', 0.00209, 'ao')
+    Al6061.add_element('Ti', 0.00172, 'ao')
+    Al6061.add_element('Cr', 0.00184, 'ao')
 
+    # Boron here also falls under the same assumption, it is known to exist in trace amounts, so 0-50 ppm is a fair assumption
+    Al6061.add_element('B', 20e-6, 'ao')
+    Al6061.set_density('g/cm3', 2.7)
 
-graphite = mc.Material(name='graphite')
-graphite.add_element('C', 1 - 5e-6)
-graphite.add_element('B', 5e-6)
-graphite.set_density('g/cm3', 1.6)
-graphite.add_s_alpha_beta('c_Graphite')
+    Al6061.depletable = False
 
-graphite.depletable = False
 
 
+    water = mc.Material(name='Water')
+    water.add_element('H', 2)
+    water.add_element('O', 1)
+    water.set_density('g/cm3', 0.9975)
+    water.add_s_alpha_beta('c_H_in_H2O')
 
-cadmium = mc.Material(name='cadmium')
-cadmium.add_element('Cd', 1)
-cadmium.set_density('g/cm3', 8.75)
+    water.depletable = False
 
-cadmium.depletable = False
 
 
+    graphite = mc.Material(name='graphite')
+    graphite.add_element('C', 1 - 5e-6)
+    graphite.add_element('B', 5e-6)
+    graphite.set_density('g/cm3', 1.6)
+    graphite.add_s_alpha_beta('c_Graphite')
 
-magnesium = mc.Material(name='magnesium')
-magnesium.add_element('Mg', 1)
-magnesium.set_density('g/cm3', 1.74)
+    graphite.depletable = False
 
-magnesium.depletable = False
 
 
+    cadmium = mc.Material(name='cadmium')
+    cadmium.add_element('Cd', 1)
+    cadmium.set_density('g/cm3', 8.75)
 
-air = mc.Material(name='Air')
-air.add_element('O', 0.21)
-air.add_element('N', 0.78)
-air.add_element('Ar', 0.00995)
-air.add_element('C', 0.00005)
-air.set_density('g/cm3', 0.0012)
+    cadmium.depletable = False
 
-air.depletable = False
 
 
+    magnesium = mc.Material(name='magnesium')
+    magnesium.add_element('Mg', 1)
+    magnesium.set_density('g/cm3', 1.74)
 
-barite_concrete = mc.Material(name='barytes_concrete')
-barite_concrete.add_element('Ba', 0.481, 'wo')
-barite_concrete.add_element('O', 0.324, 'wo')
-barite_concrete.add_element('S', 0.114, 'wo')
-barite_concrete.add_element('Ca', 0.042, 'wo')
-barite_concrete.add_element('Si', 0.01, 'wo')
-barite_concrete.add_element('Mg', 0.007, 'wo')
-barite_concrete.add_element('C', 0.006, 'wo')
-barite_concrete.add_element('Fe', 0.006, 'wo')
-barite_concrete.add_element('H', 0.006, 'wo')
-barite_concrete.add_element('Al', 0.004, 'wo')
-barite_concrete.set_density('g/cm3', 3.5)
+    magnesium.depletable = False
 
-barite_concrete.depletable = False
 
 
+    air = mc.Material(name='Air')
+    air.add_element('O', 0.21)
+    air.add_element('N', 0.78)
+    air.add_element('Ar', 0.00995)
+    air.add_element('C', 0.00005)
+    air.set_density('g/cm3', 0.0012)
 
-materials = mc.Materials([old_fuel, new_fuel, Al6061, water, air, graphite, barite_concrete, cadmium, magnesium])
-materials.export_to_xml()
+    air.depletable = False
 
-colors = {old_fuel: 'red', new_fuel: 'orange', Al6061: 'silver', water: 'blue', graphite: 'grey', air: 'black',
-          cadmium: 'green', magnesium: 'purple', barite_concrete: 'brown'}
 
 
+    barite_concrete = mc.Material(name='barytes_concrete')
+    barite_concrete.add_element('Ba', 0.481, 'wo')
+    barite_concrete.add_element('O', 0.324, 'wo')
+    barite_concrete.add_element('S', 0.114, 'wo')
+    barite_concrete.add_element('Ca', 0.042, 'wo')
+    barite_concrete.add_element('Si', 0.01, 'wo')
+    barite_concrete.add_element('Mg', 0.007, 'wo')
+    barite_concrete.add_element('C', 0.006, 'wo')
+    barite_concrete.add_element('Fe', 0.006, 'wo')
+    barite_concrete.add_element('H', 0.006, 'wo')
+    barite_concrete.add_element('Al', 0.004, 'wo')
+    barite_concrete.set_density('g/cm3', 3.5)
 
+    barite_concrete.depletable = False
 
 
-#####################################################################################
-#                                   FUEL PLATE                                      #
-#####################################################################################
 
-fuel_top = mc.ZPlane(z0=30.01)
-fuel_bottom = mc.ZPlane(z0=-30.01)
-fuel_right = mc.XPlane(x0=2.98)
-fuel_left = mc.XPlane(x0=-2.98)
-fuel_front = mc.YPlane(y0=0.0255)
-fuel_back = mc.YPlane(y0=-0.0255)
+    materials = dict(zip(MATERIAL_NAMES, [old_fuel, new_fuel, Al6061, water, air, graphite, barite_concrete, cadmium, magnesium]))
 
-fuel_region = +fuel_bottom & -fuel_top & +fuel_left & -fuel_right & -fuel_front & +fuel_back
+    if core_state is not None:
+        unknown = set(core_state) - set(materials)
+        if unknown:
+            raise ValueError(f'Unknown materials {sorted(unknown)} in core_state, expected some of {list(materials)}')
+        replacements = list({id(material): material for material in core_state.values()}.values())
+        state_ids = {material.id for material in replacements}
+        if len(state_ids) != len(replacements):
+            raise ValueError('Materials of core_state share an id')
+        materials.update(core_state)
+        # a replacement created elsewhere may carry an id that is already taken by one of the materials above, which is
+        # then renumbered, the materials of core_state always keep their ids
+        next_id = max(material.id for material in materials.values()) + 1
+        for name, material in materials.items():
+            if name not in core_state and material.id in state_ids:
+                material.id = next_id
+                next_id += 1
 
-old_fuel_cell = mc.Cell(region=fuel_region, fill=old_fuel)
-new_fuel_cell = mc.Cell(region=fuel_region, fill=new_fuel)
+    return materials
 
-clad_top = mc.ZPlane(z0=32.55)
-clad_bottom = mc.ZPlane(z0=-32.55)
-clad_right = mc.XPlane(x0=3.615)
-clad_left = mc.XPlane(x0=-3.615)
-clad_front = mc.YPlane(y0=0.0635)
-clad_back = mc.YPlane(y0=-0.0635)
 
-clad_region = (+clad_bottom & -clad_top & +clad_left & -clad_right &
-               -clad_front & +clad_back & ~fuel_region)
+def material_colors(materials):
+    return {materials['old_fuel']: 'red', materials['new_fuel']: 'orange', materials['Al6061']: 'silver',
+            materials['water']: 'blue', materials['graphite']: 'grey', materials['air']: 'black',
+            materials['cadmium']: 'green', materials['magnesium']: 'purple', materials['barite_concrete']: 'brown'}
 
-clad_cell = mc.Cell(region=clad_region, fill=Al6061)
-clad_cell_2 = mc.Cell(region=clad_region, fill=Al6061)
 
+def build_geometry(materials, blade_positions=None, loading_pattern=None):
+    old_fuel = materials['old_fuel']
+    new_fuel = materials['new_fuel']
+    Al6061 = materials['Al6061']
+    water = materials['water']
+    graphite = materials['graphite']
+    cadmium = materials['cadmium']
+    magnesium = materials['magnesium']
+    air = materials['air']
+    barite_concrete = materials['barite_concrete']
 
-dummy_cell= mc.Cell(fill=Al6061, region= +clad_bottom & -clad_top & +clad_left &
-                                         -clad_right & -clad_front & +clad_back)
+    blade_positions = _blade_positions(blade_positions)
+    loading_pattern = resolve_loading_pattern(loading_pattern)
 
-screw_1_cylinder = mc.YCylinder(r= 1.2, x0= -3.615/2, z0= 31.275)
-screw_2_cylinder = mc.YCylinder(r= 1.2, x0 = 3.615/2, z0= 31.275)
-screw_3_cylinder = mc.YCylinder(r= 1.2, x0= -3.615/2, z0= -31.275)
-screw_4_cylinder = mc.YCylinder(r= 1.2, x0=  3.615/2, z0= -31.275)
+    #####################################################################################
+    #                                   FUEL PLATE                                      #
+    #####################################################################################
 
+    fuel_top = mc.ZPlane(z0=30.01)
+    fuel_bottom = mc.ZPlane(z0=-30.01)
+    fuel_right = mc.XPlane(x0=2.98)
+    fuel_left = mc.XPlane(x0=-2.98)
+    fuel_front = mc.YPlane(y0=0.0255)
+    fuel_back = mc.YPlane(y0=-0.0255)
 
-coolant_region = ~clad_region & ~fuel_region & +screw_1_cylinder & +screw_2_cylinder & +screw_3_cylinder & +screw_4_cylinder
+    fuel_region = +fuel_bottom & -fuel_top & +fuel_left & -fuel_right & -fuel_front & +fuel_back
 
-coolant = mc.Cell(region=coolant_region, fill=water)
-coolant_2 = mc.Cell(region=coolant_region, fill=water)
-coolant_3 = mc.Cell(region=coolant_region, fill=water)
+    old_fuel_cell = mc.Cell(region=fuel_region, fill=old_fuel)
+    new_fuel_cell = mc.Cell(region=fuel_region, fill=new_fuel)
 
+    clad_top = mc.ZPlane(z0=32.55)
+    clad_bottom = mc.ZPlane(z0=-32.55)
+    clad_right = mc.XPlane(x0=3.615)
+    clad_left = mc.XPlane(x0=-3.615)
+    clad_front = mc.YPlane(y0=0.0635)
+    clad_back = mc.YPlane(y0=-0.0635)
 
+    clad_region = (+clad_bottom & -clad_top & +clad_left & -clad_right &
+                   -clad_front & +clad_back & ~fuel_region)
 
-infinite_air = mc.Cell(fill = air)
-infinite_air_universe = mc.Universe()
-infinite_air_universe.add_cell(infinite_air)
+    clad_cell = mc.Cell(region=clad_region, fill=Al6061)
+    clad_cell_2 = mc.Cell(region=clad_region, fill=Al6061)
 
 
-infinite_water = mc.Cell(fill = water)
-infinite_water_universe = mc.Universe()
-infinite_water_universe.add_cell(infinite_water)
+    dummy_cell= mc.Cell(fill=Al6061, region= +clad_bottom & -clad_top & +clad_left &
+                                             -clad_right & -clad_front & +clad_back)
 
-infinite_graphite_cell = mc.Cell(fill=graphite)
-infinite_graphite_universe = mc.Universe(cells=[infinite_graphite_cell])
+    screw_1_cylinder = mc.YCylinder(r= 1.2, x0= -3.615/2, z0= 31.275)
+    screw_2_cylinder = mc.YCylinder(r= 1.2, x0 = 3.615/2, z0= 31.275)
+    screw_3_cylinder = mc.YCylinder(r= 1.2, x0= -3.615/2, z0= -31.275)
+    screw_4_cylinder = mc.YCylinder(r= 1.2, x0=  3.615/2, z0= -31.275)
 
-infinite_cladding = mc.Cell(fill=Al6061)
-infinite_cladding_universe = mc.Universe(cells=[infinite_cladding])
 
-infinite_barite_concrete = mc.Cell(fill=barite_concrete)
-infinite_barite_concrete_universe = mc.Universe(cells=[infinite_barite_concrete])
+    coolant_region = ~clad_region & ~fuel_region & +screw_1_cylinder & +screw_2_cylinder & +screw_3_cylinder & +screw_4_cylinder
 
-screw_1 = mc.Cell(fill= Al6061, region= -screw_1_cylinder & ~fuel_region & ~ clad_region)
-screw_2 = mc.Cell(fill= Al6061, region= -screw_2_cylinder & ~fuel_region & ~ clad_region)
-screw_3 = mc.Cell(fill= Al6061, region= -screw_3_cylinder & ~fuel_region & ~ clad_region)
-screw_4 = mc.Cell(fill= Al6061, region= -screw_4_cylinder & ~fuel_region & ~ clad_region)
+    coolant = mc.Cell(region=coolant_region, fill=water)
+    coolant_2 = mc.Cell(region=coolant_region, fill=water)
+    coolant_3 = mc.Cell(region=coolant_region, fill=water)
 
-screw_11 = mc.Cell(fill= Al6061, region= -screw_1_cylinder & ~fuel_region & ~clad_region)
-screw_22 = mc.Cell(fill= Al6061, region= -screw_2_cylinder & ~fuel_region & ~clad_region)
-screw_33 = mc.Cell(fill= Al6061, region= -screw_3_cylinder & ~fuel_region & ~clad_region)
-screw_44 = mc.Cell(fill= Al6061, region= -screw_4_cylinder & ~fuel_region & ~clad_region)
 
-screw_111 = mc.Cell(fill= Al6061, region= -screw_1_cylinder & ~fuel_region & ~clad_region)
-screw_222 = mc.Cell(fill= Al6061, region= -screw_2_cylinder & ~fuel_region & ~clad_region)
-screw_333 = mc.Cell(fill= Al6061, region= -screw_3_cylinder & ~fuel_region & ~clad_region)
-screw_444 = mc.Cell(fill= Al6061, region= -screw_4_cylinder & ~fuel_region & ~clad_region)
 
+    infinite_air = mc.Cell(fill = air)
+    infinite_air_universe = mc.Universe()
+    infinite_air_universe.add_cell(infinite_air)
 
-old_fuel_plate = mc.Universe(cells=[old_fuel_cell, clad_cell, coolant,
-                                    screw_1, screw_2, screw_3, screw_4])
 
-new_fuel_plate = mc.Universe(cells=[new_fuel_cell, clad_cell_2, coolant_3,
-                                    screw_11, screw_22, screw_33, screw_44])
+    infinite_water = mc.Cell(fill = water)
+    infinite_water_universe = mc.Universe()
+    infinite_water_universe.add_cell(infinite_water)
 
-dummy_plate= mc.Universe(cells=[dummy_cell, coolant_2, screw_111,
-                                screw_222, screw_333, screw_444])
-'''
-old_fuel_plate.plot(colors=colors, color_by='material', width=(3.615 * 3, 32.55 * 2.12),
-                pixels = (1000, 1000), basis= 'xz')
+    infinite_graphite_cell = mc.Cell(fill=graphite)
+    infinite_graphite_universe = mc.Universe(cells=[infinite_graphite_cell])
 
-new_fuel_plate.plot(colors=colors, color_by='material', width=(3.615 * 3, 32.55 * 2.12),
-                pixels = (1000, 1000), basis= 'xz')
-'''
+    infinite_cladding = mc.Cell(fill=Al6061)
+    infinite_cladding_universe = mc.Universe(cells=[infinite_cladding])
 
+    infinite_barite_concrete = mc.Cell(fill=barite_concrete)
+    infinite_barite_concrete_universe = mc.Universe(cells=[infinite_barite_concrete])
 
+    screw_1 = mc.Cell(fill= Al6061, region= -screw_1_cylinder & ~fuel_region & ~ clad_region)
+    screw_2 = mc.Cell(fill= Al6061, region= -screw_2_cylinder & ~fuel_region & ~ clad_region)
+    screw_3 = mc.Cell(fill= Al6061, region= -screw_3_cylinder & ~fuel_region & ~ clad_region)
+    screw_4 = mc.Cell(fill= Al6061, region= -screw_4_cylinder & ~fuel_region & ~ clad_region)
 
+    screw_11 = mc.Cell(fill= Al6061, region= -screw_1_cylinder & ~fuel_region & ~clad_region)
+    screw_22 = mc.Cell(fill= Al6061, region= -screw_2_cylinder & ~fuel_region & ~clad_region)
+    screw_33 = mc.Cell(fill= Al6061, region= -screw_3_cylinder & ~fuel_region & ~clad_region)
+    screw_44 = mc.Cell(fill= Al6061, region= -screw_4_cylinder & ~fuel_region & ~clad_region)
 
+    screw_111 = mc.Cell(fill= Al6061, region= -screw_1_cylinder & ~fuel_region & ~clad_region)
+    screw_222 = mc.Cell(fill= Al6061, region= -screw_2_cylinder & ~fuel_region & ~clad_region)
+    screw_333 = mc.Cell(fill= Al6061, region= -screw_3_cylinder & ~fuel_region & ~clad_region)
+    screw_444 = mc.Cell(fill= Al6061, region= -screw_4_cylinder & ~fuel_region & ~clad_region)
 
-#####################################################################################
-#                                   FUEL ASSEMBLY                                   #
-#####################################################################################
 
-fuel_assembly = mc.RectLattice(name='fuel assembly')
-fuel_assembly.lower_left = (-3.615, -2.863)
-fuel_assembly.pitch = (7.23, 0.409)
-fuel_assembly.universes = [[old_fuel_plate],
-                           [old_fuel_plate],
-                           [old_fuel_plate],
-                           [old_fuel_plate],
-                           [old_fuel_plate],
-                           [old_fuel_plate],
-                           [old_fuel_plate],
-                           [old_fuel_plate],
-                           [old_fuel_plate],
-                           [old_fuel_plate],
-                           [old_fuel_plate],
-                           [old_fuel_plate],
-                           [old_fuel_plate],
-                           [old_fuel_plate]]
-
-fuel_assembly.outer = infinite_water_universe
-fuel_assembly_cell = mc.Cell()
-fuel_assembly_cell.fill = fuel_assembly
-
-dummy_assembly = mc.RectLattice(name='dummy assembly')
-dummy_assembly.lower_left = (-3.615, -2.863)
-dummy_assembly.pitch = (7.23, 0.409)
-dummy_assembly.universes = [[dummy_plate],
-                            [dummy_plate],
-                            [dummy_plate],
-                            [dummy_plate],
-                            [dummy_plate],
-                            [dummy_plate],
-                            [dummy_plate],
-                            [dummy_plate],
-                            [dummy_plate],
-                            [dummy_plate],
-                            [dummy_plate],
-                            [dummy_plate],
-                            [dummy_plate],
-                            [dummy_plate]]
-
-dummy_assembly.outer = infinite_water_universe
-dummy_assembly_cell = mc.Cell()
-dummy_assembly_cell.fill = dummy_assembly
-
-partial_dummy_assembly = mc.RectLattice(name='dummy assembly')
-partial_dummy_assembly.lower_left = (-3.615, -2.863)
-partial_dummy_assembly.pitch = (7.23, 0.409 * (14 / 13))
-partial_dummy_assembly.universes = [[new_fuel_plate],
-                                    [new_fuel_plate],
-                                    [new_fuel_plate],
-                                    [new_fuel_plate],
-                                    [dummy_plate],
-                                    [dummy_plate],
-                                    [dummy_plate],
-                                    [dummy_plate],
-                                    [dummy_plate],
-                                    [dummy_plate],
-                                    [dummy_plate],
-                                    [dummy_plate],
-                                    [dummy_plate], ]
-
-partial_dummy_assembly.outer = infinite_water_universe
-partial_dummy_assembly_cell = mc.Cell()
-partial_dummy_assembly_cell.fill = partial_dummy_assembly
-
-fuel_assembly_universe = mc.Universe()
-fuel_assembly_universe.add_cell(fuel_assembly_cell)
-
-dummy_assembly_universe = mc.Universe()
-dummy_assembly_universe.add_cell(dummy_assembly_cell)
-
-partial_dummy_assembly_universe = mc.Universe(cells=[partial_dummy_assembly_cell])
-'''
-partial_dummy_assembly_universe.plot(colors=colors, color_by='material', width=(7.23 * 1.15, 2.863 * 2.2),
-                                     origin=(0, 0, 0), pixels=(600, 600), basis='xy')
+    old_fuel_plate = mc.Universe(cells=[old_fuel_cell, clad_cell, coolant,
+                                        screw_1, screw_2, screw_3, screw_4])
 
-partial_dummy_assembly_universe.plot(colors=colors, color_by='material', width=(2.863 * 3, 32.55 * 2.1),
-                                     origin=(0, 0, 0), pixels=(1000, 1000), basis='yz')
-'''
+    new_fuel_plate = mc.Universe(cells=[new_fuel_cell, clad_cell_2, coolant_3,
+                                        screw_11, screw_22, screw_33, screw_44])
 
+    dummy_plate= mc.Universe(cells=[dummy_cell, coolant_2, screw_111,
+                                    screw_222, screw_333, screw_444])
+    '''
+    old_fuel_plate.plot(colors=colors, color_by='material', width=(3.615 * 3, 32.55 * 2.12),
+                    pixels = (1000, 1000), basis= 'xz')
 
+    new_fuel_plate.plot(colors=colors, color_by='material', width=(3.615 * 3, 32.55 * 2.12),
+                    pixels = (1000, 1000), basis= 'xz')
+    '''
 
 
 
-#####################################################################################
-#                                     FUEL BOXES                                    #
-#####################################################################################
 
-fuel_box = mc.RectLattice(name = 'fuel box')
-fuel_box.lower_left = (-8.01, -5.726 - 0.282)
-fuel_box.pitch = (8.005, 5.726 + 0.282)
 
-fuel_box.universes = [[fuel_assembly_universe, fuel_assembly_universe],
-                      [fuel_assembly_universe, fuel_assembly_universe]]
+    #####################################################################################
+    #                                   FUEL ASSEMBLY                                   #
+    #####################################################################################
 
-fuel_box.outer = mc.Universe(cells=[mc.Cell(fill= water)], name='water surrounding fuel assembly lattice')
-fuel_box_cell = mc.Cell()
-fuel_box_cell.fill = fuel_box
+    # one assembly lattice per distinct string of plate codes, the plates of an assembly of fewer than 14 plates are
+    # spread over the same width (e.g. the 13 plate partial dummy assembly of the 2025 core)
+    plate_universes = {'O': old_fuel_plate, 'N': new_fuel_plate, 'D': dummy_plate}
+    assembly_universes = {}
 
+    def assembly_universe(plates):
+        if plates not in assembly_universes:
+            assembly = mc.RectLattice(name=f'assembly {plates}')
+            assembly.lower_left = (-3.615, -2.863)
+            assembly.pitch = (7.23, 0.409 * (PLATES_PER_ASSEMBLY / len(plates)))
+            assembly.universes = [[plate_universes[code]] for code in plates]
+            assembly.outer = infinite_water_universe
+            assembly_universes[plates] = mc.Universe(cells=[mc.Cell(fill=assembly)])
+        return assembly_universes[plates]
 
-right_box_inner_boundary = mc.XPlane(x0= 7.62)
-left_box_inner_boundary = mc.XPlane(x0= -7.62)
-front_box_inner_boundary = mc.YPlane(y0= 6.35)
-back_box_inner_boundary = mc.YPlane(y0= -6.35)
-top_box_inner_boundary = mc.ZPlane(z0= 60.95)
-top_box_water_boundary = mc.ZPlane(z0= 60.95 - 5.08)
-bottom_box_inner_boundary = mc.ZPlane(z0= -60.95)
 
-right_box_outer_boundary = mc.XPlane(x0= 7.62 +0.318)
-left_box_outer_boundary = mc.XPlane(x0= -7.62 -0.318)
-front_box_outer_boundary = mc.YPlane(y0= 6.35 +0.318)
-back_box_outer_boundary = mc.YPlane(y0= -6.35 -0.318)
-top_box_outer_boundary = mc.ZPlane(z0= 60.95 +0.318)
-bottom_box_outer_boundary = mc.ZPlane(z0= -60.95 -0.318)
 
 
-fuel_box_dummy = mc.RectLattice(name = 'fuel box with dummy assembly')
-fuel_box_dummy.lower_left = (-8.01, -5.726 - 0.282)
-fuel_box_dummy.pitch = (8.005, 5.726 + 0.282)
 
-fuel_box_dummy.universes = [[fuel_assembly_universe, fuel_assembly_universe],
-                            [fuel_assembly_universe, dummy_assembly_universe]]
+    #####################################################################################
+    #                                     FUEL BOXES                                    #
+    #####################################################################################
 
-fuel_box_dummy.outer = mc.Universe(cells=[mc.Cell(fill= water)], name='water surrounding fuel assembly lattice')
-fuel_box_dummy_cell = mc.Cell()
-fuel_box_dummy_cell.fill = fuel_box_dummy
+    right_box_inner_boundary = mc.XPlane(x0= 7.62)
+    left_box_inner_boundary = mc.XPlane(x0= -7.62)
+    front_box_inner_boundary = mc.YPlane(y0= 6.35)
+    back_box_inner_boundary = mc.YPlane(y0= -6.35)
+    top_box_inner_boundary = mc.ZPlane(z0= 60.95)
+    top_box_water_boundary = mc.ZPlane(z0= 60.95 - 5.08)
+    bottom_box_inner_boundary = mc.ZPlane(z0= -60.95)
 
-fuel_box_partial_dummy = mc.RectLattice(name = 'fuel box with partial dummy assembly')
-fuel_box_partial_dummy.lower_left = (-8.01, -5.726 - 0.282)
-fuel_box_partial_dummy.pitch = (8.005, 5.726 + 0.282)
+    right_box_outer_boundary = mc.XPlane(x0= 7.62 +0.318)
+    left_box_outer_boundary = mc.XPlane(x0= -7.62 -0.318)
+    front_box_outer_boundary = mc.YPlane(y0= 6.35 +0.318)
+    back_box_outer_boundary = mc.YPlane(y0= -6.35 -0.318)
+    top_box_outer_boundary = mc.ZPlane(z0= 60.95 +0.318)
+    bottom_box_outer_boundary = mc.ZPlane(z0= -60.95 -0.318)
 
-fuel_box_partial_dummy.universes = [[fuel_assembly_universe, partial_dummy_assembly_universe],
-                                    [fuel_assembly_universe, fuel_assembly_universe]]
 
-fuel_box_partial_dummy.outer = mc.Universe(cells=[mc.Cell(fill= water)], name='water surrounding fuel assembly lattice')
-fuel_box_partial_dummy_cell = mc.Cell()
-fuel_box_partial_dummy_cell.fill = fuel_box_partial_dummy
+    fuel_box_region = (-right_box_inner_boundary & +left_box_inner_boundary & -front_box_inner_boundary
+                       & +back_box_inner_boundary & -top_box_water_boundary & +bottom_box_inner_boundary)
 
+    fuel_box_air_region = (-right_box_inner_boundary & +left_box_inner_boundary & -front_box_inner_boundary &
+                           +back_box_inner_boundary & +top_box_water_boundary & -top_box_inner_boundary)
 
+    fuel_box_wall_region = (-right_box_outer_boundary & +left_box_outer_boundary & -front_box_outer_boundary &
+                            +back_box_outer_boundary & -top_box_outer_boundary & +bottom_box_outer_boundary &
+                            ~fuel_box_region & ~fuel_box_air_region)
 
-fuel_box_cell.region = (-right_box_inner_boundary & +left_box_inner_boundary & -front_box_inner_boundary
-                        & +back_box_inner_boundary & -top_box_water_boundary & +bottom_box_inner_boundary)
+    # one box universe (assembly lattice, aluminum wall, air above the water) per distinct 2x2 set of assemblies
+    box_universes = {}
 
-fuel_box_air_region = (-right_box_inner_boundary & +left_box_inner_boundary & -front_box_inner_boundary &
-                       +back_box_inner_boundary & +top_box_water_boundary & -top_box_inner_boundary)
+    def box_universe(assemblies):
+        if assemblies not in box_universes:
+            fuel_box = mc.RectLattice(name=f'fuel box {assemblies}')
+            fuel_box.lower_left = (-8.01, -5.726 - 0.282)
+            fuel_box.pitch = (8.005, 5.726 + 0.282)
+            fuel_box.universes = [[assembly_universe(plates) for plates in row] for row in assemblies]
+            fuel_box.outer = mc.Universe(cells=[mc.Cell(fill= water)], name='water surrounding fuel assembly lattice')
 
-fuel_box_wall_region = (-right_box_outer_boundary & +left_box_outer_boundary & -front_box_outer_boundary &
-                        +back_box_outer_boundary & -top_box_outer_boundary & +bottom_box_outer_boundary &
-                        ~fuel_box_cell.region & ~fuel_box_air_region)
+            box_universes[assemblies] = mc.Universe(cells=[mc.Cell(fill=fuel_box, region=fuel_box_region),
+                                                           mc.Cell(fill=Al6061, region=fuel_box_wall_region),
+                                                           mc.Cell(fill=air, region=fuel_box_air_region)])
+        return box_universes[assemblies]
 
-fuel_box_wall = mc.Cell(fill=Al6061, region=fuel_box_wall_region)
-fuel_box_wall_1 = mc.Cell(fill=Al6061, region=fuel_box_wall_region)
-fuel_box_wall_2 = mc.Cell(fill=Al6061, region=fuel_box_wall_region)
 
-fuel_box_air = mc.Cell(fill=air, region=fuel_box_air_region)
-fuel_box_air_1 = mc.Cell(fill=air, region=fuel_box_air_region)
-fuel_box_air_2 = mc.Cell(fill=air, region=fuel_box_air_region)
 
-fuel_box_dummy_cell.region = fuel_box_cell.region
-fuel_box_partial_dummy_cell.region = fuel_box_cell.region
+    fuel_box_1_cell = mc.Cell(name='fuel_box_1', fill= box_universe(loading_pattern['fuel_box_1']))
+    fuel_box_2_cell = mc.Cell(name='fuel_box_2', fill= box_universe(loading_pattern['fuel_box_2']))
+    fuel_box_3_cell = mc.Cell(name='fuel_box_3', fill= box_universe(loading_pattern['fuel_box_3']))
+    fuel_box_4_cell = mc.Cell(name='fuel_box_4', fill= box_universe(loading_pattern['fuel_box_4']))
+    fuel_box_5_cell = mc.Cell(name='fuel_box_5', fill= box_universe(loading_pattern['fuel_box_5']))
+    fuel_box_6_cell = mc.Cell(name='fuel_box_6', fill= box_universe(loading_pattern['fuel_box_6']))
 
+    BOX_WIDTH = 15.876
+    BOX_LENGTH = 13.336
+    BOX_HEIGHT = 122.536
 
-box_air = mc.Cell(fill=air, region= (~fuel_box_cell.region & ~fuel_box_wall_region))
-box_air_1 = mc.Cell(fill=air, region= (~fuel_box_cell.region & ~fuel_box_wall_region))
-box_air_2 = mc.Cell(fill=air, region= (~fuel_box_cell.region & ~fuel_box_wall_region))
+    SHROUD_WIDTH = 2.54
+    SHROUD_LENGTH = 90.4
+    SHROUD_HEIGHT = 91.4
 
-fuel_box_universe = mc.Universe(cells=[fuel_box_cell, fuel_box_wall, fuel_box_air])
-dummy_box_universe = mc.Universe(cells=[fuel_box_dummy_cell, fuel_box_wall_1, fuel_box_air_1])
-partial_dummy_box_universe = mc.Universe(cells=[fuel_box_partial_dummy_cell, fuel_box_wall_2, fuel_box_air_2])
+    BOX_Y_SPACING = 30.48
 
+    SHROUD_X_SPACING = (BOX_WIDTH/2) + SHROUD_WIDTH/2
+    SHROUD_Y_SPACING = (SHROUD_LENGTH/2) + BOX_Y_SPACING/2 - 2.22
 
 
-fuel_box_1_cell = mc.Cell(fill= fuel_box_universe)
-fuel_box_2_cell = mc.Cell(fill= fuel_box_universe)
-fuel_box_3_cell = mc.Cell(fill= dummy_box_universe)
-fuel_box_4_cell = mc.Cell(fill= fuel_box_universe)
-fuel_box_5_cell = mc.Cell(fill= fuel_box_universe)
-fuel_box_6_cell = mc.Cell(fill= partial_dummy_box_universe)
+    fuel_box_1_cell.translation = (-BOX_WIDTH - SHROUD_WIDTH, -(BOX_LENGTH/2)-(BOX_Y_SPACING/2), 0)
 
-BOX_WIDTH = 15.876
-BOX_LENGTH = 13.336
-BOX_HEIGHT = 122.536
-'''
-partial_dummy_box_universe.plot(colors=colors, color_by='material', width=(BOX_WIDTH, BOX_LENGTH),
-                       pixels=(1000,1000), basis= 'xy', origin= (0, 0, 0))
-partial_dummy_box_universe.plot(colors=colors, color_by='material', width=(BOX_WIDTH, BOX_HEIGHT),
-                       pixels=(2000,2000), basis= 'xz', origin= (0, 5.67, 0))
-partial_dummy_box_universe.plot(colors=colors, color_by='material', width=(BOX_LENGTH, BOX_HEIGHT),
-                       pixels=(2000,2000), basis= 'yz', origin= (3, 0, 0))
-'''
+    box_1_back = mc.YPlane(y0=- (BOX_LENGTH)-(BOX_Y_SPACING/2))
+    box_1_front = mc.YPlane(y0= -BOX_Y_SPACING/2)
+    box_1_right = mc.XPlane(x0=- BOX_WIDTH/2- SHROUD_WIDTH)
+    box_1_left = mc.XPlane(x0=- BOX_WIDTH/2 - SHROUD_WIDTH - BOX_WIDTH)
 
-SHROUD_WIDTH = 2.54
-SHROUD_LENGTH = 90.4
-SHROUD_HEIGHT = 91.4
+    fuel_box_1_cell.region = (-box_1_right & +box_1_left & -box_1_front &
+                              +box_1_back & -top_box_outer_boundary & +bottom_box_outer_boundary)
 
-BOX_Y_SPACING = 30.48
 
-SHROUD_X_SPACING = (BOX_WIDTH/2) + SHROUD_WIDTH/2
-SHROUD_Y_SPACING = (SHROUD_LENGTH/2) + BOX_Y_SPACING/2 - 2.22
 
 
-fuel_box_1_cell.translation = (-BOX_WIDTH - SHROUD_WIDTH, -(BOX_LENGTH/2)-(BOX_Y_SPACING/2), 0)
+    fuel_box_2_cell.translation = (0, -(BOX_LENGTH/2)-(BOX_Y_SPACING/2), 0)
 
-box_1_back = mc.YPlane(y0=- (BOX_LENGTH)-(BOX_Y_SPACING/2))
-box_1_front = mc.YPlane(y0= -BOX_Y_SPACING/2)
-box_1_right = mc.XPlane(x0=- BOX_WIDTH/2- SHROUD_WIDTH)
-box_1_left = mc.XPlane(x0=- BOX_WIDTH/2 - SHROUD_WIDTH - BOX_WIDTH)
+    box_2_back = box_1_back
+    box_2_front = box_1_front
+    box_2_right = right_box_outer_boundary
+    box_2_left = left_box_outer_boundary
 
-fuel_box_1_cell.region = (-box_1_right & +box_1_left & -box_1_front &
-                          +box_1_back & -top_box_outer_boundary & +bottom_box_outer_boundary)
+    fuel_box_2_cell.region = (-box_2_right & +box_2_left & -box_2_front &
+                              +box_2_back & -top_box_outer_boundary & +bottom_box_outer_boundary)
 
 
 
 
-fuel_box_2_cell.translation = (0, -(BOX_LENGTH/2)-(BOX_Y_SPACING/2), 0)
+    fuel_box_3_cell.translation = (BOX_WIDTH + SHROUD_WIDTH, -(BOX_LENGTH/2)-(BOX_Y_SPACING/2), 0)
 
-box_2_back = box_1_back
-box_2_front = box_1_front
-box_2_right = right_box_outer_boundary
-box_2_left = left_box_outer_boundary
+    box_3_back = box_1_back
+    box_3_front = box_1_front
+    box_3_right = mc.XPlane(x0= BOX_WIDTH/2 + SHROUD_WIDTH + BOX_WIDTH)
+    box_3_left = mc.XPlane(x0= BOX_WIDTH/2 + SHROUD_WIDTH)
 
-fuel_box_2_cell.region = (-box_2_right & +box_2_left & -box_2_front &
-                          +box_2_back & -top_box_outer_boundary & +bottom_box_outer_boundary)
+    fuel_box_3_cell.region = (-box_3_right & +box_3_left & -box_3_front &
+                              +box_3_back & -top_box_outer_boundary & +bottom_box_outer_boundary)
 
 
 
 
-fuel_box_3_cell.translation = (BOX_WIDTH + SHROUD_WIDTH, -(BOX_LENGTH/2)-(BOX_Y_SPACING/2), 0)
+    fuel_box_4_cell.translation = (-BOX_WIDTH - SHROUD_WIDTH, (BOX_LENGTH/2)+(BOX_Y_SPACING/2), 0)
 
-box_3_back = box_1_back
-box_3_front = box_1_front
-box_3_right = mc.XPlane(x0= BOX_WIDTH/2 + SHROUD_WIDTH + BOX_WIDTH)
-box_3_left = mc.XPlane(x0= BOX_WIDTH/2 + SHROUD_WIDTH)
+    box_4_back = mc.YPlane(y0= BOX_Y_SPACING/2)
+    box_4_front = mc.YPlane(y0= 28.576)
+    box_4_right = box_1_right
+    box_4_left = box_1_left
 
-fuel_box_3_cell.region = (-box_3_right & +box_3_left & -box_3_front &
-                          +box_3_back & -top_box_outer_boundary & +bottom_box_outer_boundary)
+    fuel_box_4_cell.region = (-box_4_right & +box_4_left & -box_4_front &
+                              +box_4_back & -top_box_outer_boundary & +bottom_box_outer_boundary)
 
 
 
 
-fuel_box_4_cell.translation = (-BOX_WIDTH - SHROUD_WIDTH, (BOX_LENGTH/2)+(BOX_Y_SPACING/2), 0)
+    fuel_box_5_cell.translation = (0, (BOX_LENGTH/2)+(BOX_Y_SPACING/2), 0)
 
-box_4_back = mc.YPlane(y0= BOX_Y_SPACING/2)
-box_4_front = mc.YPlane(y0= 28.576)
-box_4_right = box_1_right
-box_4_left = box_1_left
+    box_5_back = box_4_back
+    box_5_front = box_4_front
+    box_5_right = box_2_right
+    box_5_left = box_2_left
 
-fuel_box_4_cell.region = (-box_4_right & +box_4_left & -box_4_front &
-                          +box_4_back & -top_box_outer_boundary & +bottom_box_outer_boundary)
+    fuel_box_5_cell.region = (-box_5_right & +box_5_left & -box_5_front &
+                              +box_5_back & -top_box_outer_boundary & +bottom_box_outer_boundary)
 
 
 
 
-fuel_box_5_cell.translation = (0, (BOX_LENGTH/2)+(BOX_Y_SPACING/2), 0)
+    fuel_box_6_cell.translation = (BOX_WIDTH + SHROUD_WIDTH, (BOX_LENGTH/2)+(BOX_Y_SPACING/2), 0)
 
-box_5_back = box_4_back
-box_5_front = box_4_front
-box_5_right = box_2_right
-box_5_left = box_2_left
+    box_6_back = box_4_back
+    box_6_front = box_4_front
+    box_6_right = box_3_right
+    box_6_left = box_3_left
 
-fuel_box_5_cell.region = (-box_5_right & +box_5_left & -box_5_front &
-                          +box_5_back & -top_box_outer_boundary & +bottom_box_outer_boundary)
+    fuel_box_6_cell.region = (-box_6_right & +box_6_left & -box_6_front & +box_6_back
+                               & -top_box_outer_boundary & +bottom_box_outer_boundary)
 
 
 
 
-fuel_box_6_cell.translation = (BOX_WIDTH + SHROUD_WIDTH, (BOX_LENGTH/2)+(BOX_Y_SPACING/2), 0)
 
-box_6_back = box_4_back
-box_6_front = box_4_front
-box_6_right = box_3_right
-box_6_left = box_3_left
+    #####################################################################################
+    #                                 CONTROL BLADES                                    #
+    #####################################################################################
 
-fuel_box_6_cell.region = (-box_6_right & +box_6_left & -box_6_front & +box_6_back
-                           & -top_box_outer_boundary & +bottom_box_outer_boundary)
+    SHROUD_THICKNESS = (2.54-1.9)/2
+    SHROUD_X_INNER = 1.9
+    INCLINE_SLOPE = (34.3-10.8)/61.9
+    DECLINED_SLOPE = (27.9-34.3)/12.7
+    BLADE_THICKNESS = 0.259
+    Cd_THICKNESS = 0.102
 
+    shroud_inner_top = mc.ZPlane(z0=SHROUD_HEIGHT/2 - SHROUD_THICKNESS)
+    shroud_inner_bottom = mc.ZPlane(z0=-SHROUD_HEIGHT/2 + SHROUD_THICKNESS)
+    shroud_inner_front = mc.YPlane(y0=SHROUD_LENGTH/2 - SHROUD_THICKNESS)
+    shroud_inner_back = mc.YPlane(y0=-SHROUD_LENGTH/2 + SHROUD_THICKNESS)
+    shroud_inner_right = mc.XPlane(x0=SHROUD_X_INNER/2)
+    shroud_inner_left = mc.XPlane(x0=-SHROUD_X_INNER/2)
 
+    shroud_outer_top = mc.ZPlane(z0=SHROUD_HEIGHT/2)
+    shroud_outer_bottom = mc.ZPlane(z0=-SHROUD_HEIGHT/2)
+    shroud_outer_front = mc.YPlane(y0=SHROUD_LENGTH/2)
+    shroud_outer_back = mc.YPlane(y0=-SHROUD_LENGTH/2)
+    shroud_outer_right = mc.XPlane(x0=SHROUD_X_INNER/2 + SHROUD_THICKNESS)
+    shroud_outer_left = mc.XPlane(x0=-SHROUD_X_INNER/2 - SHROUD_THICKNESS)
 
+    shroud_inner_region = (-shroud_inner_top & +shroud_inner_bottom & -shroud_inner_front &
+                           +shroud_inner_back & -shroud_inner_right & +shroud_inner_left)
 
+    shroud_outer_region = (-shroud_outer_top & +shroud_outer_bottom & -shroud_outer_front &
+                           +shroud_outer_back & -shroud_outer_right & +shroud_outer_left)
 
-#####################################################################################
-#                                 CONTROL BLADES                                    #
-#####################################################################################
+    shroud_region = shroud_outer_region & ~ shroud_inner_region
 
-SHROUD_THICKNESS = (2.54-1.9)/2
-SHROUD_X_INNER = 1.9
-INCLINE_SLOPE = (34.3-10.8)/61.9
-DECLINED_SLOPE = (27.9-34.3)/12.7
-BLADE_THICKNESS = 0.259
-Cd_THICKNESS = 0.102
+    shroud_cell = mc.Cell(fill=magnesium, region= shroud_region)
+    shroud_universe = mc.Universe(cells= [shroud_cell])
 
-shroud_inner_top = mc.ZPlane(z0=SHROUD_HEIGHT/2 - SHROUD_THICKNESS)
-shroud_inner_bottom = mc.ZPlane(z0=-SHROUD_HEIGHT/2 + SHROUD_THICKNESS)
-shroud_inner_front = mc.YPlane(y0=SHROUD_LENGTH/2 - SHROUD_THICKNESS)
-shroud_inner_back = mc.YPlane(y0=-SHROUD_LENGTH/2 + SHROUD_THICKNESS)
-shroud_inner_right = mc.XPlane(x0=SHROUD_X_INNER/2)
-shroud_inner_left = mc.XPlane(x0=-SHROUD_X_INNER/2)
+    shroud_cell_1 = mc.Cell(fill= shroud_universe, region= shroud_region)
+    shroud_cell_2 = mc.Cell(fill= shroud_universe, region= shroud_region)
+    shroud_cell_3 = mc.Cell(fill= shroud_universe, region= shroud_region)
+    shroud_cell_4 = mc.Cell(fill= shroud_universe, region= shroud_region)
 
-shroud_outer_top = mc.ZPlane(z0=SHROUD_HEIGHT/2)
-shroud_outer_bottom = mc.ZPlane(z0=-SHROUD_HEIGHT/2)
-shroud_outer_front = mc.YPlane(y0=SHROUD_LENGTH/2)
-shroud_outer_back = mc.YPlane(y0=-SHROUD_LENGTH/2)
-shroud_outer_right = mc.XPlane(x0=SHROUD_X_INNER/2 + SHROUD_THICKNESS)
-shroud_outer_left = mc.XPlane(x0=-SHROUD_X_INNER/2 - SHROUD_THICKNESS)
 
-shroud_inner_region = (-shroud_inner_top & +shroud_inner_bottom & -shroud_inner_front &
-                       +shroud_inner_back & -shroud_inner_right & +shroud_inner_left)
 
-shroud_outer_region = (-shroud_outer_top & +shroud_outer_bottom & -shroud_outer_front &
-                       +shroud_outer_back & -shroud_outer_right & +shroud_outer_left)
+    # y and z surfaces are mutual for the whole blade, so both aluminum and cadmium share the same surfaces
+    blade_inclination = mc.Plane(a=0, b=-INCLINE_SLOPE, c=1, d=5.4)
+    blade_declination = mc.Plane(a=0, b= -DECLINED_SLOPE, c= 1, d= 76319/1270)
+    safety_blade_mid_interception = mc.YPlane(y0=61.9)
+    regulating_blade_mid_interception = mc.YPlane(y0= 61.9 + 12.7 - 4.57)
+    blade_bottom = mc.ZPlane(z0=-10.8/2)
+    blade_front = mc.YPlane(y0= 61.9+12.7)
+    blade_back = mc.YPlane(y0= 0)
 
-shroud_region = shroud_outer_region & ~ shroud_inner_region
+    # x surfaces are where the distinction happen between Cadmium and Aluminum
+    aluminum_outer_right = mc.XPlane(x0= BLADE_THICKNESS/2)
+    aluminum_outer_left = mc.XPlane(x0= -BLADE_THICKNESS/2)
+    aluminum_inner_right = mc.XPlane(x0= +Cd_THICKNESS/2)
+    aluminum_inner_left = mc.XPlane(x0= -Cd_THICKNESS/2)
+    test_upper = mc.ZPlane(z0= 35)
 
-shroud_cell = mc.Cell(fill=magnesium, region= shroud_region)
-shroud_universe = mc.Universe(cells= [shroud_cell])
+    blade_region = (-blade_inclination & -blade_declination & + blade_bottom & + blade_back & -blade_front &
+                        + aluminum_outer_left & -aluminum_outer_right)
 
-shroud_cell_1 = mc.Cell(fill= shroud_universe, region= shroud_region)
-shroud_cell_2 = mc.Cell(fill= shroud_universe, region= shroud_region)
-shroud_cell_3 = mc.Cell(fill= shroud_universe, region= shroud_region)
-shroud_cell_4 = mc.Cell(fill= shroud_universe, region= shroud_region)
+    safety_cadmium_region = (+safety_blade_mid_interception & -blade_front & -blade_declination &
+                             +blade_bottom & -aluminum_inner_right & +aluminum_inner_left)
 
+    regulating_cadmium_region = (+regulating_blade_mid_interception & -blade_front & -blade_declination &
+                             +blade_bottom & -aluminum_inner_right & +aluminum_inner_left)
 
+    safety_aluminum_blade_cell = mc.Cell(fill=Al6061, region= blade_region & ~safety_cadmium_region)
 
-# y and z surfaces are mutual for the whole blade, so both aluminum and cadmium share the same surfaces
-blade_inclination = mc.Plane(a=0, b=-INCLINE_SLOPE, c=1, d=5.4)
-blade_declination = mc.Plane(a=0, b= -DECLINED_SLOPE, c= 1, d= 76319/1270)
-safety_blade_mid_interception = mc.YPlane(y0=61.9)
-regulating_blade_mid_interception = mc.YPlane(y0= 61.9 + 12.7 - 4.57)
-blade_bottom = mc.ZPlane(z0=-10.8/2)
-blade_front = mc.YPlane(y0= 61.9+12.7)
-blade_back = mc.YPlane(y0= 0)
+    safety_cadmium_blade_cell = mc.Cell(fill=cadmium, region= safety_cadmium_region)
 
-# x surfaces are where the distinction happen between Cadmium and Aluminum
-aluminum_outer_right = mc.XPlane(x0= BLADE_THICKNESS/2)
-aluminum_outer_left = mc.XPlane(x0= -BLADE_THICKNESS/2)
-aluminum_inner_right = mc.XPlane(x0= +Cd_THICKNESS/2)
-aluminum_inner_left = mc.XPlane(x0= -Cd_THICKNESS/2)
-test_upper = mc.ZPlane(z0= 35)
 
-blade_region = (-blade_inclination & -blade_declination & + blade_bottom & + blade_back & -blade_front &
-                    + aluminum_outer_left & -aluminum_outer_right)
+    regulating_aluminum_blade_cell = mc.Cell(fill=Al6061, region= blade_region & ~regulating_cadmium_region)
 
-safety_cadmium_region = (+safety_blade_mid_interception & -blade_front & -blade_declination &
-                         +blade_bottom & -aluminum_inner_right & +aluminum_inner_left)
+    regulating_cadmium_blade_cell = mc.Cell(fill=cadmium, region= regulating_cadmium_region)
 
-regulating_cadmium_region = (+regulating_blade_mid_interception & -blade_front & -blade_declination &
-                         +blade_bottom & -aluminum_inner_right & +aluminum_inner_left)
 
-safety_aluminum_blade_cell = mc.Cell(fill=Al6061, region= blade_region & ~safety_cadmium_region)
 
-safety_cadmium_blade_cell = mc.Cell(fill=cadmium, region= safety_cadmium_region)
+    safety_blade_universe = mc.Universe(cells=[safety_aluminum_blade_cell, safety_cadmium_blade_cell])
 
+    regulating_blade_universe = mc.Universe(cells=[regulating_aluminum_blade_cell, regulating_cadmium_blade_cell])
 
-regulating_aluminum_blade_cell = mc.Cell(fill=Al6061, region= blade_region & ~regulating_cadmium_region)
 
-regulating_cadmium_blade_cell = mc.Cell(fill=cadmium, region= regulating_cadmium_region)
+    '''
+    now we have to create three cells for each of the safety blades, the reason for creating them like this is that we
+    have to have the ability to apply methods on the specific cell to withdraw it, as it is with draw in vertical rotation
+    '''
+    safety_blade_1_temporary_cell = mc.Cell(fill= safety_blade_universe, region= blade_region)
+    safety_blade_2_temporary_cell = mc.Cell(fill= safety_blade_universe, region= blade_region)
+    safety_blade_3_temporary_cell = mc.Cell(fill= safety_blade_universe, region= blade_region)
+    regulating_blade_temporary_cell = mc.Cell(fill= regulating_blade_universe, region= blade_region)
 
+    '''
+    now we need to apply translation to each cell to make the center of the cell the origin of 
+    rotation, then apply rotation, then add them to a universe then to their individual final cell 
+    '''
 
 
-safety_blade_universe = mc.Universe(cells=[safety_aluminum_blade_cell, safety_cadmium_blade_cell])
 
-regulating_blade_universe = mc.Universe(cells=[regulating_aluminum_blade_cell, regulating_cadmium_blade_cell])
+    safety_blade_1_universe = mc.Universe(cells=[safety_blade_1_temporary_cell, mc.Cell(fill=air, region=~blade_region)])
+    safety_blade_1_rotation_cell = mc.Cell(name='safety_blade_1_rotation', fill= safety_blade_1_universe)
 
+    safety_blade_2_universe = mc.Universe(cells=[safety_blade_2_temporary_cell, mc.Cell(fill=air, region=~blade_region)])
+    safety_blade_2_rotation_cell = mc.Cell(name='safety_blade_2_rotation', fill= safety_blade_2_universe)
 
-'''
-now we have to create three cells for each of the safety blades, the reason for creating them like this is that we
-have to have the ability to apply methods on the specific cell to withdraw it, as it is with draw in vertical rotation
-'''
-safety_blade_1_temporary_cell = mc.Cell(fill= safety_blade_universe, region= blade_region)
-safety_blade_2_temporary_cell = mc.Cell(fill= safety_blade_universe, region= blade_region)
-safety_blade_3_temporary_cell = mc.Cell(fill= safety_blade_universe, region= blade_region)
-regulating_blade_temporary_cell = mc.Cell(fill= regulating_blade_universe, region= blade_region)
+    safety_blade_3_universe = mc.Universe(cells=[safety_blade_3_temporary_cell, mc.Cell(fill=air, region=~blade_region)])
+    safety_blade_3_rotation_cell = mc.Cell(name='safety_blade_3_rotation', fill= safety_blade_3_universe)
 
-'''
-now we need to apply translation to each cell to make the center of the cell the origin of 
-rotation, then apply rotation, then add them to a universe then to their individual final cell 
-'''
+    regulating_blade_universe = mc.Universe(cells=[regulating_blade_temporary_cell, mc.Cell(fill=air, region=~blade_region)])
+    regulating_blade_rotation_cell = mc.Cell(name='regulating_blade_rotation', fill= regulating_blade_universe)
 
 
 
-safety_blade_1_universe = mc.Universe(cells=[safety_blade_1_temporary_cell, mc.Cell(fill=air, region=~blade_region)])
-safety_blade_1_rotation_cell = mc.Cell(fill= safety_blade_1_universe)
+    #######################################################################################################################################################
+    #######################################################################################################################################################
 
-safety_blade_2_universe = mc.Universe(cells=[safety_blade_2_temporary_cell, mc.Cell(fill=air, region=~blade_region)])
-safety_blade_2_rotation_cell = mc.Cell(fill= safety_blade_2_universe)
+    # BLADE INSERTION AND WITHDRAWAL: positions are given in console units (0-1000) and converted to 0-45 degrees by blade_rotation(),
+    # by default the blades sit at the critical position of May 2025, see CRITICAL_BLADE_POSITIONS at the top of this file
 
-safety_blade_3_universe = mc.Universe(cells=[safety_blade_3_temporary_cell, mc.Cell(fill=air, region=~blade_region)])
-safety_blade_3_rotation_cell = mc.Cell(fill= safety_blade_3_universe)
+    ######################################################################################################################################################
+                                                                                                          ############################################
+    safety_blade_1_rotation_cell.rotation =   blade_rotation(blade_positions['safety_blade_1'])           ############################################
+                                                                                                          ############################################
+    safety_blade_2_rotation_cell.rotation =   blade_rotation(blade_positions['safety_blade_2'])           ############################################
+                                                                                                          ############################################
+    safety_blade_3_rotation_cell.rotation =   blade_rotation(blade_positions['safety_blade_3'])           ############################################
+                                                                                                          ############################################
+                                                                                                          ############################################
+    regulating_blade_rotation_cell.rotation = blade_rotation(blade_positions['regulating_blade'])         ############################################
+                                                                                                          ############################################
+    ######################################################################################################################################################
+    ######################################################################################################################################################
+    ######################################################################################################################################################
 
-regulating_blade_universe = mc.Universe(cells=[regulating_blade_temporary_cell, mc.Cell(fill=air, region=~blade_region)])
-regulating_blade_rotation_cell = mc.Cell(fill= regulating_blade_universe)
 
 
-
-#######################################################################################################################################################
-#######################################################################################################################################################
-
-# BLADE INSERTION AND WITHDRAWAL: Blades rotate between 0 and 45 degrees, but in the control room, it is normalized out of 1000, 1000 being fully withdrawn which corresponds to 45 degrees, and 0 being fully inserted corresponding to 0 degrees
-
-# The critical position of UFTR in May 2025 ====> Safety Blades 1,2,3 = 570 ---- Regulating Blade = 320
-# PS: It is the same position as the fresh core, as the new fuel plates added as much reactivity as that which was burnt
-
-######################################################################################################################################################
-                                                                  ####################################################################################
-safety_blade_1_rotation_cell.rotation =   (570/(200/9),0,0)       ####################################################################################
-                                                                  ####################################################################################
-safety_blade_2_rotation_cell.rotation =   (570/(200/9),0,0)       ####################################################################################
-                                                                  ####################################################################################
-safety_blade_3_rotation_cell.rotation =   (570/(200/9),0,0)       ####################################################################################
-                                                                  ####################################################################################
-                                                                  ####################################################################################
-regulating_blade_rotation_cell.rotation = (320/(200/9),0,0)       ####################################################################################
-                                                                  ####################################################################################
-######################################################################################################################################################
-######################################################################################################################################################
-######################################################################################################################################################
+    safety_blade_1_rotation_cell.translation = (0,-34.8, -27.9)
+    safety_blade_2_rotation_cell.translation = (0,-34.8, -27.9)
+    safety_blade_3_rotation_cell.translation = (0,-34.8, -27.9)
+    regulating_blade_rotation_cell.translation = (0,-34.8, -27.9)
 
 
 
-safety_blade_1_rotation_cell.translation = (0,-34.8, -27.9)
-safety_blade_2_rotation_cell.translation = (0,-34.8, -27.9)
-safety_blade_3_rotation_cell.translation = (0,-34.8, -27.9)
-regulating_blade_rotation_cell.translation = (0,-34.8, -27.9)
 
+    safety_blade_1_rotation_cell.region = shroud_inner_region
 
+    safety_blade_1_universe = mc.Universe(cells=[shroud_cell_1, safety_blade_1_rotation_cell])
+    safety_blade_1_cell = mc.Cell(fill=safety_blade_1_universe)
 
+    safety_blade_1_cell.translation = (SHROUD_X_SPACING, -SHROUD_Y_SPACING, 25.568)
 
-safety_blade_1_rotation_cell.region = shroud_inner_region
+    blade_1_back = mc.YPlane(y0= (-BOX_Y_SPACING/2)+2.22-SHROUD_LENGTH)
+    blade_1_front = mc.YPlane(y0= (-BOX_Y_SPACING/2)+2.22)
+    blade_1_bottom = mc.ZPlane(z0= -20.132)
+    blade_1_top = mc.ZPlane(z0= 71.268)
+    blade_1_right = box_2_right
+    blade_1_left = box_3_left
 
-safety_blade_1_universe = mc.Universe(cells=[shroud_cell_1, safety_blade_1_rotation_cell])
-safety_blade_1_cell = mc.Cell(fill=safety_blade_1_universe)
 
-safety_blade_1_cell.translation = (SHROUD_X_SPACING, -SHROUD_Y_SPACING, 25.568)
+    safety_blade_1_cell.region = (+blade_1_right & - blade_1_left & +blade_1_back &
+                                  -blade_1_front & - blade_1_top & + blade_1_bottom)
 
-blade_1_back = mc.YPlane(y0= (-BOX_Y_SPACING/2)+2.22-SHROUD_LENGTH)
-blade_1_front = mc.YPlane(y0= (-BOX_Y_SPACING/2)+2.22)
-blade_1_bottom = mc.ZPlane(z0= -20.132)
-blade_1_top = mc.ZPlane(z0= 71.268)
-blade_1_right = box_2_right
-blade_1_left = box_3_left
 
 
-safety_blade_1_cell.region = (+blade_1_right & - blade_1_left & +blade_1_back &
-                              -blade_1_front & - blade_1_top & + blade_1_bottom)
 
+    safety_blade_2_rotation_cell.region = shroud_inner_region
 
+    safety_blade_2_universe = mc.Universe(cells=[shroud_cell_2, safety_blade_2_rotation_cell])
+    safety_blade_2_cell = mc.Cell(fill=safety_blade_2_universe)
 
+    safety_blade_2_cell.translation = (-SHROUD_X_SPACING, -SHROUD_Y_SPACING, 25.568)
 
-safety_blade_2_rotation_cell.region = shroud_inner_region
+    blade_2_back = blade_1_back
+    blade_2_front = blade_1_front
+    blade_2_bottom = blade_1_bottom
+    blade_2_top = blade_1_top
+    blade_2_right = box_1_right
+    blade_2_left = box_2_left
 
-safety_blade_2_universe = mc.Universe(cells=[shroud_cell_2, safety_blade_2_rotation_cell])
-safety_blade_2_cell = mc.Cell(fill=safety_blade_2_universe)
+    safety_blade_2_cell.region = (+blade_2_right & -blade_2_left & +blade_2_back &
+                                  -blade_2_front & - blade_2_top & + blade_2_bottom)
 
-safety_blade_2_cell.translation = (-SHROUD_X_SPACING, -SHROUD_Y_SPACING, 25.568)
 
-blade_2_back = blade_1_back
-blade_2_front = blade_1_front
-blade_2_bottom = blade_1_bottom
-blade_2_top = blade_1_top
-blade_2_right = box_1_right
-blade_2_left = box_2_left
 
-safety_blade_2_cell.region = (+blade_2_right & -blade_2_left & +blade_2_back &
-                              -blade_2_front & - blade_2_top & + blade_2_bottom)
 
+    safety_blade_3_rotation_cell.region = shroud_inner_region
 
+    safety_blade_3_universe = mc.Universe(cells=[shroud_cell_3, safety_blade_3_rotation_cell])
+    safety_blade_3_cell = mc.Cell(fill=safety_blade_3_universe)
 
+    safety_blade_3_cell.rotation = (0,0,180)
+    safety_blade_3_cell.translation = (-SHROUD_X_SPACING, SHROUD_Y_SPACING, 25.568)
 
-safety_blade_3_rotation_cell.region = shroud_inner_region
+    blade_3_back = mc.YPlane(y0= (BOX_Y_SPACING/2)-2.22+SHROUD_LENGTH)
+    blade_3_front = mc.YPlane(y0= (BOX_Y_SPACING/2)-2.22)
+    blade_3_bottom = blade_1_bottom
+    blade_3_top = blade_1_top
+    blade_3_right = box_5_left
+    blade_3_left = box_4_right
 
-safety_blade_3_universe = mc.Universe(cells=[shroud_cell_3, safety_blade_3_rotation_cell])
-safety_blade_3_cell = mc.Cell(fill=safety_blade_3_universe)
+    safety_blade_3_cell.region = (-blade_3_back & +blade_3_front & + blade_3_bottom &
+                                  - blade_3_top & -blade_3_right & +blade_3_left)
 
-safety_blade_3_cell.rotation = (0,0,180)
-safety_blade_3_cell.translation = (-SHROUD_X_SPACING, SHROUD_Y_SPACING, 25.568)
 
-blade_3_back = mc.YPlane(y0= (BOX_Y_SPACING/2)-2.22+SHROUD_LENGTH)
-blade_3_front = mc.YPlane(y0= (BOX_Y_SPACING/2)-2.22)
-blade_3_bottom = blade_1_bottom
-blade_3_top = blade_1_top
-blade_3_right = box_5_left
-blade_3_left = box_4_right
 
-safety_blade_3_cell.region = (-blade_3_back & +blade_3_front & + blade_3_bottom &
-                              - blade_3_top & -blade_3_right & +blade_3_left)
+    regulating_blade_rotation_cell.region = shroud_inner_region
 
+    regulating_blade_universe = mc.Universe(cells=[shroud_cell_4, regulating_blade_rotation_cell])
+    regulating_blade_cell = mc.Cell(fill=regulating_blade_universe)
 
+    regulating_blade_cell.rotation = (0,0,180)
+    regulating_blade_cell.translation = (SHROUD_X_SPACING, SHROUD_Y_SPACING, 25.568)
 
-regulating_blade_rotation_cell.region = shroud_inner_region
 
-regulating_blade_universe = mc.Universe(cells=[shroud_cell_4, regulating_blade_rotation_cell])
-regulating_blade_cell = mc.Cell(fill=regulating_blade_universe)
 
-regulating_blade_cell.rotation = (0,0,180)
-regulating_blade_cell.translation = (SHROUD_X_SPACING, SHROUD_Y_SPACING, 25.568)
-
-
-
-regulating_blade_back = blade_3_back
-regulating_blade_front = blade_3_front
-regulating_blade_bottom = blade_1_bottom
-regulating_blade_top = blade_1_top
-regulating_blade_right = box_6_left
-regulating_blade_left = box_5_right
-
-regulating_blade_cell.region = (-regulating_blade_back & +regulating_blade_front & + regulating_blade_bottom
-                                & -regulating_blade_top & -regulating_blade_right & +regulating_blade_left)
-'''
-safety_blade_1_cell.plot(width=(90.4, 91.4), basis='yz', pixels=(700,700),
-                         colors=colors, color_by='material')
-
-safety_blade_1_cell.plot(basis='xz', width=(2.54, 2.54), origin= (9.205,-30,35),
-                         pixels=(700,700), colors=colors, color_by='material')
-'''
+    regulating_blade_back = blade_3_back
+    regulating_blade_front = blade_3_front
+    regulating_blade_bottom = blade_1_bottom
+    regulating_blade_top = blade_1_top
+    regulating_blade_right = box_6_left
+    regulating_blade_left = box_5_right
 
-CORE_HEIGHT = 5 * 30.48
-CORE_LENGTH = 5 * 30.48
-CORE_WIDTH = 5 * 30.48
+    regulating_blade_cell.region = (-regulating_blade_back & +regulating_blade_front & + regulating_blade_bottom
+                                    & -regulating_blade_top & -regulating_blade_right & +regulating_blade_left)
+    '''
+    safety_blade_1_cell.plot(width=(90.4, 91.4), basis='yz', pixels=(700,700),
+                             colors=colors, color_by='material')
 
-core_left = mc.XPlane(x0=-CORE_WIDTH / 2)
-core_right = mc.XPlane(x0=264.16 - (CORE_WIDTH / 2))
-core_back = mc.YPlane(y0=-CORE_LENGTH / 2)
-core_front = mc.YPlane(y0=CORE_LENGTH / 2)
-core_bottom = bottom_box_outer_boundary
-core_top = top_box_outer_boundary
+    safety_blade_1_cell.plot(basis='xz', width=(2.54, 2.54), origin= (9.205,-30,35),
+                             pixels=(700,700), colors=colors, color_by='material')
+    '''
 
-thermal_column_cylinder_1 = mc.XCylinder(y0=0, z0=0, r=10)
-thermal_column_cylinder_2 = mc.XCylinder(y0=35, z0=0, r=5)
-thermal_column_cylinder_3 = mc.XCylinder(y0=-35, z0=0, r=5)
-thermal_column_right = mc.XPlane(x0=(BOX_Y_SPACING * (37 / 6)))
-thermal_column_left = mc.XPlane(x0=CORE_WIDTH / 2)
+    CORE_HEIGHT = 5 * 30.48
+    CORE_LENGTH = 5 * 30.48
+    CORE_WIDTH = 5 * 30.48
 
-thermal_column_cell_1 = mc.Cell(fill=air, region=(-thermal_column_cylinder_1 &
-                                                  -thermal_column_right & +thermal_column_left))
+    core_left = mc.XPlane(x0=-CORE_WIDTH / 2)
+    core_right = mc.XPlane(x0=264.16 - (CORE_WIDTH / 2))
+    core_back = mc.YPlane(y0=-CORE_LENGTH / 2)
+    core_front = mc.YPlane(y0=CORE_LENGTH / 2)
+    core_bottom = bottom_box_outer_boundary
+    core_top = top_box_outer_boundary
 
-core_region = (+core_left & -core_right & +core_back & -core_front & +core_bottom & -core_top &
-               ~thermal_column_cell_1.region)
+    thermal_column_cylinder_1 = mc.XCylinder(y0=0, z0=0, r=10)
+    thermal_column_cylinder_2 = mc.XCylinder(y0=35, z0=0, r=5)
+    thermal_column_cylinder_3 = mc.XCylinder(y0=-35, z0=0, r=5)
+    thermal_column_right = mc.XPlane(x0=(BOX_Y_SPACING * (37 / 6)))
+    thermal_column_left = mc.XPlane(x0=CORE_WIDTH / 2)
 
-north_air_left = core_left
-north_air_right = mc.XPlane(x0=CORE_WIDTH / 2)
-north_air_back = core_front
-north_air_front = mc.YPlane(y0=(CORE_LENGTH / 2) + 20.32)
-north_air_bottom = core_bottom
-north_air_top = core_top
+    thermal_column_cell_1 = mc.Cell(fill=air, region=(-thermal_column_cylinder_1 &
+                                                      -thermal_column_right & +thermal_column_left))
 
-north_air_region = (+north_air_left & -north_air_right & +north_air_back & -north_air_front &
-                    +north_air_bottom & -north_air_top & ~safety_blade_3_cell.region & ~regulating_blade_cell.region)
+    core_region = (+core_left & -core_right & +core_back & -core_front & +core_bottom & -core_top &
+                   ~thermal_column_cell_1.region)
 
-south_air_left = core_left
-south_air_right = north_air_right
-south_air_back = mc.YPlane(y0=-(CORE_LENGTH / 2) - 20.32)
-south_air_front = core_back
-south_air_bottom = core_bottom
-south_air_top = core_top
+    north_air_left = core_left
+    north_air_right = mc.XPlane(x0=CORE_WIDTH / 2)
+    north_air_back = core_front
+    north_air_front = mc.YPlane(y0=(CORE_LENGTH / 2) + 20.32)
+    north_air_bottom = core_bottom
+    north_air_top = core_top
 
-south_air_region = (+south_air_left & -south_air_right & +south_air_back & -south_air_front &
-                    +south_air_bottom & -south_air_top & ~safety_blade_1_cell.region & ~safety_blade_2_cell.region)
+    north_air_region = (+north_air_left & -north_air_right & +north_air_back & -north_air_front &
+                        +north_air_bottom & -north_air_top & ~safety_blade_3_cell.region & ~regulating_blade_cell.region)
 
-core_air_cell = mc.Cell(fill=air, region=north_air_region | south_air_region)
+    south_air_left = core_left
+    south_air_right = north_air_right
+    south_air_back = mc.YPlane(y0=-(CORE_LENGTH / 2) - 20.32)
+    south_air_front = core_back
+    south_air_bottom = core_bottom
+    south_air_top = core_top
+
+    south_air_region = (+south_air_left & -south_air_right & +south_air_back & -south_air_front &
+                        +south_air_bottom & -south_air_top & ~safety_blade_1_cell.region & ~safety_blade_2_cell.region)
+
+    core_air_cell = mc.Cell(fill=air, region=north_air_region | south_air_region)
+
+    central_vertical_port_cylinder = mc.ZCylinder(x0=0, y0=0, r=3)
+    west_vertical_port_cylinder = mc.ZCylinder(x0=-20, y0=0, r=3)
+    east_vertical_port_cylinder = mc.ZCylinder(x0=20, y0=0, r=3)
+    vertical_port_top = mc.ZPlane(z0=60.95 + 0.318 + 25.4 + 152.4)
+    vertical_port_bottom = mc.ZPlane(z0=50)
+
+    central_vertical_port_cell = mc.Cell(fill=air, region=(-central_vertical_port_cylinder &
+                                                           -vertical_port_top & +vertical_port_bottom))
+
+    west_vertical_port_cell = mc.Cell(fill=air, region=(-west_vertical_port_cylinder &
+                                                        -vertical_port_top & +vertical_port_bottom))
+    east_vertical_port_cell = mc.Cell(fill=air, region=(-east_vertical_port_cylinder &
+                                                        -vertical_port_top & +vertical_port_bottom))
+
+    rabit_tube_cylinder = mc.XCylinder(y0=0, z0=0, r=3)
+    rabit_tube_right = mc.XPlane(x0=11)
+    rabit_tube_left = mc.XPlane(x0=-(BOX_Y_SPACING * 7.5) - 101.6)
+
+    rabit_tube_cell = mc.Cell(fill=air, region=-rabit_tube_cylinder & -rabit_tube_right & +rabit_tube_left)
+
+    graphite_cell_1 = mc.Cell(fill=graphite, region=(core_region & ~fuel_box_1_cell.region & ~fuel_box_2_cell.region &
+                                                     ~fuel_box_3_cell.region & ~fuel_box_4_cell.region &
+                                                     ~fuel_box_5_cell.region & ~fuel_box_6_cell.region &
+                                                     ~safety_blade_1_cell.region & ~safety_blade_2_cell.region &
+                                                     ~safety_blade_3_cell.region & ~regulating_blade_cell.region &
+                                                     ~thermal_column_cell_1.region & ~rabit_tube_cell.region &
+                                                     ~west_vertical_port_cell.region &
+                                                     ~east_vertical_port_cell.region &
+                                                     ~central_vertical_port_cell.region))
+
+    extra_graphite_left = mc.XPlane(x0=-BOX_Y_SPACING * (4 / 3))
+    extra_graphite_right = mc.XPlane(x0=BOX_Y_SPACING * (4 / 3))
+    extra_graphite_back = mc.YPlane(y0=-BOX_Y_SPACING * (4 / 3))
+    extra_graphite_front = mc.YPlane(y0=BOX_Y_SPACING * (4 / 3))
+    extra_graphite_bottom = core_top
+    extra_graphite_top = mc.ZPlane(z0=60.95 + 20.32)
+
+    graphite_cell_2 = mc.Cell(fill=graphite, region=(+extra_graphite_left & -extra_graphite_right &
+                                                     +extra_graphite_back & -extra_graphite_front &
+                                                     +extra_graphite_bottom & -extra_graphite_top &
+                                                     ~thermal_column_cell_1.region & ~rabit_tube_cell.region &
+                                                     ~west_vertical_port_cell.region & ~east_vertical_port_cell.region &
+                                                     ~central_vertical_port_cell.region & ~safety_blade_1_cell.region &
+                                                     ~safety_blade_2_cell.region & ~safety_blade_3_cell.region &
+                                                     ~regulating_blade_cell.region))
+
+    water_tank_right = core_left
+    water_tank_left = mc.XPlane(x0=-228.6)
+    water_tank_top = mc.ZPlane(z0=350.52)
+    water_tank_bottom = core_bottom
+    water_tank_front = core_front
+    water_tank_back = core_back
+
+    water_tank_region = (-water_tank_right & + water_tank_left & - water_tank_top &
+                         + water_tank_bottom & - water_tank_front & + water_tank_back)
+
+    water_tank_cell = mc.Cell(fill=water, region=water_tank_region & ~ core_region & ~rabit_tube_cell.region)
+
+    concrete_top = vertical_port_top
+    concrete_bottom = mc.ZPlane(z0=-182.88)
+    concrete_right = mc.XPlane(x0=(BOX_Y_SPACING * (37 / 6)) + 101.6)
+    concrete_left = rabit_tube_left
+    concrete_front = mc.YPlane(y0=279.4)
+    concrete_back = mc.YPlane(y0=-279.4)
+
+    concrete_region = -concrete_top & +concrete_bottom & -concrete_right & +concrete_left & -concrete_front & +concrete_back
+
+    concrete_filling = mc.Cell(fill=barite_concrete, region=(concrete_region & ~core_region &
+                                                             ~fuel_box_1_cell.region & ~fuel_box_2_cell.region &
+                                                             ~fuel_box_3_cell.region & ~fuel_box_4_cell.region &
+                                                             ~fuel_box_5_cell.region & ~fuel_box_6_cell.region &
+                                                             ~safety_blade_1_cell.region & ~safety_blade_2_cell.region &
+                                                             ~safety_blade_3_cell.region & ~regulating_blade_cell.region &
+                                                             ~graphite_cell_2.region & ~water_tank_region &
+                                                             ~core_air_cell.region & ~thermal_column_cell_1.region &
+                                                             ~central_vertical_port_cell.region & ~west_vertical_port_cell.region &
+                                                             ~east_vertical_port_cell.region & ~rabit_tube_cell.region))
+
+    air_filling_cell = mc.Cell(fill=air, region=(~concrete_region & ~core_region &
+                                                 ~fuel_box_1_cell.region & ~fuel_box_2_cell.region &
+                                                 ~fuel_box_3_cell.region & ~fuel_box_4_cell.region &
+                                                 ~fuel_box_5_cell.region & ~fuel_box_6_cell.region &
+                                                 ~safety_blade_1_cell.region & ~safety_blade_2_cell.region &
+                                                 ~safety_blade_3_cell.region & ~regulating_blade_cell.region &
+                                                 ~graphite_cell_2.region & ~water_tank_region &
+                                                 ~core_air_cell.region & ~thermal_column_cell_1.region &
+                                                 ~central_vertical_port_cell.region & ~west_vertical_port_cell.region &
+                                                 ~east_vertical_port_cell.region & ~rabit_tube_cell.region))
 
-central_vertical_port_cylinder = mc.ZCylinder(x0=0, y0=0, r=3)
-west_vertical_port_cylinder = mc.ZCylinder(x0=-20, y0=0, r=3)
-east_vertical_port_cylinder = mc.ZCylinder(x0=20, y0=0, r=3)
-vertical_port_top = mc.ZPlane(z0=60.95 + 0.318 + 25.4 + 152.4)
-vertical_port_bottom = mc.ZPlane(z0=50)
+    final_universe = mc.Universe(cells=[safety_blade_1_cell, safety_blade_2_cell, safety_blade_3_cell,
+                                        regulating_blade_cell, fuel_box_1_cell, fuel_box_2_cell, fuel_box_3_cell,
+                                        fuel_box_4_cell, fuel_box_5_cell, fuel_box_6_cell, graphite_cell_1,
+                                        graphite_cell_2, concrete_filling, water_tank_cell, core_air_cell,
+                                        thermal_column_cell_1,
+                                        central_vertical_port_cell, west_vertical_port_cell,
+                                        east_vertical_port_cell, rabit_tube_cell, air_filling_cell])
 
-central_vertical_port_cell = mc.Cell(fill=air, region=(-central_vertical_port_cylinder &
-                                                       -vertical_port_top & +vertical_port_bottom))
+    top = mc.ZPlane(z0=400, boundary_type='vacuum')
+    bottom = mc.ZPlane(z0=-200, boundary_type='vacuum')
+    right = mc.XPlane(x0=300, boundary_type='vacuum')
+    left = mc.XPlane(x0=-350, boundary_type='vacuum')
+    front = mc.YPlane(y0=300, boundary_type='vacuum')
+    back = mc.YPlane(y0=-300, boundary_type='vacuum')
 
-west_vertical_port_cell = mc.Cell(fill=air, region=(-west_vertical_port_cylinder &
-                                                    -vertical_port_top & +vertical_port_bottom))
-east_vertical_port_cell = mc.Cell(fill=air, region=(-east_vertical_port_cylinder &
-                                                    -vertical_port_top & +vertical_port_bottom))
+    final_cell = mc.Cell(fill=final_universe, region=-top & +bottom & -right & +left & -front & +back)
 
-rabit_tube_cylinder = mc.XCylinder(y0=0, z0=0, r=3)
-rabit_tube_right = mc.XPlane(x0=11)
-rabit_tube_left = mc.XPlane(x0=-(BOX_Y_SPACING * 7.5) - 101.6)
+    root_universe = mc.Universe(cells=[final_cell])
 
-rabit_tube_cell = mc.Cell(fill=air, region=-rabit_tube_cylinder & -rabit_tube_right & +rabit_tube_left)
+    geometry = mc.Geometry(root_universe)
 
-graphite_cell_1 = mc.Cell(fill=graphite, region=(core_region & ~fuel_box_1_cell.region & ~fuel_box_2_cell.region &
-                                                 ~fuel_box_3_cell.region & ~fuel_box_4_cell.region &
-                                                 ~fuel_box_5_cell.region & ~fuel_box_6_cell.region &
-                                                 ~safety_blade_1_cell.region & ~safety_blade_2_cell.region &
-                                                 ~safety_blade_3_cell.region & ~regulating_blade_cell.region &
-                                                 ~thermal_column_cell_1.region & ~rabit_tube_cell.region &
-                                                 ~west_vertical_port_cell.region &
-                                                 ~east_vertical_port_cell.region &
-                                                 ~central_vertical_port_cell.region))
-
-extra_graphite_left = mc.XPlane(x0=-BOX_Y_SPACING * (4 / 3))
-extra_graphite_right = mc.XPlane(x0=BOX_Y_SPACING * (4 / 3))
-extra_graphite_back = mc.YPlane(y0=-BOX_Y_SPACING * (4 / 3))
-extra_graphite_front = mc.YPlane(y0=BOX_Y_SPACING * (4 / 3))
-extra_graphite_bottom = core_top
-extra_graphite_top = mc.ZPlane(z0=60.95 + 20.32)
-
-graphite_cell_2 = mc.Cell(fill=graphite, region=(+extra_graphite_left & -extra_graphite_right &
-                                                 +extra_graphite_back & -extra_graphite_front &
-                                                 +extra_graphite_bottom & -extra_graphite_top &
-                                                 ~thermal_column_cell_1.region & ~rabit_tube_cell.region &
-                                                 ~west_vertical_port_cell.region & ~east_vertical_port_cell.region &
-                                                 ~central_vertical_port_cell.region & ~safety_blade_1_cell.region &
-                                                 ~safety_blade_2_cell.region & ~safety_blade_3_cell.region &
-                                                 ~regulating_blade_cell.region))
-
-water_tank_right = core_left
-water_tank_left = mc.XPlane(x0=-228.6)
-water_tank_top = mc.ZPlane(z0=350.52)
-water_tank_bottom = core_bottom
-water_tank_front = core_front
-water_tank_back = core_back
-
-water_tank_region = (-water_tank_right & + water_tank_left & - water_tank_top &
-                     + water_tank_bottom & - water_tank_front & + water_tank_back)
-
-water_tank_cell = mc.Cell(fill=water, region=water_tank_region & ~ core_region & ~rabit_tube_cell.region)
-
-concrete_top = vertical_port_top
-concrete_bottom = mc.ZPlane(z0=-182.88)
-concrete_right = mc.XPlane(x0=(BOX_Y_SPACING * (37 / 6)) + 101.6)
-concrete_left = rabit_tube_left
-concrete_front = mc.YPlane(y0=279.4)
-concrete_back = mc.YPlane(y0=-279.4)
-
-concrete_region = -concrete_top & +concrete_bottom & -concrete_right & +concrete_left & -concrete_front & +concrete_back
-
-concrete_filling = mc.Cell(fill=barite_concrete, region=(concrete_region & ~core_region &
-                                                         ~fuel_box_1_cell.region & ~fuel_box_2_cell.region &
-                                                         ~fuel_box_3_cell.region & ~fuel_box_4_cell.region &
-                                                         ~fuel_box_5_cell.region & ~fuel_box_6_cell.region &
-                                                         ~safety_blade_1_cell.region & ~safety_blade_2_cell.region &
-                                                         ~safety_blade_3_cell.region & ~regulating_blade_cell.region &
-                                                         ~graphite_cell_2.region & ~water_tank_region &
-                                                         ~core_air_cell.region & ~thermal_column_cell_1.region &
-                                                         ~central_vertical_port_cell.region & ~west_vertical_port_cell.region &
-                                                         ~east_vertical_port_cell.region & ~rabit_tube_cell.region))
-
-air_filling_cell = mc.Cell(fill=air, region=(~concrete_region & ~core_region &
-                                             ~fuel_box_1_cell.region & ~fuel_box_2_cell.region &
-                                             ~fuel_box_3_cell.region & ~fuel_box_4_cell.region &
-                                             ~fuel_box_5_cell.region & ~fuel_box_6_cell.region &
-                                             ~safety_blade_1_cell.region & ~safety_blade_2_cell.region &
-                                             ~safety_blade_3_cell.region & ~regulating_blade_cell.region &
-                                             ~graphite_cell_2.region & ~water_tank_region &
-                                             ~core_air_cell.region & ~thermal_column_cell_1.region &
-                                             ~central_vertical_port_cell.region & ~west_vertical_port_cell.region &
-                                             ~east_vertical_port_cell.region & ~rabit_tube_cell.region))
-
-final_universe = mc.Universe(cells=[safety_blade_1_cell, safety_blade_2_cell, safety_blade_3_cell,
-                                    regulating_blade_cell, fuel_box_1_cell, fuel_box_2_cell, fuel_box_3_cell,
-                                    fuel_box_4_cell, fuel_box_5_cell, fuel_box_6_cell, graphite_cell_1,
-                                    graphite_cell_2, concrete_filling, water_tank_cell, core_air_cell,
-                                    thermal_column_cell_1,
-                                    central_vertical_port_cell, west_vertical_port_cell,
-                                    east_vertical_port_cell, rabit_tube_cell, air_filling_cell])
-
-top = mc.ZPlane(z0=400, boundary_type='vacuum')
-bottom = mc.ZPlane(z0=-200, boundary_type='vacuum')
-right = mc.XPlane(x0=300, boundary_type='vacuum')
-left = mc.XPlane(x0=-350, boundary_type='vacuum')
-front = mc.YPlane(y0=300, boundary_type='vacuum')
-back = mc.YPlane(y0=-300, boundary_type='vacuum')
-
-final_cell = mc.Cell(fill=final_universe, region=-top & +bottom & -right & +left & -front & +back)
-
-root_universe = mc.Universe(cells=[final_cell])
-
-geometry = mc.Geometry(root_universe)
-geometry.export_to_xml()
+    return geometry
 
 
 
@@ -1092,36 +1112,88 @@ tallies.export_to_xml()
 
 
 
+
 #####################################################################################
 #                                   SETTINGS & RUN                                  #
 #####################################################################################
 
-settings = mc.Settings()
-settings.run_mode = 'eigenvalue'
-
-# when being set at false, the run will estimate K only considering prompt neutrons, completely neglecting delayed neutrons
-# to estimate Delayed neutron fraction, run once withe settings.create_delayed_neutrons = False and one without calling it, and subtract
-# settings.create_delayed_neutrons = False
-
-source = mc.Source()
-source.space = mc.stats.Point((0.0, 22, 0.0))
-source.angle = mc.stats.Isotropic()
-settings.energy_mode = ('continuous-energy')
-settings.source = source
-
-entropy_mesh = mc.RegularMesh()
-entropy_mesh.lower_left = (-28.0, -29.01, -30.02)
-entropy_mesh.upper_right = (28.0, 29.01, 30.02)
-entropy_mesh.dimension = (10, 10, 10)
-
-settings.batches = 500
-settings.inactive = 100
-# 500,000 particles at 500 batches with 100 inactive will produce approximately 7 pcm error and will take approximately 3 hours to run
-settings.particles = 10000 # multiply by 4 to reduce the error to half, multiply the 4 by 4 to reduce to another half, and so on
-settings.entropy_mesh = entropy_mesh
-settings.output = {'tallies': False, 'summary': False}
+def build_settings(settings_profile='default'):
+    profile = _settings_profile(settings_profile)
+
+    settings = mc.Settings()
+    settings.run_mode = 'eigenvalue'
+
+    # when being set at false, the run will estimate K only considering prompt neutrons, completely neglecting delayed neutrons
+    # to estimate Delayed neutron fraction, run once withe settings.create_delayed_neutrons = False and one without calling it, and subtract
+    # settings.create_delayed_neutrons = False
+    # the 'kinetics' profile computes the adjoint weighted Delayed neutron fraction in one run instead (see kinetics.py)
+    if not profile['create_delayed_neutrons']:
+        settings.create_delayed_neutrons = False
+    if profile.get('ifp_n_generation'):
+        settings.ifp_n_generation = profile['ifp_n_generation']
+
+    source = mc.Source()
+    source.space = mc.stats.Point((0.0, 22, 0.0))
+    source.angle = mc.stats.Isotropic()
+    settings.energy_mode = ('continuous-energy')
+    settings.source = source
+
+    entropy_mesh = mc.RegularMesh()
+    entropy_mesh.lower_left = (-28.0, -29.01, -30.02)
+    entropy_mesh.upper_right = (28.0, 29.01, 30.02)
+    entropy_mesh.dimension = (10, 10, 10)
+
+    settings.batches = profile['batches']
+    settings.inactive = profile['inactive']
+    # multiply the particles by 4 to reduce the error to half, multiply the 4 by 4 to reduce to another half, and so on
+    settings.particles = profile['particles']
+    if profile.get('keff_std_pcm'):
+        settings.keff_trigger = {'type': 'std_dev', 'threshold': profile['keff_std_pcm'] * 1e-5}
+        settings.trigger_active = True
+        settings.trigger_max_batches = profile.get('max_batches', 4 * profile['batches'])
+        settings.trigger_batch_interval = 1
+    settings.entropy_mesh = entropy_mesh
+    settings.output = {'tallies': False, 'summary': False}
+
+    return settings
+
+
+def build_model(core_state=None, blade_positions=None, settings_profile='default', loading_pattern=None):
+    '''
+    The model of the core for core_state (see build_materials()), the blade positions, the settings profile and the
+    loading pattern. The auto ids of OpenMC are restarted first (mc.reset_auto_ids()), so that the same arguments always
+    produce the same XML: this is global, materials or cells created before the call (e.g. for core_state) may share ids
+    with the ones of the model, which build_materials() sorts out for the materials of core_state.
+    '''
+    mc.reset_auto_ids()
+    materials = build_materials(core_state)
+    geometry = build_geometry(materials, blade_positions, loading_pattern)
+    settings = build_settings(settings_profile)
+
+    return mc.Model(geometry=geometry, materials=mc.Materials(materials.values()), settings=settings)
+
+
+_default_materials = {}
+_default_model = {}
+
+
+def __getattr__(name):
+    # "from march2025_core.march2025_core import old_fuel" only builds the materials, which is all that post-processing and analysis
+    # tools need, the geometry is only built the first time the model itself (or its geometry/settings) is asked for
+    if name in MATERIAL_NAMES:
+        if not _default_materials:
+            _default_materials.update(build_materials())
+        return _default_materials[name]
+    if name in ('materials', 'geometry', 'settings'):
+        if not _default_model:
+            # the model is built around the same material objects handed out above
+            model = build_model(core_state={material_name: __getattr__(material_name) for material_name in MATERIAL_NAMES})
+            _default_model.update(materials=model.materials, geometry=model.geometry, settings=model.settings)
+        return _default_model[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-settings.export_to_xml()
 
 if __name__ == "__main__":
-    mc.run()
\ No newline at end of file
+    model = build_model()
+    model.export_to_xml()
+    mc.run()
@@ -0,0 +1,175 @@
+import os
+import warnings
+
+import numpy as np
+import openmc as mc
+import openmc.data
+
+from depletion_arrays import DepletionArrays
+
+'''
+Transfer of depleted compositions from a depletion results file (depletion.py) into a core model, instead of copying the
+add_nuclide() lines of old_fuel and new_fuel in march2025_core.py by hand. The composition of every depleted material is
+taken at a step of the results, given by its index, by the time in days or by the cumulative energy in kWh (the nearest
+step is used), as atom densities of the nuclides that have cross sections (see nuclides_with_data()), with the volume of
+the material in the depletion run. A 2025-style model is then built in one call:
+
+    model = build_depleted_model(march2025_core, 'current_depletion_results.h5', {'1': 'old_fuel', '2': 'new_fuel'},
+                                 kwh=...)
+
+and a burn region model (burn_regions.burn_region_model(), whose region materials have the ids of the results) is brought
+to a step with update_model(model, results_path, step=...).
+'''
+
+# atom densities below this are left out of the transferred compositions, in atom/b-cm
+MIN_ATOM_DENSITY = 1e-20
+
+
+def nuclides_with_data(cross_sections=None):
+    # names of the nuclides of a cross_sections.xml (mc.config['cross_sections'] by default), None without a library
+    cross_sections = cross_sections or mc.config.get('cross_sections')
+    if cross_sections is None or not os.path.isfile(cross_sections):
+        return None
+    library = openmc.data.DataLibrary.from_xml(cross_sections)
+    return {name for entry in library.libraries if entry['type'] == 'neutron' for name in entry['materials']}
+
+
+def cumulative_kwh(results):
+    # energy produced from the start of the history to every step, in kWh
+    steps = np.diff(results.time) * results.source_rate[:-1]
+    return np.concatenate(([0.0], np.cumsum(steps))) / 3.6e6
+
+
+def select_step(results, step=None, days=None, kwh=None):
+    '''
+    Index of the step of results given by exactly one of its index, a time in days or a cumulative energy in kWh, the
+    nearest step being used for a time or an energy.
+    '''
+    if sum(value is not None for value in (step, days, kwh)) != 1:
+        raise ValueError('Give exactly one of step, days and kwh')
+    if step is not None:
+        if not -len(results.time) <= step < len(results.time):
+            raise ValueError(f'Step {step} out of range, {results.filename} has {len(results.time)} steps')
+        return step % len(results.time)
+    values, value, unit = (results.time / 86400, days, 'days') if days is not None else (cumulative_kwh(results), kwh, 'kWh')
+    index = int(np.argmin(np.abs(values - value)))
+    if not np.isclose(values[index], value, rtol=1e-3, atol=1e-6):
+        warnings.warn(f'No step at {value} {unit} in {results.filename}, using step {index} at {values[index]:g} {unit}')
+    return index
+
+
+def atom_densities(results_path, step=None, days=None, kwh=None, cross_sections=None):
+    '''
+    Depleted compositions at a step (see select_step()) as {material id: ({nuclide: atom/b-cm}, volume in cm3)}, keeping
+    the nuclides with cross sections and with an atom density above MIN_ATOM_DENSITY.
+    '''
+    results = results_path if isinstance(results_path, DepletionArrays) else DepletionArrays(results_path)
+    index = select_step(results, step, days, kwh)
+    available = nuclides_with_data(cross_sections)
+    if available is None:
+        warnings.warn('No cross section library to check the nuclides against, all depleted nuclides are transferred')
+        keep = np.ones(len(results.nuclides), dtype=bool)
+    else:
+        keep = np.array([nuclide in available for nuclide in results.nuclides])
+
+    # atoms per cm3 to atoms per barn-cm
+    densities = results.get(units='atom/cm3')[index] * 1e-24
+    compositions = {}
+    for i, material in enumerate(results.materials):
+        nonzero = keep & (densities[i] > MIN_ATOM_DENSITY)
+        compositions[material] = ({results.nuclides[j]: float(densities[i, j]) for j in np.nonzero(nonzero)[0]},
+                                  float(results.volumes[i]))
+    return compositions
+
+
+def merge_compositions(compositions):
+    # one composition from several (densities, volume) of atom_densities(), e.g. the burn regions of a fuel: the atoms
+    # and the volumes add up
+    volume = sum(part_volume for _, part_volume in compositions)
+    densities = {}
+    for part_densities, part_volume in compositions:
+        for nuclide, density in part_densities.items():
+            densities[nuclide] = densities.get(nuclide, 0.0) + density * part_volume / volume
+    return densities, volume
+
+
+def set_composition(material, densities, volume=None):
+    # replaces the nuclides of material by densities {nuclide: atom/b-cm}, the density being their sum
+    for nuclide in material.get_nuclides():
+        material.remove_nuclide(nuclide)
+    for nuclide, density in densities.items():
+        material.add_nuclide(nuclide, density, 'ao')
+    material.set_density('sum')
+    if volume is not None:
+        material.volume = volume
+    return material
+
+
+def update_model(model, results_path, step=None, days=None, kwh=None, cross_sections=None):
+    # sets the compositions of the materials of model that have the ids of the depleted materials, returns their ids
+    compositions = atom_densities(results_path, step, days, kwh, cross_sections)
+    updated = []
+    for material in model.materials:
+        if str(material.id) in compositions:
+            set_composition(material, *compositions[str(material.id)])
+            updated.append(str(material.id))
+    if not updated:
+        raise ValueError(f'No material of the model has the id of a material of {results_path}, '
+                         f'expected some of {list(compositions)}')
+    return updated
+
+
+def depleted_core_state(core, results_path, names, step=None, days=None, kwh=None, cross_sections=None):
+    '''
+    core_state for build_model() of the core module core: every material of the core, names {depleted material id: core
+    material name} having the composition and volume of the depleted material at the step. Depleted materials sharing a
+    name (the burn regions of a fuel reloaded as one material) are merged by merge_compositions().
+    '''
+    compositions = atom_densities(results_path, step, days, kwh, cross_sections)
+    unknown = set(map(str, names)) - set(compositions)
+    if unknown:
+        raise ValueError(f'Materials {sorted(unknown)} are not in {results_path}, expected some of {list(compositions)}')
+
+    # the whole set of materials, built after the id reset of build_model() so that every material keeps its id
+    mc.reset_auto_ids()
+    materials = core.build_materials()
+    merged = {}
+    for material_id, name in names.items():
+        if name not in materials:
+            raise ValueError(f'Unknown material "{name}", expected one of {list(materials)}')
+        merged.setdefault(name, []).append(compositions[str(material_id)])
+    for name, parts in merged.items():
+        set_composition(materials[name], *merge_compositions(parts))
+    return materials
+
+
+def build_depleted_model(core, results_path, names, step=None, days=None, kwh=None, cross_sections=None, fresh=None,
+                         **build_kwargs):
+    '''
+    core.build_model() with the depleted compositions of depleted_core_state() and the materials of fresh {core material
+    name: material} that are not in the results (e.g. the fresh fuel of plates added at a reload), build_kwargs going to
+    build_model().
+    '''
+    core_state = depleted_core_state(core, results_path, names, step, days, kwh, cross_sections)
+    for name, material in (fresh or {}).items():
+        if name not in core_state:
+            raise ValueError(f'Unknown material "{name}" in fresh, expected one of {list(core_state)}')
+        if name in names.values():
+            raise ValueError(f'The material "{name}" is both depleted and fresh')
+        # a copy under the name of the core material, with an id of its own next to the depleted materials
+        core_state[name] = material.clone()
+        core_state[name].name = name
+    return core.build_model(core_state=core_state, **build_kwargs)
+
+
+if __name__ == "__main__":
+    from march2025_core import march2025_core
+
+    # the 2025 core with the old and new fuel at the end of the current depletion history
+    model = build_depleted_model(march2025_core, 'current_depletion_results.h5', {'1': 'old_fuel', '2': 'new_fuel'},
+                                 step=-1)
+    for material in model.materials:
+        if material.name in ('old_fuel', 'new_fuel'):
+            print(f'{material.name}: {len(material.nuclides)} nuclides, {material.get_mass_density():.3f} g/cm3, '
+                  f'{material.volume:.2f} cm3')
+    model.export_to_xml()
@@ -0,0 +1,252 @@
+import itertools
+
+import h5py
+import numpy as np
+
+'''
+Reader for mesh tallies too large for the statepoint tally API, such as the 3000 x 2100 thermal and epithermal flux tallies
+(commented out in march2025_core.py), which mc.StatePoint loads whole, sum and sum of squares, mean and standard deviation.
+
+The results of a tally are stored in the statepoint as a (filter bins, nuclides x scores, 2) dataset of sums and sums of
+squares, the filter bins of the filters flattened in C order (the last filter varying fastest) and the bins of a mesh
+with x varying fastest. MeshTally only reads the rows covering a selection, a block of at most chunk_rows rows at a time,
+and computes the mean or standard deviation of the block before moving to the next one. The axes of the arrays are those
+of the filters in the order of the tally, a mesh filter giving the x, y (and z) axes of its mesh, followed by a 'score'
+axis:
+
+    with MeshTally('statepoint.500.h5', 'thermal_flux_tally') as tally:
+        print(tally.axes, tally.shape)               # ('x', 'y', 'z', 'energy', 'score') (3000, 2100, 1, 1, 1)
+        core = tally.read(x=slice(500, 1100), y=slice(700, 1400), energy=0, score='flux')
+        tally.extract('thermal_flux.npy')            # the whole mean, streamed into a NumPy memmap
+        tally.extract('thermal_flux.h5', value='std_dev')   # or into a compressed chunked HDF5 dataset
+'''
+
+MESH_AXES = ('x', 'y', 'z')
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+def _indices(selection, size, axis):
+    # selected indices of an axis and whether the axis is kept (False for an integer, like NumPy indexing)
+    if selection is None:
+        return np.arange(size), True
+    if isinstance(selection, slice):
+        return np.arange(size)[selection], True
+    index = int(selection)
+    if not -size <= index < size:
+        raise IndexError(f'Index {index} out of range for the {axis} axis of size {size}')
+    return np.array([index % size]), False
+
+
+class MeshTally:
+
+    def __init__(self, statepoint_path, name, chunk_rows=2**20):
+        self.statepoint_path = statepoint_path
+        self.name = name
+        self.chunk_rows = chunk_rows
+        self._file = h5py.File(statepoint_path, 'r')
+        try:
+            self._read_layout()
+        except Exception:
+            self._file.close()
+            raise
+
+    def _read_layout(self):
+        tallies = self._file['tallies']
+        groups = [tallies[key] for key in tallies if key.startswith('tally ')]
+        matches = [group for group in groups if 'name' in group and _decode(group['name'][()]) == self.name]
+        if len(matches) != 1:
+            names = [_decode(group['name'][()]) for group in groups if 'name' in group]
+            raise ValueError(f'Expected one tally named "{self.name}" in {self.statepoint_path}, found {len(matches)} '
+                             f'among {names}')
+        group = matches[0]
+        self._results = group['results']
+        self.n_realizations = int(group['n_realizations'][()])
+        if self.n_realizations < 2:
+            raise ValueError(f'The tally "{self.name}" has {self.n_realizations} realizations, at least 2 are needed')
+
+        # the storage axes, in the order of the flattened filter bins: a mesh is stored z, y, x (x varying fastest)
+        self._storage_axes, self._storage_shape = [], []
+        self.axes, shape = [], []
+        self.mesh_dimension = None
+        for filter_id in group['filters'][()] if 'filters' in group else []:
+            filter_group = tallies['filters'][f'filter {filter_id}']
+            filter_type = _decode(filter_group['type'][()])
+            if filter_type == 'mesh':
+                if self.mesh_dimension is not None:
+                    raise ValueError(f'The tally "{self.name}" has more than one mesh filter')
+                mesh_id = int(np.ravel(filter_group['bins'][()])[0])
+                mesh = tallies['meshes'][f'mesh {mesh_id}']
+                dimension = tuple(int(n) for n in mesh['dimension'][()])
+                self.mesh_dimension = dimension
+                # the extent of a regular mesh, None for other meshes
+                self.mesh_lower_left = mesh['lower_left'][()] if 'lower_left' in mesh else None
+                self.mesh_upper_right = mesh['upper_right'][()] if 'upper_right' in mesh else None
+                axes = MESH_AXES[:len(dimension)]
+                self._storage_axes += axes[::-1]
+                self._storage_shape += dimension[::-1]
+                self.axes += axes
+                shape += dimension
+            else:
+                n_bins = int(filter_group['n_bins'][()])
+                if filter_type in self.axes:
+                    raise ValueError(f'The tally "{self.name}" has more than one {filter_type} filter')
+                self._storage_axes.append(filter_type)
+                self._storage_shape.append(n_bins)
+                self.axes.append(filter_type)
+                shape.append(n_bins)
+        if self.mesh_dimension is None:
+            raise ValueError(f'The tally "{self.name}" has no mesh filter')
+
+        # one column per nuclide and score, nuclide major
+        nuclides = [_decode(nuclide) for nuclide in group['nuclides'][()]]
+        scores = [_decode(score) for score in group['score_bins'][()]]
+        self.scores = scores if nuclides == ['total'] else [f'{nuclide} {score}' for nuclide in nuclides
+                                                            for score in scores]
+        self.axes = tuple(self.axes) + ('score',)
+        self.shape = tuple(shape) + (len(self.scores),)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._file.close()
+
+    def _selection(self, selections):
+        # {axis: (indices, kept)} for every axis, the score axis accepting score names
+        unknown = set(selections) - set(self.axes)
+        if unknown:
+            raise ValueError(f'Unknown axes {sorted(unknown)}, expected some of {list(self.axes)}')
+        selection = {}
+        for axis, size in zip(self.axes, self.shape):
+            value = selections.get(axis)
+            if axis == 'score':
+                if isinstance(value, str):
+                    if value not in self.scores:
+                        raise ValueError(f'Unknown score "{value}", expected one of {self.scores}')
+                    value = self.scores.index(value)
+                elif isinstance(value, (list, tuple)):
+                    indices = [self.scores.index(score) if isinstance(score, str) else int(score) for score in value]
+                    selection[axis] = np.array(indices), True
+                    continue
+            selection[axis] = _indices(value, size, axis)
+        return selection
+
+    def _blocks(self, selection):
+        '''
+        Yields the blocks of rows covering the selection as (outer position, (start, stop), relative, rows): the positions
+        in the selected indices of the axes outside the block axis and of the block axis, the selected block axis
+        elements relative to the lowest one, and the contiguous range of rows of the results that covers them, at most
+        chunk_rows long unless a single element of the block axis is longer.
+        '''
+        shape = self._storage_shape
+        inner = [int(np.prod(shape[axis + 1:], dtype=np.int64)) for axis in range(len(shape))]
+        # the block axis: the outermost axis whose elements hold at most chunk_rows rows, the axes inside it are read whole
+        block_axis = next((axis for axis in range(len(shape)) if inner[axis] <= self.chunk_rows), len(shape) - 1)
+        per_block = max(self.chunk_rows // inner[block_axis], 1)
+
+        selected = [selection[axis][0] for axis in self._storage_axes]
+        outer = [range(len(indices)) for indices in selected[:block_axis]]
+        for outer_position in itertools.product(*outer):
+            offset = sum(int(selected[axis][i]) * inner[axis] for axis, i in enumerate(outer_position))
+            block_indices = selected[block_axis]
+            start = 0
+            while start < len(block_indices):
+                # a run of selected block axis elements spanning at most per_block elements
+                stop = start + 1
+                first = last = int(block_indices[start])
+                while (stop < len(block_indices) and
+                       max(last, block_indices[stop]) - min(first, block_indices[stop]) < per_block):
+                    first, last = min(first, int(block_indices[stop])), max(last, int(block_indices[stop]))
+                    stop += 1
+                rows = (offset + first * inner[block_axis], offset + (last + 1) * inner[block_axis])
+                yield outer_position, (start, stop), block_indices[start:stop] - first, rows
+                start = stop
+
+    def _value(self, rows, columns, value):
+        data = self._results[rows[0]:rows[1], :, :]
+        total, total_sq = data[:, columns, 0], data[:, columns, 1]
+        n = self.n_realizations
+        mean = total / n
+        if value == 'mean':
+            return mean
+        if value == 'std_dev':
+            return np.sqrt(np.clip((total_sq / n - mean**2) / (n - 1), 0, None))
+        raise ValueError(f'Unknown value "{value}", expected "mean" or "std_dev"')
+
+    def _stream(self, out, selection, value):
+        # fills out (an array, memmap or HDF5 dataset) with the selection, one block of rows at a time
+        storage = self._storage_axes
+        columns = selection['score'][0]
+        inner_selection = [selection[axis][0] for axis in storage]
+        # output axis -> storage axis, the score axis staying last
+        order = [storage.index(axis) for axis in self.axes[:-1]] + [len(storage)]
+        kept = [selection[axis][1] for axis in self.axes]
+
+        for outer_position, (start, stop), relative, rows in self._blocks(selection):
+            block_axis = len(outer_position)
+            block = self._value(rows, columns, value)
+            block = block.reshape((-1,) + tuple(self._storage_shape[block_axis + 1:]) + (len(columns),))
+            # the selected elements of the block axis and of the axes inside it
+            block = block[np.ix_(relative, *inner_selection[block_axis + 1:])]
+            block = block.reshape((1,) * block_axis + block.shape).transpose(order)
+
+            # where the block goes, in storage order and then in the order of the output axes
+            target = [slice(i, i + 1) for i in outer_position] + [slice(start, stop)]
+            target += [slice(None)] * (len(storage) - block_axis)
+            target = [target[axis] for axis in order]
+            index = tuple(part for part, keep in zip(target, kept) if keep)
+            out[index] = block.reshape(tuple(size for size, keep in zip(block.shape, kept) if keep))
+        return out
+
+    def selected_shape(self, **selections):
+        # shape of read(**selections)
+        selection = self._selection(selections)
+        return tuple(len(selection[axis][0]) for axis in self.axes if selection[axis][1])
+
+    def read(self, value='mean', **selections):
+        '''
+        Mean (or standard deviation with value='std_dev') of a selection, as an array with the axes of self.axes. A
+        selection is given per axis name as an index, which drops the axis, or a slice, a score by name or a list of
+        names; the axes not given are read whole.
+        '''
+        selection = self._selection(selections)
+        shape = tuple(len(selection[axis][0]) for axis in self.axes if selection[axis][1])
+        return self._stream(np.empty(shape), selection, value)
+
+    def extract(self, path, value='mean', dtype=np.float64, compression='gzip', **selections):
+        '''
+        Streams read(value, **selections) to disk without holding it in memory: a NumPy memmap (.npy, opened again
+        with np.load(path, mmap_mode='r')) or a chunked, compressed HDF5 dataset named after value (any other suffix).
+        '''
+        selection = self._selection(selections)
+        shape = tuple(len(selection[axis][0]) for axis in self.axes if selection[axis][1])
+        if str(path).endswith('.npy'):
+            out = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+            self._stream(out, selection, value)
+            out.flush()
+            del out
+        else:
+            with h5py.File(path, 'w') as fh:
+                out = fh.create_dataset(value, shape=shape, dtype=dtype, chunks=True, compression=compression)
+                out.attrs['axes'] = [axis for axis in self.axes if selection[axis][1]]
+                out.attrs['statepoint'] = str(self.statepoint_path)
+                out.attrs['tally'] = self.name
+                self._stream(out, selection, value)
+        return path
+
+
+if __name__ == "__main__":
+    import sys
+
+    # python mesh_tally_reader.py statepoint.500.h5 thermal_flux_tally [output.npy|output.h5]
+    statepoint_path, name = sys.argv[1:3]
+    with MeshTally(statepoint_path, name) as tally:
+        print(f"{name}: axes {tally.axes}, shape {tally.shape}, {tally.n_realizations} realizations")
+        if len(sys.argv) > 3:
+            print(f"mean written to {tally.extract(sys.argv[3])}")
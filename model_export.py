@@ -0,0 +1,216 @@
+import contextlib
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import tempfile
+import xml.etree.ElementTree as ET
+
+import openmc as mc
+
+try:
+    import fcntl
+except ImportError:
+    # no file locks on Windows, a directory then has to be written by a single process at a time
+    fcntl = None
+
+'''
+Export layer for the core models. Every part of a model (materials, geometry, settings, tallies) is serialized in memory
+and hashed, and only the XML files whose content changed are rewritten, so moving a blade only rewrites geometry.xml and
+changing the batches only rewrites settings.xml. Files are written to a temporary name and moved into place, so workers
+sharing a directory never read a half written file, and an export holds a lock on the directory (.model_export.lock) so
+that two workers exporting into it do not lose each other's manifest entries.
+
+ModelCache keeps one directory per unique build_model() call under a shared root, keyed by the arguments and the source
+of the core script, so scenario runs that repeat a configuration skip the Python build and the export altogether.
+'''
+
+MANIFEST = '.model_export.json'
+LOCK = '.model_export.lock'
+
+
+def _to_bytes(element):
+    ET.indent(element)
+    return ET.tostring(element, encoding='utf-8', xml_declaration=True)
+
+
+def _materials_element(materials):
+    element = ET.Element('materials')
+    if materials.cross_sections is not None:
+        ET.SubElement(element, 'cross_sections').text = str(materials.cross_sections)
+    for material in materials:
+        element.append(material.to_xml_element())
+    return element
+
+
+def serialize_parts(model):
+    # file name -> XML bytes for every part of the model that is defined
+    parts = {'materials.xml': _to_bytes(_materials_element(model.materials)),
+             'geometry.xml': _to_bytes(model.geometry.to_xml_element()),
+             'settings.xml': _to_bytes(model.settings.to_xml_element())}
+    if model.tallies:
+        parts['tallies.xml'] = _to_bytes(model.tallies.to_xml_element())
+    return parts
+
+
+def digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def model_digest(model):
+    # one hash for the whole model, used to key results of a model regardless of where its XML was written
+    parts = serialize_parts(model)
+    return digest(b''.join(digest(parts[name]).encode() for name in sorted(parts)))
+
+
+def _replace(path, write):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.xml', dir=directory)
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _write_bytes(data):
+    def write(path):
+        with open(path, 'wb') as fh:
+            fh.write(data)
+    return write
+
+
+def _load_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST)) as fh:
+            return json.load(fh)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+@contextlib.contextmanager
+def _locked(directory):
+    # exclusive lock on directory for the read-modify-write of its manifest
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(directory, LOCK), 'a') as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def export_model(model, directory='.', model_xml=None):
+    '''
+    Writes materials.xml, geometry.xml, settings.xml (and tallies.xml when the model has tallies) into directory, skipping
+    every file whose content is unchanged since the last export. When model_xml is given (e.g. 'fresh_core_model.xml') the
+    single-file model is rewritten only if one of its parts changed. Returns the list of files that were written.
+    '''
+    os.makedirs(directory, exist_ok=True)
+    parts = serialize_parts(model)
+    with _locked(directory):
+        return _export_parts(parts, model, directory, model_xml)
+
+
+def _export_parts(parts, model, directory, model_xml):
+    # export_model() with the lock of directory held
+    manifest = _load_manifest(directory)
+    written = []
+    for name, data in parts.items():
+        path = os.path.join(directory, name)
+        part_digest = digest(data)
+        if manifest.get(name) == part_digest and os.path.exists(path):
+            continue
+        # a file left by a plain export_to_xml() is only rewritten if it differs
+        if name not in manifest and os.path.exists(path):
+            with open(path, 'rb') as fh:
+                if digest(fh.read()) == part_digest:
+                    manifest[name] = part_digest
+                    continue
+        _replace(path, _write_bytes(data))
+        manifest[name] = part_digest
+        written.append(name)
+
+    # tallies that were removed from the model must not be picked up by OpenMC anymore
+    if 'tallies.xml' in manifest and 'tallies.xml' not in parts:
+        path = os.path.join(directory, 'tallies.xml')
+        if os.path.exists(path):
+            os.remove(path)
+        del manifest['tallies.xml']
+        written.append('tallies.xml')
+
+    if model_xml is not None:
+        combined = digest(b''.join(manifest[name].encode() for name in sorted(parts)))
+        path = os.path.join(directory, model_xml)
+        if manifest.get(model_xml) != combined or not os.path.exists(path):
+            _replace(path, model.export_to_model_xml)
+            manifest[model_xml] = combined
+            written.append(model_xml)
+
+    if written:
+        _replace(os.path.join(directory, MANIFEST), _write_bytes(json.dumps(manifest, indent=2).encode()))
+    return written
+
+
+def _canonical(value):
+    # build_model() arguments in a form that hashes the same for equal configurations
+    if isinstance(value, mc.Material):
+        return ET.tostring(value.to_xml_element(), encoding='unicode')
+    if isinstance(value, dict):
+        return {str(key): _canonical(value[key]) for key in sorted(value, key=str)}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    raise TypeError(f'Cannot build a cache key from {type(value).__name__} {value!r}')
+
+
+class ModelCache:
+    '''
+    On-disk cache of exported model directories shared between scenario runs:
+
+        cache = ModelCache('model_cache')
+        directory = cache.directory(build_model, blade_positions={'regulating_blade': 600})
+        mc.run(cwd=directory)
+    '''
+
+    def __init__(self, root='model_cache'):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def key(self, build_model, model_xml=None, **kwargs):
+        # the single-file model is part of the key, a directory exported without it never serves a call asking for it
+        with open(inspect.getsourcefile(build_model), 'rb') as fh:
+            source = digest(fh.read())
+        description = {'builder': f'{build_model.__module__}.{build_model.__name__}', 'source': source,
+                       'arguments': _canonical(kwargs), 'model_xml': model_xml}
+        return digest(json.dumps(description, sort_keys=True).encode())
+
+    def directory(self, build_model, model_xml=None, **kwargs):
+        # returns the directory holding the XML of build_model(**kwargs), building and exporting it only on a miss
+        path = os.path.join(self.root, self.key(build_model, model_xml, **kwargs))
+        if os.path.exists(os.path.join(path, MANIFEST)):
+            return path
+
+        staging = tempfile.mkdtemp(prefix='.staging-', dir=self.root)
+        try:
+            export_model(build_model(**kwargs), staging, model_xml=model_xml)
+            try:
+                os.rename(staging, path)
+            except OSError:
+                # another worker finished the same configuration first, its copy is identical
+                if not os.path.exists(os.path.join(path, MANIFEST)):
+                    raise
+        finally:
+            if os.path.exists(staging):
+                shutil.rmtree(staging)
+        return path
+
+    def clear(self):
+        shutil.rmtree(self.root)
+        os.makedirs(self.root)
@@ -0,0 +1,163 @@
+import copy
+import os
+import tempfile
+
+import numpy as np
+import openmc as mc
+import openmc.data
+
+'''
+Pruning of the nuclides that cost more in transport (cross sections in memory, a lookup at every collision) than they
+contribute to the reactivity, such as the trace actinides of the March 2025 fuel or the hundreds of fission products of a
+full depletion transfer (material_transfer.py).
+
+The importance of every nuclide of the pruned materials comes from the absorption and nu-fission rates of one reference
+run. With the rates per source neutron, the total nu-fission is k and absorption plus leakage is 1, so removing a nuclide
+of absorption rate A and nu-fission rate F changes k by about k A - F, and the reactivity by (k A - F) / k^2. This ignores
+the change of the flux, so it is a first order estimate, good for the small contributions that get pruned. The nuclides
+whose estimated contribution is below threshold_pcm are removed, the k-eff bias and the speedup of the pruned model are
+then measured against the reference by running both, and the memory saving is estimated from the size of the cross section
+files no longer loaded.
+
+    report = run_pruning(march2025_core, threshold_pcm=0.5)
+'''
+
+# never pruned, whatever their estimated contribution
+KEEP = ('U235', 'U238')
+
+
+def importance_tallies(materials):
+    # absorption and nu-fission rates of every nuclide of materials (a list of mc.Material)
+    tallies = mc.Tallies()
+    for material in materials:
+        tally = mc.Tally(name=f'importance {material.id}')
+        tally.filters = [mc.MaterialFilter([material])]
+        tally.nuclides = material.get_nuclides()
+        tally.scores = ['absorption', 'nu-fission']
+        tallies.append(tally)
+    return tallies
+
+
+def reactivity_importance(statepoint_path, materials):
+    '''
+    Estimated reactivity contribution of every nuclide of materials in a run with importance_tallies(), as a list of
+    {'material', 'nuclide', 'rho_pcm', 'rho_pcm_std'} ordered from the smallest contribution to the largest.
+    '''
+    importance = []
+    with mc.StatePoint(statepoint_path, autolink=False) as sp:
+        keff = sp.keff.nominal_value
+        for material in materials:
+            tally = sp.get_tally(name=f'importance {material.id}')
+            nuclides = material.get_nuclides()
+
+            def rates(score, value):
+                return tally.get_values(scores=[score], nuclides=nuclides, value=value).ravel()
+
+            # removing the nuclide takes away its absorption and its neutron production
+            rho = (keff * rates('absorption', 'mean') - rates('nu-fission', 'mean')) / keff**2 * 1e5
+            rho_std = np.hypot(keff * rates('absorption', 'std_dev'), rates('nu-fission', 'std_dev')) / keff**2 * 1e5
+            importance += [{'material': material.name, 'nuclide': nuclide, 'rho_pcm': float(value),
+                            'rho_pcm_std': float(std)} for nuclide, value, std in zip(nuclides, rho, rho_std)]
+    return sorted(importance, key=lambda entry: abs(entry['rho_pcm']))
+
+
+def select_pruned(importance, threshold_pcm=1.0, keep=KEEP):
+    # the entries of reactivity_importance() below threshold_pcm, as {material name: [nuclides]}
+    pruned = {}
+    for entry in importance:
+        if abs(entry['rho_pcm']) < threshold_pcm and entry['nuclide'] not in keep:
+            pruned.setdefault(entry['material'], []).append(entry['nuclide'])
+    return pruned
+
+
+def prune_model(model, pruned):
+    # copy of model without the nuclides of pruned {material name: [nuclides]}
+    model = copy.deepcopy(model)
+    for material in model.materials:
+        for nuclide in pruned.get(material.name, []):
+            material.remove_nuclide(nuclide)
+    return model
+
+
+def library_sizes(cross_sections=None):
+    # {nuclide: size in bytes of its neutron cross section file}, empty without a library
+    cross_sections = cross_sections or mc.config.get('cross_sections')
+    if cross_sections is None or not os.path.isfile(cross_sections):
+        return {}
+    library = openmc.data.DataLibrary.from_xml(cross_sections)
+    return {name: os.path.getsize(entry['path']) for entry in library.libraries if entry['type'] == 'neutron'
+            for name in entry['materials'] if os.path.isfile(entry['path'])}
+
+
+def _run(model, threads, directory, analyze=None):
+    # k-eff, its standard deviation and the transport time of a run, and analyze(statepoint path) when given
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        statepoint = model.run(cwd=tmp, threads=threads, output=False)
+        path = os.path.join(tmp, statepoint)
+        with mc.StatePoint(path, autolink=False) as sp:
+            result = {'keff': sp.keff.nominal_value, 'keff_std': sp.keff.std_dev,
+                      'transport_time': sp.runtime['transport'], 'loading_time': sp.runtime['reading cross sections']}
+        if analyze is not None:
+            result['analysis'] = analyze(path)
+    return result
+
+
+def run_pruning(core, threshold_pcm=1.0, material_names=None, keep=KEEP, core_state=None, blade_positions=None,
+                settings_profile='default', loading_pattern=None, threads=None, directory=None, cross_sections=None):
+    '''
+    Ranks the nuclides of the fuel materials of the core module core (or of material_names), prunes those contributing
+    less than threshold_pcm and measures the effect of the pruning. Returns {'importance', 'pruned', 'estimated_bias_pcm',
+    'keff_bias_pcm', 'keff_bias_pcm_std', 'speedup', 'library_bytes_saved', 'model': the pruned model}.
+    '''
+    if material_names is None:
+        material_names = [name for name in core.PLATE_MATERIALS.values() if name != 'Al6061']
+    mc.reset_auto_ids()
+    materials = core.build_materials(core_state)
+    geometry = core.build_geometry(materials, blade_positions, loading_pattern)
+    model = mc.Model(geometry=geometry, materials=mc.Materials(materials.values()),
+                     settings=core.build_settings(settings_profile))
+    targets = [materials[name] for name in material_names]
+
+    # the reference run gives the importance, the reference timing comes from the same model without the tallies
+    model.tallies = importance_tallies(targets)
+    importance = _run(model, threads, directory, lambda path: reactivity_importance(path, targets))['analysis']
+    model.tallies = mc.Tallies()
+    reference = _run(model, threads, directory)
+
+    pruned = select_pruned(importance, threshold_pcm, keep)
+    pruned_model = prune_model(model, pruned)
+    result = _run(pruned_model, threads, directory)
+
+    estimated = sum(entry['rho_pcm'] for entry in importance
+                    if entry['nuclide'] in pruned.get(entry['material'], []))
+    # a cross section file is only no longer loaded when no material of the model uses the nuclide anymore
+    used = {nuclide for material in pruned_model.materials for nuclide in material.get_nuclides()}
+    sizes = library_sizes(cross_sections)
+    dropped = {nuclide for nuclides in pruned.values() for nuclide in nuclides} - used
+
+    return {'importance': importance, 'pruned': pruned, 'estimated_bias_pcm': estimated,
+            'keff_bias_pcm': (result['keff'] - reference['keff']) * 1e5,
+            'keff_bias_pcm_std': np.hypot(result['keff_std'], reference['keff_std']) * 1e5,
+            'speedup': reference['transport_time'] / result['transport_time'],
+            'loading_speedup': reference['loading_time'] / result['loading_time'],
+            'library_bytes_saved': sum(sizes.get(nuclide, 0) for nuclide in dropped) if sizes else None,
+            'model': pruned_model}
+
+
+def print_report(report):
+    n_pruned = sum(len(nuclides) for nuclides in report['pruned'].values())
+    print(f"{n_pruned} of {len(report['importance'])} nuclides pruned")
+    for material, nuclides in report['pruned'].items():
+        print(f"  {material}: {', '.join(nuclides)}")
+    print(f"estimated reactivity bias   {report['estimated_bias_pcm']:8.2f} pcm")
+    print(f"measured k-eff bias         {report['keff_bias_pcm']:8.1f} +/- {report['keff_bias_pcm_std']:.1f} pcm")
+    print(f"transport speedup           {report['speedup']:8.2f}x")
+    print(f"cross section loading       {report['loading_speedup']:8.2f}x")
+    if report['library_bytes_saved'] is not None:
+        print(f"cross section files dropped {report['library_bytes_saved'] / 2**20:8.1f} MB")
+
+
+if __name__ == "__main__":
+    from march2025_core import march2025_core
+
+    print_report(run_pruning(march2025_core, threshold_pcm=1.0))
@@ -0,0 +1,229 @@
+import csv
+from datetime import datetime
+
+import numpy as np
+
+'''
+Depletion schedules from operating logs, instead of the three constant power steps of depletion.py. A log is a CSV file
+with a time column and either the power in W (held until the next row, the last row closing the log) or the energy in
+kWh produced from a row to the next (the last row covering as long as the one before), e.g. daily or hourly console
+records. Times are ISO dates (2007-01-15 or 2007-01-15T09:30) or numbers in time_units.
+
+Every interval of the log would be a depletion step. compress_schedule() merges consecutive intervals into steps at their
+average power, which keeps the energy of every step exact, as long as the compressed schedule stays within tolerance of
+the log for
+
+    energy      the cumulative energy at every time of the log, relative to the total energy
+    xenon       Xe-135 (I-135 -> Xe-135, burnout and decay) at every time of the log, relative to its equilibrium at the
+                highest power of the log
+    samarium    Sm-149 (Pm-149 -> Sm-149, burnout), relative to its highest value over the log
+
+The xenon and samarium chains are solved analytically over every constant power interval, with a one group flux
+proportional to the power (FLUX_PER_WATT). Steps at zero power are kept apart from steps at power as they are pure decay
+steps, without transport. The number of transport solves is counted for a predictor-corrector integrator (CECM, two per
+step at power) plus the final one.
+
+    durations, powers = read_log('console_log.csv', energy_column='kWh')
+    schedule = compress_schedule(durations, powers)
+    TIME, POWER = schedule['time_days'], schedule['power_w']
+'''
+
+# thermal flux per watt of reactor power, about 1e12 n/cm2-s at 100 kW
+FLUX_PER_WATT = 1e7
+
+# cumulative fission yields and decay constants (1/s), thermal absorption cross sections (cm2)
+IODINE_YIELD, XENON_YIELD = 0.0639, 0.00237
+IODINE_DECAY, XENON_DECAY = 2.87e-5, 2.09e-5
+XENON_ABSORPTION = 2.65e-18
+PROMETHIUM_YIELD, PROMETHIUM_DECAY = 0.0108, 3.63e-6
+SAMARIUM_ABSORPTION = 4.1e-20
+
+SOLVES_PER_STEP = 2
+
+TIME_UNITS = {'s': 1.0, 'h': 3600.0, 'd': 86400.0}
+
+
+def _seconds(values, time_units):
+    # times of the log in s from the first one
+    try:
+        times = np.array([float(value) for value in values]) * TIME_UNITS[time_units]
+    except ValueError:
+        times = np.array([datetime.fromisoformat(value.strip()).timestamp() for value in values])
+    return times - times[0]
+
+
+def read_log(path, time_column='time', power_column=None, energy_column=None, time_units='h'):
+    '''
+    Constant power intervals of a CSV operating log, as (durations in s, powers in W), from power_column (W) or from
+    energy_column (kWh per row).
+    '''
+    if (power_column is None) == (energy_column is None):
+        raise ValueError('Give exactly one of power_column and energy_column')
+    if time_units not in TIME_UNITS:
+        raise ValueError(f'Unknown time units "{time_units}", expected one of {list(TIME_UNITS)}')
+    with open(path, newline='') as fh:
+        rows = list(csv.DictReader(fh))
+    if len(rows) < 2:
+        raise ValueError(f'{path} needs at least two rows')
+
+    times = _seconds([row[time_column] for row in rows], time_units)
+    durations = np.diff(times)
+    if power_column is not None:
+        powers = np.array([float(row[power_column]) for row in rows[:-1]])
+    else:
+        durations = np.append(durations, durations[-1])
+        powers = np.array([float(row[energy_column]) for row in rows]) * 3.6e6 / durations
+    if np.any(durations <= 0):
+        raise ValueError(f'The times of {path} must be increasing')
+    if np.any(powers < 0):
+        raise ValueError(f'{path} has negative powers or energies')
+    return durations, powers
+
+
+def _chain(parent, daughter, rate, t, parent_yield, parent_decay, daughter_yield, daughter_feed, daughter_removal):
+    '''
+    Parent and daughter concentrations after times t at a constant fission rate, from (parent, daughter) at t = 0: the
+    parent is produced by fission and decays into the daughter, which is produced by fission and removed at
+    daughter_removal (1/s). daughter_feed is the decay constant feeding the daughter (the parent decay).
+    '''
+    parent_eq = parent_yield * rate / parent_decay
+    parent_t = parent_eq + (parent - parent_eq) * np.exp(-parent_decay * t)
+    daughter_eq = (parent_decay * parent_eq + daughter_yield * rate) / daughter_removal if daughter_removal > 0 else 0.0
+    if np.isclose(daughter_removal, parent_decay, rtol=1e-9, atol=0):
+        transfer = daughter_feed * (parent - parent_eq) * t * np.exp(-parent_decay * t)
+    else:
+        transfer = (daughter_feed * (parent - parent_eq) * (np.exp(-parent_decay * t) - np.exp(-daughter_removal * t))
+                    / (daughter_removal - parent_decay))
+    return parent_t, daughter_eq + (daughter - daughter_eq) * np.exp(-daughter_removal * t) + transfer
+
+
+def poison_history(durations, powers, times=None):
+    '''
+    Xe-135 and Sm-149 (arbitrary units, fission rate taken as the power in W) at the end of every interval, or at times
+    (s, sorted) when given, starting from a clean core.
+    '''
+    starts = np.concatenate(([0.0], np.cumsum(durations)))
+    times = starts[1:] if times is None else np.asarray(times, dtype=float)
+    xenon, samarium = np.empty(len(times)), np.empty(len(times))
+    state = np.zeros(4)
+    for k, (duration, power) in enumerate(zip(durations, powers)):
+        flux = FLUX_PER_WATT * power
+        inside = (times > starts[k]) & (times <= starts[k + 1]) if k else (times >= 0) & (times <= starts[1])
+        t = np.append(times[inside] - starts[k], duration)
+        iodine, xe = _chain(state[0], state[1], power, t, IODINE_YIELD, IODINE_DECAY, XENON_YIELD, IODINE_DECAY,
+                            XENON_DECAY + XENON_ABSORPTION * flux)
+        promethium, sm = _chain(state[2], state[3], power, t, PROMETHIUM_YIELD, PROMETHIUM_DECAY, 0.0,
+                                PROMETHIUM_DECAY, SAMARIUM_ABSORPTION * flux)
+        xenon[inside], samarium[inside] = xe[:-1], sm[:-1]
+        state = np.array([iodine[-1], xe[-1], promethium[-1], sm[-1]])
+    return xenon, samarium
+
+
+def xenon_equilibrium(power):
+    # equilibrium Xe-135 at power, in the units of poison_history()
+    return (IODINE_YIELD + XENON_YIELD) * power / (XENON_DECAY + XENON_ABSORPTION * FLUX_PER_WATT * power)
+
+
+def transport_solves(powers):
+    # transport solves of a depletion over steps at powers, the zero power steps needing none
+    return SOLVES_PER_STEP * int(np.count_nonzero(np.asarray(powers) > 0)) + 1
+
+
+def schedule_errors(durations, powers, step_durations, step_powers):
+    # largest relative energy, xenon and samarium errors of a schedule against the log, at every time of the log
+    times = np.cumsum(durations)
+    energy = np.cumsum(durations * powers)
+    step_ends = np.cumsum(step_durations)
+    step_energy = np.concatenate(([0.0], np.cumsum(step_durations * step_powers)))
+    # cumulative energy of the schedule at the times of the log, linear within a step
+    step_index = np.minimum(np.searchsorted(step_ends, times, side='left'), len(step_ends) - 1)
+    step_starts = step_ends - step_durations
+    scheduled = step_energy[step_index] + step_powers[step_index] * (times - step_starts[step_index])
+
+    xenon, samarium = poison_history(durations, powers)
+    step_xenon, step_samarium = poison_history(step_durations, step_powers, times)
+    return (np.abs(scheduled - energy).max() / max(energy[-1], 1e-300),
+            np.abs(step_xenon - xenon).max() / max(xenon_equilibrium(powers.max()), 1e-300),
+            np.abs(step_samarium - samarium).max() / max(samarium.max(), 1e-300))
+
+
+def compress_schedule(durations, powers, energy_tolerance=0.01, xenon_tolerance=0.05, samarium_tolerance=0.02):
+    '''
+    Greedy compression of a log into depletion steps: each step takes the following intervals of the log as long as
+    the schedule stays within the tolerances (see the module docstring) over them. Returns {'time_days', 'power_w' (the
+    steps in the form of TIME and POWER of depletion.py), 'log_steps', 'steps', 'log_solves', 'solves',
+    'energy_error', 'xenon_error', 'samarium_error'}.
+    '''
+    durations, powers = np.asarray(durations, dtype=float), np.asarray(powers, dtype=float)
+    starts = np.concatenate(([0.0], np.cumsum(durations)))
+    energy = np.concatenate(([0.0], np.cumsum(durations * powers)))
+    xenon, samarium = poison_history(durations, powers)
+    xenon_scale = max(xenon_equilibrium(powers.max()), 1e-300)
+    samarium_scale = max(samarium.max(), 1e-300)
+    total_energy = max(energy[-1], 1e-300)
+
+    step_durations, step_powers = [], []
+    state = np.zeros(4)
+    first = 0
+    while first < len(durations):
+        last = first + 1
+        candidate = None
+        while last <= len(durations):
+            # a step never mixes zero power and power
+            if last > first + 1 and (powers[last - 1] > 0) != (powers[first] > 0):
+                break
+            duration = starts[last] - starts[first]
+            power = (energy[last] - energy[first]) / duration
+            t = starts[first + 1:last + 1] - starts[first]
+            energy_error = np.abs(energy[first] + power * t - energy[first + 1:last + 1]).max() / total_energy
+            flux = FLUX_PER_WATT * power
+            _, xe = _chain(state[0], state[1], power, t, IODINE_YIELD, IODINE_DECAY, XENON_YIELD, IODINE_DECAY,
+                           XENON_DECAY + XENON_ABSORPTION * flux)
+            _, sm = _chain(state[2], state[3], power, t, PROMETHIUM_YIELD, PROMETHIUM_DECAY, 0.0, PROMETHIUM_DECAY,
+                           SAMARIUM_ABSORPTION * flux)
+            within = (energy_error <= energy_tolerance and
+                      np.abs(xe - xenon[first:last]).max() / xenon_scale <= xenon_tolerance and
+                      np.abs(sm - samarium[first:last]).max() / samarium_scale <= samarium_tolerance)
+            # a single interval of the log is always a valid step
+            if not within and last > first + 1:
+                break
+            candidate = (last, duration, power)
+            last += 1
+
+        last, duration, power = candidate
+        step_durations.append(duration)
+        step_powers.append(power)
+        # the next step starts from the state the compressed schedule reaches, so that errors do not go unnoticed
+        flux = FLUX_PER_WATT * power
+        iodine, xe = _chain(state[0], state[1], power, duration, IODINE_YIELD, IODINE_DECAY, XENON_YIELD, IODINE_DECAY,
+                            XENON_DECAY + XENON_ABSORPTION * flux)
+        promethium, sm = _chain(state[2], state[3], power, duration, PROMETHIUM_YIELD, PROMETHIUM_DECAY, 0.0,
+                                PROMETHIUM_DECAY, SAMARIUM_ABSORPTION * flux)
+        state = np.array([iodine, xe, promethium, sm])
+        first = last
+
+    step_durations, step_powers = np.array(step_durations), np.array(step_powers)
+    energy_error, xenon_error, samarium_error = schedule_errors(durations, powers, step_durations, step_powers)
+    return {'time_days': list(step_durations / 86400), 'power_w': list(step_powers), 'log_steps': len(durations),
+            'steps': len(step_durations), 'log_solves': transport_solves(powers),
+            'solves': transport_solves(step_powers), 'energy_error': energy_error, 'xenon_error': xenon_error,
+            'samarium_error': samarium_error}
+
+
+def print_schedule(schedule):
+    print(f"{schedule['log_steps']} log intervals -> {schedule['steps']} depletion steps")
+    print(f"transport solves: {schedule['log_solves']} for the log, {schedule['solves']} for the compressed schedule")
+    print(f"largest errors: energy {schedule['energy_error']:.2%}, Xe-135 {schedule['xenon_error']:.2%}, "
+          f"Sm-149 {schedule['samarium_error']:.2%}")
+
+
+if __name__ == "__main__":
+    import sys
+
+    # python operating_log.py console_log.csv kWh   (the energy column, or W for a power column)
+    path, column = sys.argv[1:3]
+    durations, powers = read_log(path, **({'power_column': column} if column == 'W' else {'energy_column': column}))
+    schedule = compress_schedule(durations, powers)
+    print_schedule(schedule)
+    print(f"TIME = {[round(days, 4) for days in schedule['time_days']]} # days")
+    print(f"POWER = {[round(power, 1) for power in schedule['power_w']]} # Watts")
@@ -0,0 +1,87 @@
+import copy
+import os
+import tempfile
+
+import openmc as mc
+
+'''
+Precision driven runs. Instead of a fixed number of batches, OpenMC triggers stop the run as soon as the standard
+deviation of k-eff is below a target (in pcm) and, optionally, the relative error of named tallies is below their own
+targets. settings.batches becomes the minimum number of batches, the targets are checked after every batch from then on,
+and trigger_max_batches caps the run when a target cannot be reached.
+
+The 'precision' settings profile of the cores sets the k-eff target alone (as set_keff_trigger() does),
+run_to_precision() adds tally targets.
+'''
+
+
+def set_keff_trigger(settings, keff_std_pcm=20.0, max_batches=None, interval=1):
+    '''
+    Stops the runs of settings once the k-eff standard deviation is below keff_std_pcm, no k-eff trigger when it is None.
+    max_batches caps the run, by default the cap already in settings or four times settings.batches when it has none.
+    '''
+    if keff_std_pcm is None:
+        settings.keff_trigger = None
+    else:
+        settings.keff_trigger = {'type': 'std_dev', 'threshold': keff_std_pcm * 1e-5}
+        settings.trigger_active = True
+    if max_batches is not None:
+        settings.trigger_max_batches = max_batches
+    elif settings.trigger_max_batches is None:
+        settings.trigger_max_batches = 4 * settings.batches
+    settings.trigger_batch_interval = interval
+
+
+def set_precision_targets(model, keff_std_pcm=20.0, tally_targets=None, max_batches=None, interval=1):
+    '''
+    Turns on the triggers of model: k-eff standard deviation below keff_std_pcm (none when it is None) and, for every
+    {tally name: relative error} in tally_targets, the relative error of every score of that tally below the target.
+    max_batches defaults to the cap already in the settings (e.g. the one of the 'precision' profile), else to four times
+    settings.batches.
+    '''
+    settings = model.settings
+    set_keff_trigger(settings, keff_std_pcm, max_batches, interval)
+    settings.trigger_active = keff_std_pcm is not None or bool(tally_targets)
+
+    tallies = {tally.name: tally for tally in model.tallies}
+    for name, rel_err in (tally_targets or {}).items():
+        if name not in tallies:
+            raise ValueError(f'No tally named "{name}" in the model, expected one of {list(tallies)}')
+        tallies[name].triggers = [mc.Trigger('rel_err', rel_err, scores=list(tallies[name].scores))]
+
+
+def precision_report(statepoint_path, keff_std_pcm=None, tally_targets=None):
+    # batches actually run, k-eff and whether every target was met at the end of a run
+    with mc.StatePoint(statepoint_path, autolink=False) as sp:
+        report = {'batches': sp.current_batch, 'keff': sp.keff.nominal_value, 'keff_std_pcm': sp.keff.std_dev * 1e5}
+        met = keff_std_pcm is None or report['keff_std_pcm'] <= keff_std_pcm
+        report['tallies'] = {}
+        for name, target in (tally_targets or {}).items():
+            tally = sp.get_tally(name=name)
+            nonzero = tally.mean > 0
+            worst = float((tally.std_dev[nonzero] / tally.mean[nonzero]).max()) if nonzero.any() else float('inf')
+            report['tallies'][name] = worst
+            met = met and worst <= target
+        report['targets_met'] = met
+    return report
+
+
+def run_to_precision(model, keff_std_pcm=20.0, tally_targets=None, max_batches=None, threads=None, directory=None):
+    '''
+    Runs a copy of model until every target is met (see set_precision_targets()) and returns precision_report(), model
+    itself is left untouched.
+    '''
+    model = copy.deepcopy(model)
+    set_precision_targets(model, keff_std_pcm, tally_targets, max_batches)
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        statepoint = model.run(cwd=tmp, threads=threads, output=False)
+        return precision_report(os.path.join(tmp, statepoint), keff_std_pcm, tally_targets)
+
+
+if __name__ == "__main__":
+    from fresh_core.fresh_core import build_model
+
+    # an operational run: 20 pcm is enough, batches is only the minimum
+    report = run_to_precision(build_model(settings_profile='precision'), keff_std_pcm=20)
+    print(f"{report['batches']} batches, k = {report['keff']:.5f} +/- {report['keff_std_pcm']:.1f} pcm, "
+          f"targets {'met' if report['targets_met'] else 'NOT met'}")
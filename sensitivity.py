@@ -0,0 +1,152 @@
+import os
+import tempfile
+
+import openmc as mc
+import openmc.data
+
+'''
+First order sensitivities of the reactivity to the uncertain inputs of the material definitions (boron impurities, water
+density), all from a single reference run. For every perturbation, a differential tally (TallyDerivative) of the total
+nu-fission rate per source neutron, which is the k-eff estimate, gives dk/dp with respect to
+
+    density           the mass density of a material, in g/cm3
+    nuclide_density   the atom density of a nuclide in a material, in atom/b-cm, converted to ppm of an element by
+                      weight ('wo', ppm of the mass of the material) or by atoms ('ao', ppm of its atoms)
+
+and dk is turned into reactivity, d(rho) = dk / k^2. Differential tallies do not follow the change of the fission source
+shape, so the sensitivities are first order estimates for small perturbations. An element that is not in a material yet
+(boron in the fuel and in Al6061) is added at a trace fraction in the reference run so that its derivative is scored.
+'''
+
+# the open questions of the material definitions, 'size' is the perturbation the effect in pcm is reported for, the boron
+# of FUEL_PERTURBATION is applied to every fuel material of the core (see default_perturbations())
+FUEL_PERTURBATION = {'element': 'B', 'percent_type': 'wo', 'size': 8}
+PERTURBATIONS = [
+    {'name': 'boron in Al6061', 'material': 'Al6061', 'element': 'B', 'percent_type': 'ao', 'size': 20},
+    {'name': 'boron in graphite', 'material': 'graphite', 'element': 'B', 'percent_type': 'ao', 'size': 5},
+    {'name': 'water density', 'material': 'water', 'density': True, 'size': 0.0025},
+]
+
+TRACE_FRACTION = 1e-10
+
+
+def default_perturbations(core):
+    # FUEL_PERTURBATION for every fuel material of the core module core ('fuel', or 'old_fuel' and 'new_fuel'), then
+    # PERTURBATIONS
+    fuels = [name for name in core.PLATE_MATERIALS.values() if name != 'Al6061']
+    return [dict(FUEL_PERTURBATION, name=f'boron in {name}', material=name) for name in fuels] + PERTURBATIONS
+
+
+def _check_materials(materials, perturbations):
+    unknown = sorted({perturbation['material'] for perturbation in perturbations} - set(materials))
+    if unknown:
+        raise ValueError(f'Unknown materials {unknown} in the perturbations, expected some of {list(materials)}')
+
+
+def _element_nuclides(element):
+    # {nuclide: atom fraction} of the natural element
+    return {nuclide: fraction for nuclide, fraction in openmc.data.isotopes(element)}
+
+
+def _ppm_to_atom_density(material, element, percent_type):
+    # {nuclide: change of atom density in atom/b-cm} for 1 ppm of element added to material
+    nuclides = _element_nuclides(element)
+    if percent_type == 'wo':
+        element_mass = sum(fraction * openmc.data.atomic_mass(nuclide) for nuclide, fraction in nuclides.items())
+        atoms = material.get_mass_density() * 1e-6 / element_mass * openmc.data.AVOGADRO * 1e-24
+    else:
+        atoms = sum(material.get_nuclide_atom_densities().values()) * 1e-6
+    return {nuclide: atoms * fraction for nuclide, fraction in nuclides.items()}
+
+
+def add_trace_nuclides(materials, perturbations):
+    # adds the nuclides of the perturbed elements that a material does not contain yet, at a trace fraction
+    for perturbation in perturbations:
+        if 'element' not in perturbation:
+            continue
+        material = materials[perturbation['material']]
+        percent_type = material.nuclides[0].percent_type
+        present = {nuclide.name for nuclide in material.nuclides}
+        for nuclide in _element_nuclides(perturbation['element']):
+            if nuclide not in present:
+                material.add_nuclide(nuclide, TRACE_FRACTION, percent_type)
+
+
+def sensitivity_tallies(materials, perturbations):
+    # one nu-fission tally per derivative, named after the perturbation (and the nuclide for nuclide densities)
+    tallies = mc.Tallies()
+    for perturbation in perturbations:
+        material = materials[perturbation['material']]
+        if perturbation.get('density'):
+            derivatives = {perturbation['name']: mc.TallyDerivative('density', material=material.id)}
+        else:
+            derivatives = {f"{perturbation['name']} {nuclide}":
+                           mc.TallyDerivative('nuclide_density', material=material.id, nuclide=nuclide)
+                           for nuclide in _element_nuclides(perturbation['element'])}
+        for name, derivative in derivatives.items():
+            tally = mc.Tally(name=name)
+            tally.scores = ['nu-fission']
+            tally.derivative = derivative
+            tallies.append(tally)
+    return tallies
+
+
+def sensitivities(statepoint_path, materials, perturbations):
+    '''
+    Reactivity sensitivities of a run with sensitivity_tallies(), ranked by the size of their effect, as a list of
+    {'name', 'unit', 'pcm_per_unit', 'pcm_per_unit_std', 'size', 'effect_pcm', 'effect_pcm_std'}.
+    '''
+    results = []
+    with mc.StatePoint(statepoint_path, autolink=False) as sp:
+        keff = sp.keff.nominal_value
+        for perturbation in perturbations:
+            if perturbation.get('density'):
+                tally = sp.get_tally(name=perturbation['name'])
+                dk, variance = float(tally.mean.ravel()[0]), float(tally.std_dev.ravel()[0])**2
+                unit = 'g/cm3'
+            else:
+                per_ppm = _ppm_to_atom_density(materials[perturbation['material']], perturbation['element'],
+                                               perturbation['percent_type'])
+                dk, variance = 0.0, 0.0
+                for nuclide, atom_density in per_ppm.items():
+                    tally = sp.get_tally(name=f"{perturbation['name']} {nuclide}")
+                    dk += float(tally.mean.ravel()[0]) * atom_density
+                    variance += (float(tally.std_dev.ravel()[0]) * atom_density)**2
+                unit = f"ppm ({perturbation['percent_type']})"
+
+            pcm, pcm_std = dk / keff**2 * 1e5, variance**0.5 / keff**2 * 1e5
+            results.append({'name': perturbation['name'], 'unit': unit, 'pcm_per_unit': pcm, 'pcm_per_unit_std': pcm_std,
+                            'size': perturbation['size'], 'effect_pcm': pcm * perturbation['size'],
+                            'effect_pcm_std': pcm_std * abs(perturbation['size'])})
+    return sorted(results, key=lambda result: -abs(result['effect_pcm']))
+
+
+def run_sensitivities(core, perturbations=None, core_state=None, blade_positions=None,
+                      settings_profile='default', loading_pattern=None, threads=None, directory=None):
+    # reference run of the core module core with the differential tallies (default_perturbations() by default), returns
+    # sensitivities()
+    perturbations = default_perturbations(core) if perturbations is None else perturbations
+    mc.reset_auto_ids()
+    materials = core.build_materials(core_state)
+    _check_materials(materials, perturbations)
+    add_trace_nuclides(materials, perturbations)
+    geometry = core.build_geometry(materials, blade_positions, loading_pattern)
+    model = mc.Model(geometry=geometry, materials=mc.Materials(materials.values()),
+                     settings=core.build_settings(settings_profile), tallies=sensitivity_tallies(materials, perturbations))
+
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        statepoint = model.run(cwd=tmp, threads=threads, output=False)
+        return sensitivities(os.path.join(tmp, statepoint), materials, perturbations)
+
+
+def print_table(results):
+    print(f"{'perturbation':<20} {'pcm per unit':>24}   {'size':>8}  {'effect (pcm)':>16}")
+    for result in results:
+        print(f"{result['name']:<20} {result['pcm_per_unit']:>10.2f} +/- {result['pcm_per_unit_std']:<6.2f}"
+              f"{result['unit']:<9} {result['size']:>8g}  {result['effect_pcm']:>7.1f} +/- {result['effect_pcm_std']:.1f}")
+
+
+if __name__ == "__main__":
+    from fresh_core import fresh_core
+
+    print_table(run_sensitivities(fresh_core))
@@ -0,0 +1,135 @@
+import tempfile
+import warnings
+
+import h5py
+import numpy as np
+import openmc.lib
+from openmc.utility_funcs import change_directory
+
+'''
+Fission source convergence from the Shannon entropy (on the entropy_mesh of build_settings()) and the k-eff of every
+batch, instead of a fixed number of inactive batches.
+
+The stationarity test compares two consecutive windows of `window` batches: the source is taken as converged from the
+start of the first window when, for both the entropy and k-eff, the difference of the two window means is within z
+standard deviations of its own noise. Batches are correlated, so the noise is underestimated and the test errs on the
+late side.
+
+ - analyze_statepoint() runs the test on a finished run (e.g. statepoint.500.h5) and warns when the source was not
+   converged within its inactive batches,
+ - run_with_convergence_detection() runs the test live through openmc.lib and starts the active batches as soon as it
+   passes, keeping the number of active batches of the settings. When the test has not passed at the end of the
+   configured inactive batches, they are extended up to max_inactive, with a warning.
+'''
+
+
+def stationary(values, window, z=2.0):
+    # True when the last two windows of values have the same mean within z standard deviations
+    first, second = np.asarray(values[-2 * window:-window]), np.asarray(values[-window:])
+    if len(first) < window or len(second) < window:
+        return False
+    noise = np.sqrt(first.var(ddof=1) / window + second.var(ddof=1) / window)
+    return abs(first.mean() - second.mean()) <= z * noise
+
+
+def converged_batch(entropy, k_generation, window=20, z=2.0):
+    # first batch from which entropy and k-eff are stationary, None when they never are
+    for start in range(len(entropy) - 2 * window + 1):
+        end = start + 2 * window
+        if stationary(entropy[start:end], window, z) and stationary(k_generation[start:end], window, z):
+            return start
+    return None
+
+
+def _read_history(statepoint_path):
+    with h5py.File(statepoint_path, 'r') as sp:
+        if 'entropy' not in sp:
+            raise ValueError(f'{statepoint_path} has no Shannon entropy, the run needs an entropy_mesh')
+        return sp['entropy'][()], sp['k_generation'][()], int(sp['n_inactive'][()])
+
+
+def analyze_statepoint(statepoint_path, window=20, z=2.0):
+    '''
+    Convergence of a finished run: {'converged_at': first converged batch or None, 'inactive': inactive batches of the
+    run, 'enough': whether they covered the convergence}. Warns when they did not.
+    '''
+    entropy, k_generation, inactive = _read_history(statepoint_path)
+    converged_at = converged_batch(entropy, k_generation, window, z)
+    enough = converged_at is not None and converged_at <= inactive
+    if converged_at is None:
+        warnings.warn(f'{statepoint_path}: the fission source never became stationary over {len(entropy)} batches')
+    elif not enough:
+        warnings.warn(f'{statepoint_path}: the source converged at batch {converged_at}, after the {inactive} inactive '
+                      f'batches, the first active batches are biased')
+    return {'converged_at': converged_at, 'inactive': inactive, 'enough': enough}
+
+
+def run_with_convergence_detection(model, window=20, z=2.0, max_inactive=None, threads=None, directory=None):
+    '''
+    Runs model through openmc.lib, switching to active batches once the source is stationary. Returns {'keff',
+    'keff_std', 'inactive': inactive batches actually run, 'configured_inactive', 'converged_at', 'batches'}.
+    '''
+    configured_inactive = model.settings.inactive
+    configured_batches = model.settings.batches
+    n_active = configured_batches - configured_inactive
+    max_inactive = max_inactive if max_inactive is not None else 2 * configured_inactive
+
+    with tempfile.TemporaryDirectory(dir=directory) as tmp, change_directory(tmp):
+        # room for the active batches after the longest inactive phase, the loop below stops after n_active of them
+        model.settings.batches = max_inactive + n_active
+        try:
+            model.export_to_xml()
+        finally:
+            model.settings.batches = configured_batches
+        openmc.lib.init(args=['-s', str(threads)] if threads else None, output=False)
+        try:
+            openmc.lib.simulation_init()
+            openmc.lib.settings.batches = configured_batches
+            converged_at = None
+            gave_up = False
+            for _ in openmc.lib.iter_batches():
+                batch = openmc.lib.current_batch()
+                if converged_at is None and not gave_up and batch >= 2 * window:
+                    # the entropy and k-eff histories so far, from a statepoint without the source bank
+                    openmc.lib.statepoint_write('history.h5', write_source=False)
+                    entropy, k_generation, _ = _read_history('history.h5')
+                    if stationary(entropy, window, z) and stationary(k_generation, window, z):
+                        converged_at = batch - 2 * window
+                        openmc.lib.settings.inactive = batch
+                if converged_at is None and not gave_up and batch == openmc.lib.settings.inactive:
+                    # not stationary yet, the next batch stays inactive
+                    if batch < max_inactive:
+                        openmc.lib.settings.inactive = batch + 1
+                    else:
+                        gave_up = True
+                # the active batches follow the inactive ones wherever they end
+                openmc.lib.settings.batches = openmc.lib.settings.inactive + n_active
+                if batch >= openmc.lib.settings.batches:
+                    break
+            batches = openmc.lib.current_batch()
+            inactive = openmc.lib.settings.inactive
+            openmc.lib.simulation_finalize()
+            keff, keff_std = openmc.lib.keff()
+        finally:
+            openmc.lib.finalize()
+
+    if gave_up:
+        warnings.warn(f'The fission source was not stationary after {max_inactive} inactive batches')
+    elif converged_at is not None and inactive > configured_inactive:
+        warnings.warn(f'The fission source needed {inactive} inactive batches, more than the {configured_inactive} '
+                      f'of the settings')
+    if batches - inactive < n_active:
+        warnings.warn(f'Only {max(batches - inactive, 0)} active batches were run, instead of {n_active}')
+    return {'keff': keff, 'keff_std': keff_std, 'inactive': inactive, 'configured_inactive': configured_inactive,
+            'converged_at': converged_at, 'batches': batches}
+
+
+if __name__ == "__main__":
+    import sys
+
+    # post-hoc analysis of the statepoints given on the command line, by default those shipped with both cores
+    paths = sys.argv[1:] or ['fresh_core/statepoint.500.h5', 'march2025_core/statepoint.500.h5']
+    for path in paths:
+        result = analyze_statepoint(path)
+        print(f"{path}: source converged at batch {result['converged_at']}, {result['inactive']} inactive batches "
+              f"({'enough' if result['enough'] else 'NOT enough'})")
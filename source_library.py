@@ -0,0 +1,133 @@
+import glob
+import json
+import os
+import tempfile
+import xml.etree.ElementTree as ET
+
+import h5py
+import numpy as np
+import openmc as mc
+
+from blade_sweep import model_blade_positions, rotation_cells
+from model_export import digest, serialize_parts
+
+'''
+Library of converged fission sources. Every run of a core starts from the point source of build_settings() and spends
+its inactive batches converging the source. The library keeps the final source bank of finished runs under
+
+    <root>/<core state>/<blade positions>.h5 (+ .json)
+
+where the core state is a hash of materials.xml and of geometry.xml without the blade rotations, so a depleted core or a
+new loading pattern never reuses the source of another one. A new run of the same state starts from the stored source
+whose blade positions are closest (Euclidean distance in console units), with fewer inactive batches: min_inactive for
+the same positions, growing linearly with the distance up to the full count at max_distance and beyond.
+
+    library = SourceLibrary()
+    statepoint = library.run(build_model(blade_positions={'regulating_blade': 400}))
+'''
+
+
+def _write_atomically(path, write):
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', dir=os.path.dirname(path))
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def state_key(model):
+    # hash of everything in the model but the blade rotations and the settings
+    parts = serialize_parts(model)
+    geometry = ET.fromstring(parts['geometry.xml'])
+    rotation_ids = {str(cell.id) for cell in rotation_cells(model.geometry).values()}
+    for cell in geometry.iter('cell'):
+        if cell.get('id') in rotation_ids:
+            cell.attrib.pop('rotation', None)
+    return digest(parts['materials.xml'] + ET.tostring(geometry))
+
+
+class SourceLibrary:
+
+    def __init__(self, root='source_library', min_inactive=10, max_distance=200.0):
+        self.root = os.path.abspath(root)
+        self.min_inactive = min_inactive
+        self.max_distance = max_distance
+        os.makedirs(self.root, exist_ok=True)
+
+    def _entry_path(self, state, positions):
+        name = digest(json.dumps(positions, sort_keys=True).encode())[:16]
+        return os.path.join(self.root, state, name)
+
+    def store(self, model, statepoint_path):
+        # adds the final source bank of a finished run of model to the library, replacing any source of the same case
+        state = state_key(model)
+        positions = model_blade_positions(model.geometry)
+        path = self._entry_path(state, positions)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        def write_source(tmp_path):
+            with h5py.File(statepoint_path, 'r') as sp, h5py.File(tmp_path, 'w') as source:
+                source.attrs['filetype'] = np.bytes_(b'source')
+                sp.copy('source_bank', source)
+        _write_atomically(path + '.h5', write_source)
+
+        with mc.StatePoint(statepoint_path, autolink=False) as sp:
+            entry = {'positions': positions, 'particles': sp.n_particles, 'batches': sp.n_batches,
+                     'keff': sp.keff.nominal_value, 'keff_std': sp.keff.std_dev}
+
+        def write_entry(tmp_path):
+            with open(tmp_path, 'w') as fh:
+                json.dump(entry, fh, indent=2)
+        _write_atomically(path + '.json', write_entry)
+        return dict(entry, source=path + '.h5')
+
+    def entries(self, model):
+        # every stored source of the state of model
+        entries = []
+        for path in sorted(glob.glob(os.path.join(self.root, state_key(model), '*.json'))):
+            with open(path) as fh:
+                entries.append(dict(json.load(fh), source=path[:-len('.json')] + '.h5'))
+        return [entry for entry in entries if os.path.exists(entry['source'])]
+
+    def nearest(self, model):
+        # (entry, distance) of the stored source closest to the blade positions of model, (None, None) when there is none
+        positions = model_blade_positions(model.geometry)
+        best, best_distance = None, None
+        for entry in self.entries(model):
+            distance = float(np.sqrt(sum((entry['positions'][blade] - position)**2
+                                         for blade, position in positions.items())))
+            if best is None or distance < best_distance:
+                best, best_distance = entry, distance
+        return best, best_distance
+
+    def warm_start(self, model):
+        '''
+        Points the source of model at the nearest stored source of its state and lowers its inactive batches according to
+        the distance. Returns the entry used, or None (model untouched) when the library has no source for this state.
+        '''
+        entry, distance = self.nearest(model)
+        if entry is None:
+            return None
+        full = model.settings.inactive
+        fraction = min(distance / self.max_distance, 1.0) if self.max_distance else 1.0
+        model.settings.inactive = min(full, int(round(self.min_inactive + (full - self.min_inactive) * fraction)))
+        model.settings.source = mc.FileSource(entry['source'])
+        return dict(entry, distance=distance)
+
+    def run(self, model, **run_kwargs):
+        # model.run() from the nearest stored source, storing the new converged source afterwards, returns the statepoint
+        original = (model.settings.source, model.settings.inactive)
+        try:
+            self.warm_start(model)
+            statepoint = model.run(**run_kwargs)
+        finally:
+            model.settings.source, model.settings.inactive = original
+        self.store(model, os.path.join(run_kwargs.get('cwd', '.'), statepoint))
+        return statepoint
+
+    def clear(self):
+        for path in glob.glob(os.path.join(self.root, '*', '*')):
+            os.remove(path)
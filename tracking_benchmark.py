@@ -0,0 +1,33 @@
+import os
+import tempfile
+
+import openmc as mc
+
+'''
+Particle tracking rate of a model, read back from the run timers in the statepoint the same way OpenMC reports
+"Calculation Rate (active)" at the end of a run. Used to compare geometry variants of the same core.
+'''
+
+
+def tracking_rate(statepoint_path):
+    # particles per second over the active and inactive batches of a finished run
+    with mc.StatePoint(statepoint_path, autolink=False) as sp:
+        n_active = sp.n_batches - sp.n_inactive
+        rates = {'active': sp.n_particles * n_active / sp.runtime['active batches']}
+        if sp.n_inactive:
+            rates['inactive'] = sp.n_particles * sp.n_inactive / sp.runtime['inactive batches']
+    return rates
+
+
+def measure_tracking_rate(model, particles=10000, batches=30, inactive=10, threads=None, directory=None):
+    # runs a short eigenvalue calculation of model and returns its tracking rates, the model settings are left untouched
+    original = (model.settings.particles, model.settings.batches, model.settings.inactive)
+    model.settings.particles = particles
+    model.settings.batches = batches
+    model.settings.inactive = inactive
+    try:
+        with tempfile.TemporaryDirectory(dir=directory) as tmp:
+            statepoint = model.run(cwd=tmp, threads=threads, output=False)
+            return tracking_rate(os.path.join(tmp, statepoint))
+    finally:
+        model.settings.particles, model.settings.batches, model.settings.inactive = original